@@ -1,57 +1,194 @@
-import uuid
-from typing import List, Optional
+from typing import List, Literal, Optional, Union
 
-from fastapi import APIRouter, File, HTTPException, Query, UploadFile
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi.responses import StreamingResponse
 from postgrest.exceptions import APIError
 
+from app.core.config import settings
 from app.core.database import (
+    create_game,
+    data_versions,
     delete_game,
+    games_repository,
     get_all_genres,
     get_all_platforms,
+    get_facet_counts,
     get_game,
     get_games,
+    get_games_batch,
     get_recent_games,
     get_top_games,
-    supabase,
+    load_facets,
+    load_recent_games,
+    load_search_index,
+    load_top_games,
+    set_game_cover,
     update_game,
+    upload_cover,
 )
 from app.schemas.game import (
+    FacetCount,
+    GameBatchResponse,
     GameCreate,
-    GameDetailResponse,
+    GameFields,
     GameFilter,
+    GameImportReport,
     GameListResponse,
     GameResponse,
     GameUpdate,
 )
+from app.services.etags import BIGINT_MAX
+from app.services.exporter import ExportFormat, export_response
+from app.services.fields import FieldSet, parse_fields
+from app.services.images import (
+    HEADER_SIZE,
+    saved_upload,
+    sniff_image_format,
+    too_large,
+)
+from app.services.importer import (
+    DuplicatePolicy,
+    ImportFormat,
+    detect_format,
+    import_games,
+)
 
 router = APIRouter(prefix="/games", tags=["Игры"])
 
-
-@router.get("/top", response_model=List[GameResponse])
-async def get_top_games_handler(limit: int = Query(10, ge=1, le=50)):
-    return await get_top_games(limit)
+games_etag = data_versions.conditional("games")
+game_etag = data_versions.conditional("game")
+list_etag = data_versions.conditional("games", search=load_search_index)
+top_etag = data_versions.conditional("games", indexes=[load_top_games])
+recent_etag = data_versions.conditional("games", indexes=[load_recent_games])
+facets_etag = data_versions.conditional("games", indexes=[load_facets])
+
+
+def game_fields(
+    fields: Optional[str] = Query(
+        None,
+        description="Только перечисленные поля, например "
+        "id,title,cover_image_path,average_rating",
+    ),
+) -> Optional[FieldSet]:
+    return parse_fields(fields, GameResponse.model_fields)
+
+
+@router.get(
+    "/top",
+    response_model=List[Union[GameResponse, GameFields]],
+    response_model_exclude_unset=True,
+    dependencies=[Depends(top_etag)],
+)
+async def get_top_games_handler(
+    limit: int = Query(10, ge=1, le=50),
+    fields: Optional[FieldSet] = Depends(game_fields),
+):
+    return await get_top_games(limit, fields)
 
 
-@router.get("/recent", response_model=List[GameResponse])
-async def get_recent_games_handler(limit: int = Query(10, ge=1, le=50)):
-    return await get_recent_games(limit)
+@router.get(
+    "/recent",
+    response_model=List[Union[GameResponse, GameFields]],
+    response_model_exclude_unset=True,
+    dependencies=[Depends(recent_etag)],
+)
+async def get_recent_games_handler(
+    limit: int = Query(10, ge=1, le=50),
+    fields: Optional[FieldSet] = Depends(game_fields),
+):
+    return await get_recent_games(limit, fields)
 
 
-@router.get("/genres", response_model=List[str])
+@router.get(
+    "/genres",
+    response_model=List[str],
+    dependencies=[Depends(facets_etag)],
+)
 async def get_all_genres_handler():
     return await get_all_genres()
 
 
-@router.get("/platforms", response_model=List[str])
+@router.get(
+    "/genres/counts",
+    response_model=List[FacetCount],
+    dependencies=[Depends(facets_etag)],
+)
+async def get_genre_counts_handler():
+    counts = await get_facet_counts("genres")
+    return [FacetCount(value=value, count=count) for value, count in counts]
+
+
+@router.get(
+    "/platforms",
+    response_model=List[str],
+    dependencies=[Depends(facets_etag)],
+)
 async def get_all_platforms_handler():
     return await get_all_platforms()
 
 
-@router.get("", response_model=GameListResponse)
+@router.get(
+    "/platforms/counts",
+    response_model=List[FacetCount],
+    dependencies=[Depends(facets_etag)],
+)
+async def get_platform_counts_handler():
+    counts = await get_facet_counts("platforms")
+    return [FacetCount(value=value, count=count) for value, count in counts]
+
+
+@router.get(
+    "/batch",
+    response_model=GameBatchResponse,
+    dependencies=[Depends(games_etag)],
+)
+async def get_games_batch_handler(
+    ids: str = Query(..., description="ID игр через запятую, например 3,1,7"),
+):
+    try:
+        game_ids = list(dict.fromkeys(int(x) for x in ids.split(",") if x.strip()))
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Некорректный список ID")
+    if any(not 0 < game_id <= BIGINT_MAX for game_id in game_ids):
+        raise HTTPException(status_code=422, detail="Некорректный список ID")
+    if not game_ids:
+        raise HTTPException(status_code=422, detail="Укажите хотя бы один ID")
+    if len(game_ids) > settings.GAMES_BATCH_MAX:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Не больше {settings.GAMES_BATCH_MAX} ID за запрос",
+        )
+
+    games = await get_games_batch(game_ids)
+    return GameBatchResponse(
+        items=[games.get(game_id) for game_id in game_ids],
+        missing=[game_id for game_id in game_ids if game_id not in games],
+    )
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_games_handler(format: ExportFormat = "ndjson", gzip: bool = False):
+    columns = list(GameResponse.model_fields)
+    chunks = games_repository.scan(",".join(columns), settings.SCAN_CHUNK_SIZE)
+    return export_response(chunks, format, columns, "games", gzip)
+
+
+@router.get(
+    "",
+    response_model=GameListResponse,
+    response_model_exclude_unset=True,
+    dependencies=[Depends(list_etag)],
+)
 async def list_games(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
-    q: Optional[str] = None,
+    q: Optional[str] = Query(
+        None,
+        description="Поиск по названию, разработчику и описанию. Результаты идут "
+        "по релевантности, sort и cursor с ним не принимаются; находится не больше "
+        f"{settings.SEARCH_MAX_RESULTS} игр (SEARCH_MAX_RESULTS), total тоже "
+        "ограничен этим числом",
+    ),
     genres: Optional[str] = None,
     platforms: Optional[str] = None,
     developer: Optional[str] = None,
@@ -59,6 +196,9 @@ async def list_games(
     max_year: Optional[int] = None,
     min_rating: Optional[float] = None,
     max_rating: Optional[float] = None,
+    sort: Optional[Literal["id", "rating", "created_at"]] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[FieldSet] = Depends(game_fields),
 ):
     genres_list = (
         [x.strip() for x in genres.split(",") if x.strip()] if genres else None
@@ -78,7 +218,9 @@ async def list_games(
         max_rating=max_rating,
     )
 
-    games, total = await get_games(page, page_size, filter_obj)
+    games, total, next_cursor = await get_games(
+        page, page_size, filter_obj, sort, cursor, fields
+    )
 
     return GameListResponse(
         items=games,
@@ -86,45 +228,33 @@ async def list_games(
         page=page,
         page_size=page_size,
         pages=(total + page_size - 1) // page_size,
+        next_cursor=next_cursor,
     )
 
 
-@router.get("/{game_id}", response_model=GameDetailResponse)
+@router.get(
+    "/{game_id}",
+    response_model=GameResponse,
+    dependencies=[Depends(game_etag)],
+)
 async def get_game_handler(game_id: int):
-    game = await get_game(game_id)
-
-    reviews_response = (
-        supabase.table("reviews")
-        .select("count", count="exact")
-        .eq("game_id", game_id)
-        .execute()
-    )
-
-    return {**game, "reviews_count": reviews_response.count or 0}
+    return await get_game(game_id)
 
 
 @router.post("", response_model=GameResponse, status_code=201)
 async def create_game_handler(game: GameCreate):
-    existing = (
-        supabase.table("games")
-        .select("id")
-        .eq("title", game.title)
-        .maybe_single()
-        .execute()
-    )
-
-    if existing:
+    if await games_repository.title_exists(game.title):
         raise HTTPException(
             status_code=409, detail="Игра с таким названием уже существует"
         )
 
     try:
-        response = supabase.table("games").insert(game.model_dump()).execute()
+        created = await create_game(game.model_dump())
 
-        if not response.data:
+        if not created:
             raise HTTPException(status_code=500, detail="Не удалось создать игру")
 
-        return response.data[0]
+        return created
 
     except APIError as e:
         if e.code == "23505":
@@ -137,45 +267,48 @@ async def create_game_handler(game: GameCreate):
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
 
+@router.post("/import", response_model=GameImportReport)
+async def import_games_handler(
+    file: UploadFile = File(...),
+    format: Optional[ImportFormat] = None,
+    on_duplicate: DuplicatePolicy = "skip",
+):
+    file_format = format or detect_format(file.filename)
+    if file_format is None:
+        raise HTTPException(
+            status_code=422, detail="Укажите формат файла: csv или ndjson"
+        )
+
+    return await import_games(file.file, file_format, on_duplicate)
+
+
 @router.patch("/{game_id}/cover", response_model=dict, status_code=200)
 async def update_game_cover(game_id: int, cover_image: UploadFile = File(...)):
-    game = (
-        supabase.table("games")
-        .select("id,title")
-        .eq("id", game_id)
-        .maybe_single()
-        .execute()
-    )
+    game = await games_repository.get(game_id, "id,title")
     if not game:
         raise HTTPException(status_code=404, detail="Игра не найдена")
 
-    file_extension = cover_image.filename.split(".")[-1].lower()
-    if file_extension not in ["jpg", "jpeg", "png", "webp"]:
+    if cover_image.size is not None and cover_image.size > settings.COVER_MAX_BYTES:
+        raise too_large(settings.COVER_MAX_BYTES)
+
+    image_format = sniff_image_format(await cover_image.read(HEADER_SIZE))
+    if image_format is None:
         raise HTTPException(
-            status_code=422, detail="Поддерживаемые форматы: jpg, png, webp"
+            status_code=422, detail="Файл не является изображением jpg, png или webp"
         )
 
-    file_path = f"covers/{uuid.uuid4()}.{file_extension}"
-    file_content = await cover_image.read()
-
-    upload_result = supabase.storage.from_("game-covers").upload(
-        file_path,
-        file_content,
-        {"content-type": cover_image.content_type or "image/jpeg"},
-    )
-
-    if not upload_result:
-        raise HTTPException(status_code=500, detail="Ошибка загрузки обложки")
-
-    cover_path = (
-        supabase.storage.from_("game-covers").get_public_url(file_path).rstrip("/")
-    )
+    async with saved_upload(
+        cover_image, settings.COVER_MAX_BYTES, settings.UPLOAD_CHUNK_SIZE
+    ) as (path, cover_hash, size):
+        cover = await upload_cover(path, image_format, cover_hash, size)
 
-    supabase.table("games").update({"cover_image_path": cover_path}).eq(
-        "id", game_id
-    ).execute()
+    await set_game_cover(game_id, cover)
 
-    return {"cover_image_path": cover_path, "game_id": game_id}
+    return {
+        "cover_image_path": cover["cover_image_path"],
+        "cover_variants": cover["cover_variants"],
+        "game_id": game_id,
+    }
 
 
 @router.patch("/{game_id}", response_model=GameResponse)
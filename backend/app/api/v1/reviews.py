@@ -1,185 +1,250 @@
-from typing import List
-
-from fastapi import APIRouter, HTTPException, Query, Request
-
-from app.core.database import supabase, update_game_average_rating
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from postgrest.exceptions import APIError
+
+from app.core.config import settings
+from app.core.database import (
+    add_review,
+    data_versions,
+    edit_review,
+    get_game_reviews,
+    get_reviews,
+    remove_review,
+    reviews_repository,
+)
+from app.schemas.game import GameResponse
 from app.schemas.review import (
+    GameReviewsResponse,
     ReviewCreate,
     ReviewListResponse,
+    ReviewResponse,
     ReviewUpdate,
+    ReviewWithGameFields,
 )
+from app.services.exporter import ExportFormat, export_response
+from app.services.fields import FieldSet, parse_fields
 
 router = APIRouter(prefix="/reviews", tags=["Рецензии"])
 
+reviews_etag = data_versions.conditional("reviews")
+own_reviews_etag = data_versions.conditional("reviews", per_client=True)
+review_games_etag = data_versions.conditional("reviews", "games")
+game_reviews_etag = data_versions.conditional("game", "reviews", per_client=True)
+
+REVIEW_ERRORS = {
+    "23503": (404, "Игра не найдена"),
+    "23505": (409, "У вас уже есть рецензия на эту игру"),
+    "P0002": (404, "Рецензия не найдена"),
+    "42501": (403, "Нет доступа"),
+}
+
+SYNC_RATING = Query(
+    False,
+    description="Применить изменение рейтинга игры сразу, а не в фоновом пересчёте",
+)
+
+FIELDS_DESCRIPTION = "Только перечисленные поля, например id,rating,created_at"
+
+
+def review_fields(
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+) -> Optional[FieldSet]:
+    return parse_fields(fields, ReviewResponse.model_fields)
+
 
-@router.get("/me", response_model=ReviewListResponse)
+def review_game_fields(
+    fields: Optional[str] = Query(
+        None, description=f"{FIELDS_DESCRIPTION},games(id,title)"
+    ),
+) -> Optional[FieldSet]:
+    return parse_fields(
+        fields, ReviewResponse.model_fields, {"games": GameResponse.model_fields}
+    )
+
+
+def review_error(error: APIError) -> Exception:
+    if error.code in REVIEW_ERRORS:
+        status_code, detail = REVIEW_ERRORS[error.code]
+        return HTTPException(status_code=status_code, detail=detail)
+    return error
+
+
+@router.get(
+    "/me",
+    response_model=ReviewListResponse,
+    response_model_exclude_unset=True,
+    dependencies=[Depends(own_reviews_etag)],
+)
 async def get_my_reviews(
     request: Request,
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
+    sort: Literal["id", "rating", "created_at"] = "id",
+    cursor: Optional[str] = None,
+    fields: Optional[FieldSet] = Depends(review_fields),
 ):
     client_ip = request.client.host
-    offset = (page - 1) * page_size
-
-    response = (
-        supabase.table("reviews")
-        .select("*", count="exact")
-        .eq("ip_address", client_ip)
-        .range(offset, offset + page_size - 1)
-        .execute()
-    )
 
-    total = response.count or 0
+    items, total, next_cursor = await get_reviews(
+        page, page_size, client_ip, sort, cursor, fields
+    )
     pages = (total + page_size - 1) // page_size if page_size > 0 else 1
 
     return ReviewListResponse(
-        items=response.data,
+        items=items,
         total=total,
         page=page,
         page_size=page_size,
         pages=pages,
+        next_cursor=next_cursor,
     )
 
 
-@router.get("", response_model=ReviewListResponse)
+@router.get(
+    "",
+    response_model=ReviewListResponse,
+    response_model_exclude_unset=True,
+    dependencies=[Depends(reviews_etag)],
+)
 async def get_all_reviews(
-    page: int = Query(1, ge=1), page_size: int = Query(10, ge=1, le=100)
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=100),
+    sort: Literal["id", "rating", "created_at"] = "id",
+    cursor: Optional[str] = None,
+    fields: Optional[FieldSet] = Depends(review_fields),
 ):
-    offset = (page - 1) * page_size
-
-    response = (
-        supabase.table("reviews")
-        .select("*", count="exact")
-        .range(offset, offset + page_size - 1)
-        .execute()
+    items, total, next_cursor = await get_reviews(
+        page, page_size, sort=sort, cursor=cursor, fields=fields
     )
-
-    total = response.count or 0
     pages = (total + page_size - 1) // page_size if page_size > 0 else 1
 
     return ReviewListResponse(
-        items=response.data,
+        items=items,
         total=total,
         page=page,
         page_size=page_size,
         pages=pages,
+        next_cursor=next_cursor,
     )
 
 
-@router.get("/recent", response_model=List[dict])
-async def get_recent_reviews(limit: int = Query(10, ge=1, le=50)):
-    response = (
-        supabase.table("reviews")
-        .select("*, games(*)")
-        .order("created_at", desc=True)
-        .limit(limit)
-        .execute()
-    )
-    return response.data
-
-
-@router.get("/{review_id}", response_model=dict)
-async def get_review(review_id: int):
-    response = (
-        supabase.table("reviews")
-        .select("*, games(*)")
-        .eq("id", review_id)
-        .maybe_single()
-        .execute()
-    )
-    if not response:
-        raise HTTPException(status_code=404, detail="Рецензия не найдена")
-    return response.data
-
-
-@router.post("", response_model=dict, status_code=201)
-async def create_review(review: ReviewCreate, request: Request):
-    ip = request.client.host
-
-    game_check = supabase.table("games").select("id").eq("id", review.game_id).execute()
-    if not game_check.data:
-        raise HTTPException(404, "Игра не найдена")
-
-    duplicate = (
-        supabase.table("reviews")
-        .select("id")
-        .eq("game_id", review.game_id)
-        .eq("ip_address", ip)
-        .execute()
-    )
-    if duplicate.data:
-        raise HTTPException(409, "У вас уже есть рецензия на эту игру")
-
-    review_data = review.dict()
-    review_data["ip_address"] = ip
-    response = supabase.table("reviews").insert(review_data).execute()
+@router.get(
+    "/recent",
+    response_model=List[ReviewWithGameFields],
+    response_model_exclude_unset=True,
+    dependencies=[Depends(review_games_etag)],
+)
+async def get_recent_reviews(
+    limit: int = Query(10, ge=1, le=50),
+    fields: Optional[FieldSet] = Depends(review_game_fields),
+):
+    if fields is None:
+        return await reviews_repository.recent(limit)
+    return await reviews_repository.recent(limit, fields.select())
 
-    await update_game_average_rating(review.game_id)
 
-    return response.data[0]
+@router.get("/export", response_class=StreamingResponse)
+async def export_reviews_handler(format: ExportFormat = "ndjson", gzip: bool = False):
+    columns = list(ReviewResponse.model_fields)
+    chunks = reviews_repository.scan(",".join(columns), settings.SCAN_CHUNK_SIZE)
+    return export_response(chunks, format, columns, "reviews", gzip)
 
 
-@router.patch("/{review_id}", response_model=dict)
-async def update_review(review_id: int, update_data: ReviewUpdate, request: Request):
-    review_check = supabase.table("reviews").select("*").eq("id", review_id).execute()
-    if not review_check.data:
-        raise HTTPException(status_code=404, detail="Рецензия не найдена")
-    review = review_check.data[0]
+@router.get(
+    "/{review_id}",
+    response_model=ReviewWithGameFields,
+    response_model_exclude_unset=True,
+    dependencies=[Depends(review_games_etag)],
+)
+async def get_review(
+    review_id: int, fields: Optional[FieldSet] = Depends(review_game_fields)
+):
+    columns = fields.select() if fields else "*, games(*)"
+    review = await reviews_repository.get(review_id, columns)
     if not review:
         raise HTTPException(status_code=404, detail="Рецензия не найдена")
+    return review
 
-    review_data = review
-    if review_data["ip_address"] != request.client.host:
-        raise HTTPException(403, "Нет доступа")
 
-    update_dict = update_data.dict(exclude_unset=True)
-    response = (
-        supabase.table("reviews").update(update_dict).eq("id", review_id).execute()
-    )
+@router.post("", response_model=dict, status_code=201)
+async def create_review(
+    review: ReviewCreate, request: Request, sync: bool = SYNC_RATING
+):
+    try:
+        return await add_review(
+            review.game_id, request.client.host, review.rating, review.text, sync
+        )
+    except APIError as e:
+        raise review_error(e) from e
 
-    await update_game_average_rating(review_data["game_id"])
 
-    return response.data[0]
+@router.patch("/{review_id}", response_model=dict)
+async def update_review(
+    review_id: int,
+    update_data: ReviewUpdate,
+    request: Request,
+    sync: bool = SYNC_RATING,
+):
+    update_dict = update_data.dict(exclude_unset=True)
+    try:
+        return await edit_review(review_id, request.client.host, update_dict, sync)
+    except APIError as e:
+        raise review_error(e) from e
 
 
 @router.delete("/{review_id}", status_code=204)
-async def delete_review(review_id: int, request: Request):
-    review_check = supabase.table("reviews").select("*").eq("id", review_id).execute()
-    if not review_check.data:
-        raise HTTPException(status_code=404, detail="Рецензия не найдена")
-    review = review_check.data[0]
-    if not review:
-        raise HTTPException(status_code=404, detail="Рецензия не найдена")
-
-    if review["ip_address"] != request.client.host:
-        raise HTTPException(403, "Нет доступа")
-
-    supabase.table("reviews").delete().eq("id", review_id).execute()
-    await update_game_average_rating(review["game_id"])
+async def delete_review(review_id: int, request: Request, sync: bool = SYNC_RATING):
+    try:
+        await remove_review(review_id, request.client.host, sync)
+    except APIError as e:
+        raise review_error(e) from e
 
     return None
 
 
-@router.get("/game/{game_id}", response_model=dict)
-async def get_game_reviews(game_id: int, request: Request):
-    game_check = supabase.table("games").select("*").eq("id", game_id).execute()
-    if not game_check.data:
-        raise HTTPException(status_code=404, detail="Игра не найдена")
-
-    game = game_check.data[0]
+@router.get(
+    "/game/{game_id}",
+    response_model=GameReviewsResponse,
+    response_model_exclude_unset=True,
+    dependencies=[Depends(game_reviews_etag)],
+)
+async def get_game_reviews_handler(
+    game_id: int,
+    request: Request,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=100),
+    sort: Literal["newest", "highest", "lowest"] = "newest",
+    cursor: Optional[str] = None,
+    fields: Optional[FieldSet] = Depends(review_fields),
+):
+    client_ip = request.client.host
 
-    reviews = supabase.table("reviews").select("*").eq("game_id", game_id).execute()
+    game, items, total, next_cursor = await get_game_reviews(
+        game_id, page, page_size, sort, cursor, fields
+    )
+    own_columns = fields.select() if fields else "*"
+    own_review = await reviews_repository.find(game_id, client_ip, own_columns)
 
-    client_ip = request.client.host
-    items = []
-    for r in reviews.data:
+    for r in items:
         r["is_own"] = r.get("ip_address") == client_ip
-        items.append(r)
-
-    return {
-        "game_id": game_id,
-        "game_title": game["title"],
-        "average_rating": game.get("average_rating") or 0,
-        "reviews_count": len(items),
-        "items": items,
-    }
+    if own_review:
+        own_review["is_own"] = True
+    if fields:
+        items = [fields.project(r, "is_own") for r in items]
+        own_review = own_review and fields.project(own_review, "is_own")
+
+    return GameReviewsResponse(
+        game_id=game_id,
+        game_title=game["title"],
+        average_rating=game.get("average_rating") or 0,
+        reviews_count=total,
+        rating_histogram=game.get("rating_histogram") or [0] * 10,
+        own_review=own_review,
+        items=items,
+        page=page,
+        page_size=page_size,
+        pages=(total + page_size - 1) // page_size,
+        next_cursor=next_cursor,
+    )
@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+
+from app.core.config import settings
+from app.core.database import db, games_repository, sweep_covers
+from app.services.importer import detect_format, import_games
+
+
+async def reconcile_ratings(dry_run: bool) -> int:
+    drifted = await games_repository.reconcile_ratings(dry_run=dry_run)
+    for row in drifted:
+        print(
+            f"game {row['game_id']}: "
+            f"sum {row['old_sum']} -> {row['new_sum']}, "
+            f"count {row['old_count']} -> {row['new_count']}"
+        )
+        if row.get("old_histogram") != row.get("new_histogram"):
+            print(f"  histogram {row['old_histogram']} -> {row['new_histogram']}")
+
+    action = "найдено" if dry_run else "исправлено"
+    print(f"Расхождений {action}: {len(drifted)}")
+    return 1 if drifted and dry_run else 0
+
+
+async def import_games_file(
+    path: str, fmt: str, on_duplicate: str, batch_size: int
+) -> int:
+    fmt = fmt or detect_format(path)
+    if fmt is None:
+        print("Укажите формат файла: --format csv или --format ndjson")
+        return 2
+
+    with open(path, "rb") as file:
+        report = await import_games(file, fmt, on_duplicate, batch_size)
+    print(report.model_dump_json(indent=2))
+    return 1 if report.failed or report.aborted else 0
+
+
+async def sweep_orphan_covers(batch_size: int, grace_seconds: int) -> int:
+    removed = await sweep_covers(batch_size, grace_seconds)
+    print(f"Удалено неиспользуемых обложек: {removed}")
+    return 0
+
+
+async def run(args: argparse.Namespace) -> int:
+    try:
+        if args.command == "reconcile-ratings":
+            return await reconcile_ratings(args.dry_run)
+        if args.command == "sweep-covers":
+            return await sweep_orphan_covers(args.batch_size, args.grace_seconds)
+        if args.command == "import-games":
+            return await import_games_file(
+                args.path, args.format, args.on_duplicate, args.batch_size
+            )
+        return 2
+    finally:
+        await db.disconnect()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    reconcile = commands.add_parser(
+        "reconcile-ratings",
+        help="Пересчитать агрегаты рейтинга всех игр по рецензиям",
+    )
+    reconcile.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Только показать расхождения, ничего не менять",
+    )
+
+    importer = commands.add_parser(
+        "import-games", help="Импортировать игры из CSV или NDJSON"
+    )
+    importer.add_argument("path", help="Путь к файлу")
+    importer.add_argument("--format", choices=["csv", "ndjson"])
+    importer.add_argument(
+        "--on-duplicate",
+        choices=["skip", "upsert", "fail"],
+        default="skip",
+        help="Что делать с играми, название которых уже есть в каталоге",
+    )
+    importer.add_argument("--batch-size", type=int, default=None)
+
+    sweeper = commands.add_parser(
+        "sweep-covers", help="Удалить из хранилища обложки, на которые нет ссылок"
+    )
+    sweeper.add_argument("--batch-size", type=int, default=settings.COVER_SWEEP_BATCH)
+    sweeper.add_argument(
+        "--grace-seconds",
+        type=int,
+        default=settings.COVER_ORPHAN_GRACE_SECONDS,
+        help="Не трогать обложки, использованные за последние N секунд",
+    )
+
+    raise SystemExit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from functools import lru_cache
-from typing import List
+from typing import List, Literal
 
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 ENV_PATH = ".env"
@@ -18,8 +19,20 @@ class Settings(BaseSettings):
 
     API_V1_PREFIX: str = "/api/v1"
 
-    SUPABASE_URL: str
-    SUPABASE_KEY: str
+    DATA_BACKEND: Literal["supabase", "memory"] = "supabase"
+
+    SUPABASE_URL: str = ""
+    SUPABASE_KEY: str = ""
+    SUPABASE_POOL_SIZE: int = 20
+    SUPABASE_TIMEOUT: float = 10.0
+    COVERS_BUCKET: str = "game-covers"
+    COVER_MAX_BYTES: int = 5 * 1024 * 1024
+    UPLOAD_CHUNK_SIZE: int = 64 * 1024
+    IMAGE_WORKERS: int = 2
+    COVER_SWEEP_INTERVAL_SECONDS: int = 600
+    COVER_SWEEP_BATCH: int = 100
+    COVER_ORPHAN_GRACE_SECONDS: int = 3600
+
     CORS_ORIGINS: List[str] = [
         "http://localhost:3000",
         "http://localhost:5173",
@@ -29,6 +42,45 @@ class Settings(BaseSettings):
 
     DEFAULT_PAGE_SIZE: int = 10
     MAX_PAGE_SIZE: int = 100
+    SCAN_CHUNK_SIZE: int = 1000
+
+    FACETS_TTL_SECONDS: int = 300
+
+    LEADERBOARD_SIZE: int = 100
+    LEADERBOARD_TTL_SECONDS: int = 60
+
+    GAMES_BATCH_MAX: int = 100
+
+    ETAG_VERSIONS_TTL_SECONDS: float = 1.0
+
+    SEARCH_ENABLED: bool = True
+    SEARCH_TTL_SECONDS: int = 300
+    SEARCH_TIME_BUDGET_MS: int = 50
+    SEARCH_MAX_RESULTS: int = 1000
+    SEARCH_MIN_SIMILARITY: float = 0.3
+
+    IMPORT_BATCH_SIZE: int = 500
+    IMPORT_MAX_ERRORS: int = 1000
+
+    RATING_FLUSH_INTERVAL_SECONDS: float = 0
+    RATING_FLUSH_BATCH: int = 500
+
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_LEVEL: int = 6
+
+    METRICS_ENABLED: bool = True
+    SINGLE_FLIGHT_ENABLED: bool = True
+
+    @model_validator(mode="after")
+    def check_backend(self) -> "Settings":
+        if self.DATA_BACKEND == "supabase" and not (
+            self.SUPABASE_URL and self.SUPABASE_KEY
+        ):
+            raise ValueError(
+                "SUPABASE_URL и SUPABASE_KEY обязательны при DATA_BACKEND=supabase"
+            )
+        return self
 
 
 @lru_cache
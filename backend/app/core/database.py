@@ -1,60 +1,359 @@
-from typing import Dict, List
+import asyncio
+import secrets
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
 
+import httpx
 from fastapi import HTTPException
-from supabase import Client, create_client
+from postgrest import AsyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
+from storage3 import AsyncStorageClient
 
 from app.core.config import settings
-from app.schemas.game import GameFilter, GameUpdate
+from app.repositories import (
+    CoverRepository,
+    CoverStorage,
+    GameRepository,
+    MemoryBackend,
+    ReviewRepository,
+    VersionRepository,
+)
+from app.repositories.memory import MEMORY_URL
+from app.schemas.game import GameCreate, GameFilter, GameUpdate
+from app.services.etags import DataVersions
+from app.services.facets import FacetIndex
+from app.services.fields import FieldSet
+from app.services.images import IMAGE_FORMATS, build_variants, file_chunks
+from app.services.leaderboards import Leaderboard, parse_timestamp
+from app.services.metrics import TimedTransport
+from app.services.pagination import Keyset, decode_cursor, encode_cursor
+from app.services.ratings import RatingBuffer
+from app.services.search import SearchIndex
+from app.services.singleflight import flights
+
+
+class Database:
+    def __init__(
+        self, url: str, key: str, backend: Optional[MemoryBackend] = None
+    ) -> None:
+        self.url = url.rstrip("/")
+        self.headers = {"apikey": key, "Authorization": f"Bearer {key}"}
+        self.backend = backend
+        self._http: Optional[httpx.AsyncClient] = None
+        self._postgrest: Optional[AsyncPostgrestClient] = None
+        self._storage: Optional[AsyncStorageClient] = None
+
+    def connect(self, transport: Optional[httpx.AsyncBaseTransport] = None) -> None:
+        if self._http is not None:
+            return
+        if transport is None and self.backend is not None:
+            transport = httpx.MockTransport(self.backend)
+        if transport is None:
+            transport = httpx.AsyncHTTPTransport(
+                http2=True,
+                limits=httpx.Limits(
+                    max_connections=settings.SUPABASE_POOL_SIZE,
+                    max_keepalive_connections=settings.SUPABASE_POOL_SIZE,
+                ),
+            )
+
+        self._http = httpx.AsyncClient(
+            timeout=settings.SUPABASE_TIMEOUT,
+            follow_redirects=True,
+            transport=TimedTransport(transport),
+        )
+        self._postgrest = AsyncPostgrestClient(
+            f"{self.url}/rest/v1",
+            headers={**DEFAULT_POSTGREST_CLIENT_HEADERS, **self.headers},
+            http_client=self._http,
+        )
+        self._storage = AsyncStorageClient(
+            f"{self.url}/storage/v1/",
+            headers=self.headers,
+            http_client=self._http,
+        )
+
+    async def disconnect(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+        self._http = None
+        self._postgrest = None
+        self._storage = None
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        self.connect()
+        return self._http
+
+    @property
+    def postgrest(self) -> AsyncPostgrestClient:
+        self.connect()
+        return self._postgrest
+
+    @property
+    def storage(self) -> AsyncStorageClient:
+        self.connect()
+        return self._storage
+
+
+def create_database() -> Database:
+    if settings.DATA_BACKEND == "memory":
+        return Database(MEMORY_URL, "memory", MemoryBackend())
+    return Database(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+
+
+db = create_database()
 
-supabase: Client = create_client(
-    supabase_url=settings.SUPABASE_URL,
-    supabase_key=settings.SUPABASE_KEY,
+games_repository = GameRepository(db)
+reviews_repository = ReviewRepository(db)
+covers_storage = CoverStorage(db, settings.COVERS_BUCKET)
+covers_repository = CoverRepository(db)
+versions_repository = VersionRepository(db)
+data_versions = DataVersions(versions_repository.fetch)
+
+facet_index = FacetIndex(ttl_seconds=settings.FACETS_TTL_SECONDS)
+search_index = SearchIndex(
+    ttl_seconds=settings.SEARCH_TTL_SECONDS,
+    time_budget_ms=settings.SEARCH_TIME_BUDGET_MS,
+    max_results=settings.SEARCH_MAX_RESULTS,
+    min_similarity=settings.SEARCH_MIN_SIMILARITY,
+)
+top_games = Leaderboard(
+    "average_rating",
+    settings.LEADERBOARD_SIZE,
+    ttl_seconds=settings.LEADERBOARD_TTL_SECONDS,
 )
+recent_games = Leaderboard(
+    "created_at",
+    settings.LEADERBOARD_SIZE,
+    key=parse_timestamp,
+    ttl_seconds=settings.LEADERBOARD_TTL_SECONDS,
+)
+rating_buffer = RatingBuffer()
+
+
+def _game_saved(game: Dict) -> None:
+    facet_index.upsert(game)
+    search_index.upsert(game)
+    top_games.upsert(game)
+    recent_games.upsert(game)
+    flights.forget()
+    data_versions.forget()
+
+
+def _game_deleted(game_id: int) -> None:
+    facet_index.discard(game_id)
+    search_index.discard(game_id)
+    top_games.discard(game_id)
+    recent_games.discard(game_id)
+    flights.forget()
+    data_versions.forget()
+
+
+def _game_rating_changed(game: Dict) -> None:
+    top_games.upsert(game)
+    recent_games.upsert(game)
+    flights.forget()
+    data_versions.forget()
+
+
+async def load_facets() -> FacetIndex:
+    await facet_index.ensure_loaded(
+        lambda: games_repository.scan(facet_index.columns, settings.SCAN_CHUNK_SIZE)
+    )
+    return facet_index
+
+
+async def load_search_index() -> SearchIndex:
+    await search_index.ensure_loaded(
+        lambda: games_repository.scan(search_index.columns, settings.SCAN_CHUNK_SIZE)
+    )
+    return search_index
+
+
+async def _read_leaderboard(board: Leaderboard, fetch, limit: int) -> List[Dict]:
+    if board.loaded and not board.covers(limit):
+        board.invalidate()
+
+    async def load():
+        yield await fetch(board.capacity)
+
+    await board.ensure_loaded(load)
+    return board.top(limit)
+
+
+async def load_top_games() -> Leaderboard:
+    await _read_leaderboard(top_games, games_repository.top, 1)
+    return top_games
+
+
+async def load_recent_games() -> Leaderboard:
+    await _read_leaderboard(recent_games, games_repository.recent, 1)
+    return recent_games
+
+
+async def warm_indexes() -> None:
+    await load_top_games()
+    await load_recent_games()
+    await load_facets()
+    if settings.SEARCH_ENABLED:
+        await load_search_index()
+
+
+async def _paginate(
+    fetch: Callable[[int, int, Optional[Keyset]], Awaitable[tuple[list[dict], int]]],
+    sort_column: Optional[str],
+    sort: str,
+    page: int,
+    page_size: int,
+    cursor: Optional[str],
+) -> tuple[list[dict], int, Optional[str]]:
+    if cursor is None:
+        offset = (page - 1) * page_size
+        items, total = await fetch(offset, page_size, None)
+        has_more = offset + len(items) < total
+    else:
+        after = decode_cursor(cursor, sort, sort_column)
+        items, total = await fetch(0, page_size + 1, after)
+        has_more = len(items) > page_size
+        items = items[:page_size]
+
+    next_cursor = None
+    if has_more and items:
+        next_cursor = encode_cursor(sort, sort_column, items[-1])
+    return items, total, next_cursor
+
+
+def _columns(fields: Optional[FieldSet], *required: Optional[str]) -> str:
+    if fields is None:
+        return "*"
+    return fields.select(*(column for column in required if column))
+
+
+def _project(rows: List[Dict], fields: Optional[FieldSet]) -> List[Dict]:
+    if fields is None:
+        return rows
+    return [fields.project(row) for row in rows]
 
 
 async def get_games(
-    page: int = 1, page_size: int = 10, filter_obj: GameFilter = None
-) -> tuple[list[dict], int]:
+    page: int = 1,
+    page_size: int = 10,
+    filter_obj: GameFilter = None,
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[FieldSet] = None,
+) -> tuple[list[dict], int, Optional[str]]:
+    if filter_obj and filter_obj.q and settings.SEARCH_ENABLED:
+        if cursor is not None:
+            raise HTTPException(400, "Курсор не поддерживается вместе с поиском")
+        if sort is not None:
+            raise HTTPException(400, "Сортировка не поддерживается вместе с поиском")
+        return await _search_games(page, page_size, filter_obj, fields)
+
+    sort = sort or "id"
+    sort_column = games_repository.SORT_COLUMNS[sort]
+    columns = _columns(fields, sort_column)
+    items, total, next_cursor = await _paginate(
+        lambda offset, limit, after: games_repository.list(
+            offset, limit, filter_obj, sort, after, columns
+        ),
+        sort_column,
+        sort,
+        page,
+        page_size,
+        cursor,
+    )
+    return _project(items, fields), total, next_cursor
+
+
+async def _search_games(
+    page: int, page_size: int, filter_obj: GameFilter, fields: Optional[FieldSet]
+) -> tuple[list[dict], int, Optional[str]]:
+    await load_search_index()
+    ranked = search_index.search(filter_obj.q)
+
+    rest = filter_obj.model_copy(update={"q": None})
+    if ranked and rest.model_dump(exclude_none=True):
+        allowed = set(await games_repository.filter_ids(rest, ranked))
+        ranked = [game_id for game_id in ranked if game_id in allowed]
+
     offset = (page - 1) * page_size
+    page_ids = ranked[offset : offset + page_size]
+    found = await games_repository.get_many(page_ids, _columns(fields))
+    rows = {row["id"]: row for row in found}
+    return [rows[game_id] for game_id in page_ids if game_id in rows], len(ranked), None
 
-    query = supabase.table("games").select("*", count="exact").order("id")
 
-    if filter_obj:
-        if filter_obj.q:
-            query = query.or_(
-                f"title.ilike.%{filter_obj.q}%,description.ilike.%{filter_obj.q}%"
-            )
-        if filter_obj.genres:
-            query = query.contains("genres", filter_obj.genres)
-        if filter_obj.platforms:
-            query = query.contains("platforms", filter_obj.platforms)
-        if filter_obj.developer:
-            query = query.ilike("developer", f"%{filter_obj.developer}%")
-        if filter_obj.min_rating is not None:
-            query = query.gte("average_rating", filter_obj.min_rating)
-        if filter_obj.max_rating is not None:
-            query = query.lte("average_rating", filter_obj.max_rating)
-        if filter_obj.min_year is not None:
-            query = query.gte("release_year", filter_obj.min_year)
-        if filter_obj.max_year is not None:
-            query = query.lte("release_year", filter_obj.max_year)
-
-    total_response = query.execute()
-    total_count = total_response.count or 0
-
-    data_response = query.range(offset, offset + page_size - 1).execute()
-    items = data_response.data or []
-
-    return items, total_count
+async def get_reviews(
+    page: int = 1,
+    page_size: int = 10,
+    ip_address: Optional[str] = None,
+    sort: str = "id",
+    cursor: Optional[str] = None,
+    fields: Optional[FieldSet] = None,
+) -> tuple[list[dict], int, Optional[str]]:
+    sort_column = reviews_repository.SORT_COLUMNS[sort]
+    columns = _columns(fields, sort_column)
+    items, total, next_cursor = await _paginate(
+        lambda offset, limit, after: reviews_repository.list(
+            offset, limit, ip_address, sort, after, columns
+        ),
+        sort_column,
+        sort,
+        page,
+        page_size,
+        cursor,
+    )
+    return _project(items, fields), total, next_cursor
 
 
-async def get_game(game_id: int) -> Dict:
-    response = (
-        supabase.table("games").select("*").eq("id", game_id).maybe_single().execute()
+async def get_game_reviews(
+    game_id: int,
+    page: int = 1,
+    page_size: int = 10,
+    sort: str = "newest",
+    cursor: Optional[str] = None,
+    fields: Optional[FieldSet] = None,
+) -> tuple[Dict, list[dict], int, Optional[str]]:
+    game = await get_game(game_id)
+    total = game.get("rating_count") or 0
+    sort_column = reviews_repository.GAME_SORTS[sort][0]
+    columns = _columns(fields, sort_column, "ip_address")
+
+    async def fetch(offset: int, limit: int, after: Optional[Keyset]):
+        items = await reviews_repository.for_game(
+            game_id, offset, limit, sort, after, columns
+        )
+        return items, total
+
+    items, total, next_cursor = await _paginate(
+        fetch,
+        sort_column,
+        sort,
+        page,
+        page_size,
+        cursor,
     )
-    if not response:
+    return game, items, total, next_cursor
+
+
+async def get_game(game_id: int) -> Dict:
+    game = await games_repository.get(game_id)
+    if not game:
         raise HTTPException(status_code=404, detail="Игра не найдена")
-    return response.data
+    return game
+
+
+async def get_games_batch(game_ids: List[int]) -> Dict[int, Dict]:
+    games = await games_repository.get_many(game_ids)
+    return {game["id"]: game for game in games}
+
+
+async def create_game(data: Dict) -> Optional[Dict]:
+    game = await games_repository.create(data)
+    if game:
+        _game_saved(game)
+    return game
 
 
 async def update_game(game_id: int, game_data: GameUpdate) -> Dict:
@@ -62,71 +361,243 @@ async def update_game(game_id: int, game_data: GameUpdate) -> Dict:
     if not data:
         raise HTTPException(400, "Нет данных для обновления")
 
-    response = supabase.table("games").update(data).eq("id", game_id).execute()
-    if not response.data:
+    game = await games_repository.update(game_id, data)
+    if not game:
         raise HTTPException(404, "Игра не найдена")
-    return response.data[0]
+    _game_saved(game)
+    return game
 
 
 async def delete_game(game_id: int) -> bool:
     await get_game(game_id)
-    response = supabase.table("games").delete().eq("id", game_id).execute()
-    return bool(response.data)
+    deleted = await games_repository.delete(game_id)
+    _game_deleted(game_id)
+    return deleted
 
 
-async def update_game_average_rating(game_id: int) -> None:
-    response = (
-        supabase.table("reviews")
-        .select("rating", count="exact")
-        .eq("game_id", game_id)
-        .execute()
-    )
+async def import_games_batch(
+    games: List[GameCreate], on_duplicate: str
+) -> Tuple[List[Dict], List[Dict], Set[str]]:
+    existing = await games_repository.existing_titles([game.title for game in games])
+    if existing and on_duplicate == "fail":
+        return [], [], existing
 
-    if response.count and response.count > 0:
-        ratings = [r["rating"] for r in response.data]
-        avg_rating = round(sum(ratings) / len(ratings), 1)
-        supabase.table("games").update({"average_rating": avg_rating}).eq(
-            "id", game_id
-        ).execute()
-    else:
-        supabase.table("games").update({"average_rating": 0.0}).eq(
-            "id", game_id
-        ).execute()
-
-
-async def get_top_games(limit: int = 10) -> List[Dict]:
-    response = (
-        supabase.table("games")
-        .select("*", count="exact")
-        .order("average_rating", desc=True)
-        .limit(limit)
-        .execute()
+    inserted = await games_repository.insert_many(
+        [game.model_dump() for game in games if game.title not in existing]
     )
-    return response.data
 
+    updated: List[Dict] = []
+    if on_duplicate == "upsert":
+        groups: Dict[Tuple[str, ...], List[Dict]] = {}
+        for game in games:
+            if game.title in existing:
+                data = game.model_dump(exclude_unset=True)
+                groups.setdefault(tuple(sorted(data)), []).append(data)
+        for rows in groups.values():
+            updated.extend(await games_repository.upsert_many(rows))
+
+    for game in inserted + updated:
+        _game_saved(game)
+    return inserted, updated, existing
+
+
+async def upload_cover(
+    path: str, image_format: str, cover_hash: str, size: int
+) -> Dict:
+    existing = await covers_repository.touch(cover_hash)
+    if existing:
+        return existing
+
+    extension, content_type = IMAGE_FORMATS[image_format]
+    variants = await build_variants(path)
+
+    prefix = f"covers/{cover_hash}/{secrets.token_hex(4)}"
+    objects = {"original": f"{prefix}/original.{extension}"}
+    uploads = [
+        covers_storage.upload(
+            objects["original"],
+            file_chunks(path, settings.UPLOAD_CHUNK_SIZE),
+            content_type,
+            size,
+        )
+    ]
+    for name, data in variants.items():
+        objects[name] = f"{prefix}/{name}.webp"
+        uploads.append(covers_storage.upload(objects[name], data, "image/webp"))
+
+    results = await asyncio.gather(*uploads, return_exceptions=True)
+    try:
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+            if not result:
+                raise HTTPException(status_code=500, detail="Ошибка загрузки обложки")
 
-async def get_recent_games(limit: int = 10) -> List[Dict]:
-    response = (
-        supabase.table("games")
-        .select("*", count="exact")
-        .order("created_at", desc=True)
-        .limit(limit)
-        .execute()
+        urls = {
+            name: await covers_storage.public_url(object_path)
+            for name, object_path in objects.items()
+        }
+        cover = {
+            "hash": cover_hash,
+            "paths": list(objects.values()),
+            "cover_image_path": urls.pop("original"),
+            "cover_variants": urls,
+            "last_used_at": "now",
+        }
+        registered = await covers_repository.register(cover)
+    except Exception:
+        await _discard_cover_objects(list(objects.values()))
+        raise
+    if registered:
+        return cover
+
+    await _discard_cover_objects(cover["paths"])
+    existing = await covers_repository.touch(cover_hash)
+    if not existing:
+        raise HTTPException(status_code=500, detail="Ошибка загрузки обложки")
+    return existing
+
+
+async def _discard_cover_objects(paths: List[str]) -> None:
+    try:
+        await covers_storage.remove(paths)
+    except Exception as e:
+        print(f"Очистка обложек: {e}")
+
+
+async def set_game_cover(game_id: int, cover: Dict) -> Optional[Dict]:
+    game = await games_repository.update(
+        game_id,
+        {
+            "cover_image_path": cover["cover_image_path"],
+            "cover_variants": cover["cover_variants"],
+            "cover_hash": cover["hash"],
+        },
     )
-    return response.data
+    if game:
+        _game_saved(game)
+    return game
+
+
+async def sweep_covers(batch_size: int, grace_seconds: int) -> int:
+    removed = 0
+    while True:
+        orphans = await covers_repository.claim_orphans(batch_size, grace_seconds)
+        try:
+            await covers_storage.remove(
+                [path for row in orphans for path in row["paths"]]
+            )
+        except Exception:
+            await covers_repository.restore(orphans)
+            raise
+        removed += len(orphans)
+        if len(orphans) < batch_size:
+            return removed
+
+
+async def run_cover_sweeper() -> None:
+    while True:
+        await asyncio.sleep(settings.COVER_SWEEP_INTERVAL_SECONDS)
+        try:
+            await sweep_covers(
+                settings.COVER_SWEEP_BATCH, settings.COVER_ORPHAN_GRACE_SECONDS
+            )
+        except Exception as e:
+            print(f"Очистка обложек: {e}")
+
+
+def _defer_rating(sync: bool) -> bool:
+    return settings.RATING_FLUSH_INTERVAL_SECONDS > 0 and not sync
+
+
+def _review_written(result: Dict, defer_rating: bool) -> Dict:
+    review = result["review"]
+    if defer_rating:
+        rating_buffer.mark(
+            review["game_id"], result["old_rating"], result["new_rating"]
+        )
+    elif result.get("game"):
+        _game_rating_changed(result["game"])
+    flights.forget()
+    data_versions.forget()
+    return review
+
+
+async def add_review(
+    game_id: int, ip_address: str, rating: int, text: str, sync: bool = False
+) -> Dict:
+    defer = _defer_rating(sync)
+    result = await reviews_repository.submit(game_id, ip_address, rating, text, defer)
+    return _review_written(result, defer)
+
+
+async def edit_review(
+    review_id: int, ip_address: str, data: Dict, sync: bool = False
+) -> Dict:
+    defer = _defer_rating(sync)
+    result = await reviews_repository.edit(review_id, ip_address, data, defer)
+    return _review_written(result, defer)
+
+
+async def remove_review(review_id: int, ip_address: str, sync: bool = False) -> None:
+    defer = _defer_rating(sync)
+    result = await reviews_repository.remove(review_id, ip_address, defer)
+    _review_written(result, defer)
+
+
+async def flush_ratings() -> int:
+    deltas = rating_buffer.drain()
+    for start in range(0, len(deltas), settings.RATING_FLUSH_BATCH):
+        batch = deltas[start : start + settings.RATING_FLUSH_BATCH]
+        try:
+            games = await games_repository.apply_rating_deltas(
+                [delta.payload() for delta in batch]
+            )
+        except Exception:
+            rating_buffer.restore(deltas[start:])
+            raise
+        for game in games:
+            _game_rating_changed(game)
+    return len(deltas)
+
+
+async def run_rating_flusher() -> None:
+    while True:
+        await asyncio.sleep(settings.RATING_FLUSH_INTERVAL_SECONDS)
+        flush = asyncio.ensure_future(flush_ratings())
+        try:
+            await asyncio.shield(flush)
+        except asyncio.CancelledError:
+            await asyncio.wait([flush])
+            raise
+        except Exception as e:
+            print(f"Пересчёт рейтингов: {e}")
+
+
+async def get_top_games(
+    limit: int = 10, fields: Optional[FieldSet] = None
+) -> List[Dict]:
+    rows = await _read_leaderboard(top_games, games_repository.top, limit)
+    return _project(rows, fields)
+
+
+async def get_recent_games(
+    limit: int = 10, fields: Optional[FieldSet] = None
+) -> List[Dict]:
+    rows = await _read_leaderboard(recent_games, games_repository.recent, limit)
+    return _project(rows, fields)
 
 
 async def get_all_genres() -> List[str]:
-    response = supabase.table("games").select("genres").execute()
-    genres = set()
-    for game in response.data:
-        genres.update(game.get("genres", []))
-    return sorted(list(genres))
+    await load_facets()
+    return facet_index.values("genres")
 
 
 async def get_all_platforms() -> List[str]:
-    response = supabase.table("games").select("platforms").execute()
-    platforms = set()
-    for game in response.data:
-        platforms.update(game.get("platforms", []))
-    return sorted(list(platforms))
+    await load_facets()
+    return facet_index.values("platforms")
+
+
+async def get_facet_counts(field: str) -> List[Tuple[str, int]]:
+    await load_facets()
+    return facet_index.counts(field)
@@ -1,23 +1,61 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from app.api.v1.router import api_router
 from app.core.config import settings
-from app.core.database import supabase
+from app.core.database import (
+    db,
+    flush_ratings,
+    games_repository,
+    run_cover_sweeper,
+    run_rating_flusher,
+    warm_indexes,
+)
+from app.services.compression import CompressionMiddleware
+from app.services.etags import NotModified, not_modified_handler
+from app.services.images import shutdown_pool, start_pool
+from app.services.metrics import (
+    CONTENT_TYPE,
+    MetricsMiddleware,
+    TimedJSONResponse,
+    render_metrics,
+)
+from app.services.uploads import UploadLimitMiddleware
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    db.connect()
     try:
-        supabase.table("games").select("count").limit(1).execute()
+        await games_repository.ping()
         print("Supabase подключен")
+        await warm_indexes()
     except Exception as e:
         print(f"Supabase ошибка: {e}")
 
+    start_pool(settings.IMAGE_WORKERS)
+    workers = []
+    if settings.COVER_SWEEP_INTERVAL_SECONDS > 0:
+        workers.append(asyncio.create_task(run_cover_sweeper()))
+    if settings.RATING_FLUSH_INTERVAL_SECONDS > 0:
+        workers.append(asyncio.create_task(run_rating_flusher()))
+
     yield
 
+    for worker in workers:
+        worker.cancel()
+        with suppress(asyncio.CancelledError):
+            await worker
+    try:
+        await flush_ratings()
+    except Exception as e:
+        print(f"Пересчёт рейтингов: {e}")
+    shutdown_pool()
+    await db.disconnect()
     print("API остановлен")
 
 
@@ -29,6 +67,7 @@ app = FastAPI(
     redoc_url="/redoc",
     openapi_url="/openapi.json",
     lifespan=lifespan,
+    default_response_class=TimedJSONResponse,
 )
 
 app.add_middleware(
@@ -37,8 +76,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+app.add_middleware(
+    UploadLimitMiddleware, path=rf"{settings.API_V1_PREFIX}/games/[^/]+/cover"
+)
+
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        level=settings.COMPRESSION_LEVEL,
+    )
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+app.add_exception_handler(NotModified, not_modified_handler)
+
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
 
@@ -55,3 +111,10 @@ async def root() -> dict:
         "status": "running",
         "docs": "/docs",
     }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> PlainTextResponse:
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
@@ -0,0 +1,14 @@
+from app.repositories.covers import CoverRepository, CoverStorage
+from app.repositories.games import GameRepository
+from app.repositories.memory import MemoryBackend
+from app.repositories.reviews import ReviewRepository
+from app.repositories.versions import VersionRepository
+
+__all__ = [
+    "CoverRepository",
+    "CoverStorage",
+    "GameRepository",
+    "MemoryBackend",
+    "ReviewRepository",
+    "VersionRepository",
+]
@@ -0,0 +1,84 @@
+from typing import TYPE_CHECKING, AsyncIterable, Dict, List, Optional, Union
+
+if TYPE_CHECKING:
+    from app.core.database import Database
+
+
+class CoverStorage:
+    def __init__(self, db: "Database", bucket: str) -> None:
+        self._db = db
+        self._bucket = bucket
+
+    def _bucket_api(self):
+        return self._db.storage.from_(self._bucket)
+
+    async def upload(
+        self,
+        path: str,
+        content: Union[bytes, AsyncIterable[bytes]],
+        content_type: str,
+        size: Optional[int] = None,
+    ) -> bool:
+        headers = {
+            **self._db.headers,
+            "content-type": content_type,
+            "cache-control": "max-age=31536000, immutable",
+            "x-upsert": "true",
+        }
+        if size is not None:
+            headers["content-length"] = str(size)
+
+        response = await self._db.http.post(
+            f"{self._db.url}/storage/v1/object/{self._bucket}/{path}",
+            content=content,
+            headers=headers,
+        )
+        return response.is_success
+
+    async def public_url(self, path: str) -> str:
+        url = await self._bucket_api().get_public_url(path)
+        return url.rstrip("/")
+
+    async def remove(self, paths: List[str]) -> None:
+        if paths:
+            await self._bucket_api().remove(paths)
+
+
+class CoverRepository:
+    def __init__(self, db: "Database") -> None:
+        self._db = db
+
+    def _table(self):
+        return self._db.postgrest.table("cover_objects")
+
+    async def touch(self, cover_hash: str) -> Optional[Dict]:
+        response = (
+            await self._table()
+            .update({"last_used_at": "now"})
+            .eq("hash", cover_hash)
+            .execute()
+        )
+        return response.data[0] if response.data else None
+
+    async def register(self, data: Dict) -> bool:
+        response = (
+            await self._table()
+            .upsert(data, on_conflict="hash", ignore_duplicates=True)
+            .execute()
+        )
+        return bool(response.data)
+
+    async def restore(self, rows: List[Dict]) -> None:
+        if rows:
+            await (
+                self._table()
+                .upsert(rows, on_conflict="hash", ignore_duplicates=True)
+                .execute()
+            )
+
+    async def claim_orphans(self, limit: int, grace_seconds: int) -> List[Dict]:
+        response = await self._db.postgrest.rpc(
+            "claim_orphan_covers",
+            {"p_limit": limit, "p_grace_seconds": grace_seconds},
+        ).execute()
+        return response.data or []
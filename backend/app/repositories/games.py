@@ -0,0 +1,180 @@
+import asyncio
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional, Set
+
+from app.repositories.pagination import order_by, scan
+from app.schemas.game import GameFilter
+from app.services.pagination import Keyset
+from app.services.singleflight import coalesce
+
+if TYPE_CHECKING:
+    from app.core.database import Database
+
+
+class GameRepository:
+    SORT_COLUMNS = {"id": None, "rating": "average_rating", "created_at": "created_at"}
+    IDS_PER_QUERY = 200
+
+    def __init__(self, db: "Database") -> None:
+        self._db = db
+
+    def _table(self):
+        return self._db.postgrest.table("games")
+
+    async def ping(self) -> None:
+        await self._table().select("id").limit(1).execute()
+
+    @staticmethod
+    def _filter(query, filter_obj: Optional[GameFilter]):
+        if not filter_obj:
+            return query
+        if filter_obj.q:
+            query = query.or_(
+                f"title.ilike.%{filter_obj.q}%,description.ilike.%{filter_obj.q}%"
+            )
+        if filter_obj.genres:
+            query = query.contains("genres", filter_obj.genres)
+        if filter_obj.platforms:
+            query = query.contains("platforms", filter_obj.platforms)
+        if filter_obj.developer:
+            query = query.ilike("developer", f"%{filter_obj.developer}%")
+        if filter_obj.min_rating is not None:
+            query = query.gte("average_rating", filter_obj.min_rating)
+        if filter_obj.max_rating is not None:
+            query = query.lte("average_rating", filter_obj.max_rating)
+        if filter_obj.min_year is not None:
+            query = query.gte("release_year", filter_obj.min_year)
+        if filter_obj.max_year is not None:
+            query = query.lte("release_year", filter_obj.max_year)
+        return query
+
+    async def list(
+        self,
+        offset: int,
+        limit: int,
+        filter_obj: Optional[GameFilter] = None,
+        sort: str = "id",
+        after: Optional[Keyset] = None,
+        columns: str = "*",
+    ) -> tuple[list[dict], int]:
+        query = self._filter(self._table().select(columns, count="exact"), filter_obj)
+        query = order_by(query, self.SORT_COLUMNS[sort], after)
+        if after is None:
+            query = query.range(offset, offset + limit - 1)
+        else:
+            query = query.limit(limit)
+
+        response = await query.execute()
+        return response.data or [], response.count or 0
+
+    @coalesce
+    async def get(self, game_id: int, columns: str = "*") -> Optional[Dict]:
+        response = (
+            await self._table()
+            .select(columns)
+            .eq("id", game_id)
+            .maybe_single()
+            .execute()
+        )
+        return response.data if response else None
+
+    async def get_many(self, game_ids: List[int], columns: str = "*") -> List[Dict]:
+        if not game_ids:
+            return []
+        response = await self._table().select(columns).in_("id", game_ids).execute()
+        return response.data or []
+
+    async def filter_ids(
+        self, filter_obj: Optional[GameFilter], game_ids: List[int]
+    ) -> List[int]:
+        batches = [
+            game_ids[start : start + self.IDS_PER_QUERY]
+            for start in range(0, len(game_ids), self.IDS_PER_QUERY)
+        ]
+        responses = await asyncio.gather(
+            *(
+                self._filter(self._table().select("id"), filter_obj)
+                .in_("id", batch)
+                .execute()
+                for batch in batches
+            )
+        )
+        return [row["id"] for response in responses for row in response.data or []]
+
+    async def title_exists(self, title: str) -> bool:
+        response = (
+            await self._table().select("id").eq("title", title).limit(1).execute()
+        )
+        return bool(response.data)
+
+    async def existing_titles(self, titles: List[str]) -> Set[str]:
+        if not titles:
+            return set()
+        response = await self._table().select("title").in_("title", titles).execute()
+        return {row["title"] for row in response.data or []}
+
+    async def insert_many(self, rows: List[Dict[str, Any]]) -> List[Dict]:
+        if not rows:
+            return []
+        response = (
+            await self._table()
+            .upsert(rows, on_conflict="title", ignore_duplicates=True)
+            .execute()
+        )
+        return response.data or []
+
+    async def upsert_many(self, rows: List[Dict[str, Any]]) -> List[Dict]:
+        if not rows:
+            return []
+        response = await self._table().upsert(rows, on_conflict="title").execute()
+        return response.data or []
+
+    async def create(self, data: Dict[str, Any]) -> Optional[Dict]:
+        response = await self._table().insert(data).execute()
+        return response.data[0] if response.data else None
+
+    async def update(self, game_id: int, data: Dict[str, Any]) -> Optional[Dict]:
+        response = await self._table().update(data).eq("id", game_id).execute()
+        return response.data[0] if response.data else None
+
+    async def delete(self, game_id: int) -> bool:
+        response = await self._table().delete().eq("id", game_id).execute()
+        return bool(response.data)
+
+    async def apply_rating_deltas(self, deltas: List[Dict]) -> List[Dict]:
+        response = await self._db.postgrest.rpc(
+            "apply_rating_deltas", {"p_deltas": deltas}
+        ).execute()
+        return response.data or []
+
+    async def reconcile_ratings(self, dry_run: bool = False) -> List[Dict]:
+        response = await self._db.postgrest.rpc(
+            "reconcile_game_ratings", {"p_dry_run": dry_run}
+        ).execute()
+        return response.data or []
+
+    async def top(self, limit: int) -> List[Dict]:
+        response = (
+            await self._table()
+            .select("*")
+            .order("average_rating", desc=True)
+            .order("id", desc=True)
+            .limit(limit)
+            .execute()
+        )
+        return response.data
+
+    async def recent(self, limit: int) -> List[Dict]:
+        response = (
+            await self._table()
+            .select("*")
+            .order("created_at", desc=True)
+            .order("id", desc=True)
+            .limit(limit)
+            .execute()
+        )
+        return response.data
+
+    def scan(
+        self, columns: str = "*", chunk_size: int = 1000
+    ) -> AsyncIterator[List[Dict]]:
+        return scan(self._table, columns, chunk_size)
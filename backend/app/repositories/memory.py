@@ -0,0 +1,726 @@
+import json
+import operator
+import re
+import uuid
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+MEMORY_URL = "https://memory.local"
+
+AUTO_ID = {"games", "reviews"}
+UNIQUE = {"games": ("title",), "cover_objects": ("hash",)}
+INDEXED = {
+    "games": ("id", "title"),
+    "reviews": ("id", "game_id", "ip_address"),
+    "cover_objects": ("hash",),
+}
+CASCADE = {"games": [("reviews", "game_id")]}
+DEFAULTS: Dict[str, Dict[str, Any]] = {
+    "games": {
+        "description": None,
+        "genres": [],
+        "developer": None,
+        "publisher": None,
+        "platforms": [],
+        "cover_image_path": None,
+        "cover_variants": None,
+        "cover_hash": None,
+        "average_rating": 0.0,
+        "rating_sum": 0,
+        "rating_count": 0,
+        "rating_histogram": [0] * 10,
+        "version": 1,
+    },
+    "reviews": {},
+    "cover_objects": {"cover_variants": None},
+}
+GENERATED = {"games": {"reviews_count": "rating_count"}}
+VERSIONED = ("games", "reviews")
+ROW_VERSIONED = {"games"}
+TIMESTAMPS = ("created_at", "last_used_at")
+TABLE_TIMESTAMPS = {"cover_objects": ("created_at", "last_used_at")}
+RESERVED = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _split(text: str, separator: str = ",") -> List[str]:
+    parts, depth, quoted, escaped, current = [], 0, False, False, ""
+    for char in text:
+        if escaped:
+            escaped = False
+        elif quoted and char == "\\":
+            escaped = True
+        elif char == '"':
+            quoted = not quoted
+        elif not quoted and char in "({":
+            depth += 1
+        elif not quoted and char in ")}":
+            depth -= 1
+        elif not quoted and depth == 0 and char == separator:
+            parts.append(current)
+            current = ""
+            continue
+        current += char
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _columns(select: str) -> List[str]:
+    return [part.strip() for part in _split(select)]
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return re.sub(r"\\(.)", r"\1", value[1:-1])
+    return value
+
+
+def _coerce(raw: str, sample: Any) -> Any:
+    if isinstance(sample, bool):
+        return raw == "true"
+    if isinstance(sample, int):
+        return int(float(raw))
+    if isinstance(sample, float):
+        return float(raw)
+    return raw
+
+
+def _pattern(raw: str, flags: int = 0) -> re.Pattern:
+    expression = "".join(
+        ".*" if char in "*%" else "." if char == "_" else re.escape(char)
+        for char in raw
+    )
+    return re.compile(f"^{expression}$", flags | re.DOTALL)
+
+
+COMPARISONS: Dict[str, Callable[[Any, Any], bool]] = {
+    "eq": operator.eq,
+    "neq": operator.ne,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+}
+
+Predicate = Callable[[Dict], bool]
+
+
+def _compare(value: Any, name: str, raw: str) -> bool:
+    if name == "is":
+        if raw == "null":
+            return value is None
+        return value is (raw == "true")
+    if value is None:
+        return False
+    if name == "in":
+        return str(value) in {_unquote(item) for item in _split(raw[1:-1])}
+    if name in ("cs", "cd"):
+        items = {_unquote(item) for item in _split(raw[1:-1])}
+        values = {str(item) for item in value or []}
+        return items <= values if name == "cs" else values <= items
+    if name == "like":
+        return bool(_pattern(raw).match(str(value)))
+    if name == "ilike":
+        return bool(_pattern(raw, re.IGNORECASE).match(str(value)))
+    raise ValueError(f"unsupported operator {name}")
+
+
+def _condition(column: str, expression: str) -> Predicate:
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    name, _, raw = expression.partition(".")
+    compare = COMPARISONS.get(name)
+    if compare is None:
+        return lambda row: _compare(row.get(column), name, raw) != negate
+
+    raw = _unquote(raw)
+    coerced: Dict[type, Any] = {}
+
+    def check(row: Dict) -> bool:
+        value = row.get(column)
+        if value is None:
+            return negate
+        kind = type(value)
+        if kind not in coerced:
+            coerced[kind] = _coerce(raw, value)
+        return compare(value, coerced[kind]) != negate
+
+    return check
+
+
+def _logic(name: str, body: str) -> Predicate:
+    checks = []
+    for item in _split(body[1:-1]):
+        if item.startswith(("and(", "or(")):
+            nested, _, rest = item.partition("(")
+            checks.append(_logic(nested, "(" + rest))
+        else:
+            column, _, expression = item.partition(".")
+            checks.append(_condition(column, expression))
+    combine = all if name == "and" else any
+    return lambda row: combine(check(row) for check in checks)
+
+
+def _predicate(filters: List[Tuple[str, str]]) -> Predicate:
+    checks = [
+        _logic(key, value) if key in ("or", "and") else _condition(key, value)
+        for key, value in filters
+    ]
+    if len(checks) == 1:
+        return checks[0]
+    return lambda row: all(check(row) for check in checks)
+
+
+def _sort(rows: List[Dict], order: str) -> List[Dict]:
+    for term in reversed(_split(order)):
+        column, *modifiers = term.split(".")
+        desc = "desc" in modifiers
+        nulls_first = "nullsfirst" in modifiers or (
+            desc and "nullslast" not in modifiers
+        )
+        present = [row for row in rows if row.get(column) is not None]
+        missing = [row for row in rows if row.get(column) is None]
+        present.sort(key=lambda row: row[column], reverse=desc)
+        rows = missing + present if nulls_first else present + missing
+    return rows
+
+
+class MemoryBackend:
+    def __init__(self, record: bool = False) -> None:
+        self.tables: Dict[str, List[Dict]] = {}
+        self.objects: Dict[str, bytes] = {}
+        self.calls: List[Dict] = []
+        self.call_count = 0
+        self.record = record
+        self._sequences: Dict[str, int] = {}
+        self._indexes: Dict[Tuple[str, str], Tuple[List[Dict], int, Dict]] = {}
+        self._sorted_ids: Dict[str, Tuple[Dict, List[int]]] = {}
+        self.versions: Dict[str, int] = {table: 1 for table in VERSIONED}
+
+    def _table(self, name: str) -> List[Dict]:
+        return self.tables.setdefault(name, [])
+
+    def _index(self, table: str, column: str) -> Dict[Any, List[Dict]]:
+        rows = self._table(table)
+        cached = self._indexes.get((table, column))
+        if cached is None or cached[0] is not rows or cached[1] != len(rows):
+            index: Dict[Any, List[Dict]] = {}
+            for row in rows:
+                index.setdefault(row.get(column), []).append(row)
+            cached = self._indexes[(table, column)] = (rows, len(rows), index)
+        return cached[2]
+
+    def _lookup(self, table: str, column: str, value: Any) -> List[Dict]:
+        if column in INDEXED.get(table, ()):
+            return self._index(table, column).get(value, [])
+        return [row for row in self._table(table) if row.get(column) == value]
+
+    def _ids(self, table: str) -> List[int]:
+        index = self._index(table, "id")
+        cached = self._sorted_ids.get(table)
+        if cached is None or cached[0] is not index:
+            ids = sorted(key for key in index if key is not None)
+            cached = self._sorted_ids[table] = (index, ids)
+        return cached[1]
+
+    def _keyset(
+        self, table: str, filters: List[Tuple[str, str]], params: httpx.QueryParams
+    ) -> Optional[List[Dict]]:
+        orders = params.get_list("order")
+        if "id" not in INDEXED.get(table, ()) or "limit" not in params:
+            return None
+        if orders not in (["id.asc"], ["id.desc"]):
+            return None
+
+        ids = self._ids(table)
+        low, high = 0, len(ids)
+        for column, expression in filters:
+            name, _, raw = expression.partition(".")
+            if column != "id" or name not in COMPARISONS or name in ("eq", "neq"):
+                continue
+            value = int(raw)
+            if name in ("gt", "gte"):
+                bound = bisect_right if name == "gt" else bisect_left
+                low = max(low, bound(ids, value))
+            else:
+                bound = bisect_left if name == "lt" else bisect_right
+                high = min(high, bound(ids, value))
+
+        wanted = int(params.get("offset", 0)) + int(params["limit"])
+        positions = (
+            range(high - 1, low - 1, -1) if orders == ["id.desc"] else range(low, high)
+        )
+        matches, index, rows = _predicate(filters), self._index(table, "id"), []
+        for position in positions:
+            rows.extend(row for row in index[ids[position]] if matches(row))
+            if len(rows) >= wanted:
+                break
+        return rows
+
+    def _append(self, table: str, row: Dict) -> None:
+        rows = self._table(table)
+        rows.append(row)
+        self._sorted_ids.pop(table, None)
+        for column in INDEXED.get(table, ()):
+            cached = self._indexes.get((table, column))
+            if cached and cached[0] is rows and cached[1] == len(rows) - 1:
+                cached[2].setdefault(row.get(column), []).append(row)
+                self._indexes[(table, column)] = (rows, len(rows), cached[2])
+
+    def _candidates(self, table: str, filters: List[Tuple[str, str]]) -> List[Dict]:
+        candidates = self._table(table)
+        for column, expression in filters:
+            if column in INDEXED.get(table, ()) and expression.startswith("eq."):
+                raw = _unquote(expression[3:])
+                rows = self._lookup(table, column, raw)
+                if raw.lstrip("-").isdigit():
+                    rows = rows + self._lookup(table, column, int(raw))
+                if len(rows) < len(candidates):
+                    candidates = rows
+        return candidates
+
+    def _record(self, call: Dict) -> None:
+        self.call_count += 1
+        if self.record:
+            self.calls.append(call)
+
+    def _new_row(self, table: str, item: Dict) -> Dict:
+        row = {**DEFAULTS.get(table, {}), **item}
+        if table in AUTO_ID and row.get("id") is None:
+            if table not in self._sequences:
+                rows = self._table(table)
+                self._sequences[table] = max((r["id"] for r in rows), default=0)
+            self._sequences[table] += 1
+            row["id"] = self._sequences[table]
+        for column in TABLE_TIMESTAMPS.get(table, ("created_at",)):
+            if row.get(column, "now") == "now":
+                row[column] = _now()
+        self._generate(table, row)
+        return row
+
+    def _written(self, table: str, updated: Iterable[Dict] = ()) -> None:
+        if table in self.versions:
+            self.versions[table] += 1
+        if table in ROW_VERSIONED:
+            for row in updated:
+                row["version"] = row.get("version", 1) + 1
+
+    @staticmethod
+    def _generate(table: str, row: Dict) -> None:
+        for column, source in GENERATED.get(table, {}).items():
+            row[column] = row.get(source, 0)
+
+    def _conflict(self, table: str, item: Dict, column: str) -> Optional[Dict]:
+        if item.get(column) is None:
+            return None
+        rows = self._lookup(table, column, item[column])
+        return rows[0] if rows else None
+
+    def insert(
+        self, table: str, items: Iterable[Dict], on_conflict: str = "", resolution=""
+    ) -> List[Dict]:
+        written, merged = [], []
+        for item in items:
+            for column in UNIQUE.get(table, ()):
+                existing = self._conflict(table, item, column)
+                if existing is None:
+                    continue
+                if on_conflict == column and resolution == "ignore":
+                    break
+                if on_conflict == column:
+                    existing.update(self._stamp(item))
+                    self._generate(table, existing)
+                    written.append(existing)
+                    merged.append(existing)
+                    break
+                raise MemoryConflict(table, column)
+            else:
+                row = self._new_row(table, item)
+                self._append(table, row)
+                written.append(row)
+        self._written(table, merged)
+        return written
+
+    @staticmethod
+    def _stamp(data: Dict) -> Dict:
+        return {
+            key: _now() if key in TIMESTAMPS and value == "now" else value
+            for key, value in data.items()
+        }
+
+    def update(self, table: str, rows: List[Dict], data: Dict) -> List[Dict]:
+        data = self._stamp(data)
+        for column in UNIQUE.get(table, ()):
+            if rows and column in data:
+                existing = self._conflict(table, data, column)
+                if existing is not None and all(row is not existing for row in rows):
+                    raise MemoryConflict(table, column)
+        for column in INDEXED.get(table, ()):
+            if column in data:
+                self._indexes.pop((table, column), None)
+        for row in rows:
+            row.update(data)
+            self._generate(table, row)
+        self._written(table, rows)
+        return rows
+
+    def delete(self, table: str, rows: List[Dict]) -> List[Dict]:
+        removed = {id(row) for row in rows}
+        self.tables[table] = [r for r in self._table(table) if id(r) not in removed]
+        self._written(table)
+        for child, column in CASCADE.get(table, []):
+            keys = {row["id"] for row in rows}
+            self.tables[child] = [
+                r for r in self._table(child) if r.get(column) not in keys
+            ]
+            self._written(child)
+        return rows
+
+    def _embed(self, table: str, row: Dict, columns: List[str]) -> Dict:
+        result: Dict[str, Any] = {}
+        for column in columns:
+            if column == "*":
+                result.update(row)
+            elif "(" in column:
+                name, _, inner = column.partition("(")
+                inner = _columns(inner[:-1])
+                foreign_key = f"{name.rstrip('s')}_id"
+                if foreign_key in row:
+                    parents = self._lookup(name, "id", row[foreign_key])
+                    result[name] = (
+                        self._embed(name, parents[0], inner) if parents else None
+                    )
+                else:
+                    back_key = f"{table.rstrip('s')}_id"
+                    result[name] = [
+                        self._embed(name, r, inner)
+                        for r in self._lookup(name, back_key, row.get("id"))
+                    ]
+            else:
+                result[column] = row.get(column)
+        return result
+
+    def rpc(self, name: str, params: Dict) -> Any:
+        handler: Optional[Callable[[Dict], Any]] = getattr(self, f"rpc_{name}", None)
+        if handler is None:
+            raise ValueError(f"unknown function {name}")
+        return handler(params or {})
+
+    def _game(self, game_id: int) -> Optional[Dict]:
+        games = self._lookup("games", "id", game_id)
+        return games[0] if games else None
+
+    def rpc_apply_rating_delta(self, params: Dict) -> List[Dict]:
+        game = self._game(params["p_game_id"])
+        if game is None:
+            return []
+        old, new = params.get("p_old_rating"), params.get("p_new_rating")
+        histogram = list(game.get("rating_histogram") or [0] * 10)
+        total, count = game.get("rating_sum", 0), game.get("rating_count", 0)
+        if old is not None:
+            total, count = total - old, count - 1
+            histogram[old - 1] -= 1
+        if new is not None:
+            total, count = total + new, count + 1
+            histogram[new - 1] += 1
+        game.update(
+            rating_sum=total,
+            rating_count=count,
+            rating_histogram=histogram,
+            average_rating=round(total / count, 1) if count else 0,
+        )
+        self._generate("games", game)
+        self._written("games", [game])
+        return [game]
+
+    def _own_review(self, params: Dict) -> Dict:
+        reviews = self._lookup("reviews", "id", params["p_review_id"])
+        if not reviews:
+            raise MemoryFailure("P0002", f"review {params['p_review_id']} not found")
+        if reviews[0]["ip_address"] != params["p_ip_address"]:
+            raise MemoryFailure(
+                "42501",
+                f"review {params['p_review_id']} belongs to another client",
+                status=403,
+            )
+        return reviews[0]
+
+    def _review_result(self, params: Dict, review: Dict, old, new) -> Dict:
+        game = None
+        if old != new and not params.get("p_defer_rating"):
+            games = self.rpc_apply_rating_delta(
+                {
+                    "p_game_id": review["game_id"],
+                    "p_old_rating": old,
+                    "p_new_rating": new,
+                }
+            )
+            game = games[0] if games else None
+        return {"review": review, "game": game, "old_rating": old, "new_rating": new}
+
+    def rpc_apply_rating_deltas(self, params: Dict) -> List[Dict]:
+        games = []
+        for delta in params["p_deltas"]:
+            game = self._game(delta["game_id"])
+            if game is None:
+                continue
+            histogram = game.get("rating_histogram") or [0] * 10
+            total = game.get("rating_sum", 0) + delta["sum"]
+            count = game.get("rating_count", 0) + delta["count"]
+            game.update(
+                rating_sum=total,
+                rating_count=count,
+                rating_histogram=[a + b for a, b in zip(histogram, delta["histogram"])],
+                average_rating=round(total / count, 1) if count else 0,
+            )
+            self._generate("games", game)
+            games.append(game)
+        self._written("games", games)
+        return games
+
+    def rpc_submit_review(self, params: Dict) -> Dict:
+        game_id, ip_address = params["p_game_id"], params["p_ip_address"]
+        if self._game(game_id) is None:
+            raise MemoryFailure(
+                "23503",
+                'insert or update on table "reviews" violates foreign key '
+                'constraint "reviews_game_id_fkey"',
+                status=409,
+            )
+        if any(
+            review["ip_address"] == ip_address
+            for review in self._lookup("reviews", "game_id", game_id)
+        ):
+            raise MemoryConflict("reviews", "game_ip")
+
+        review = self.insert(
+            "reviews",
+            [
+                {
+                    "game_id": game_id,
+                    "ip_address": ip_address,
+                    "rating": params["p_rating"],
+                    "text": params["p_text"],
+                }
+            ],
+        )[0]
+        return self._review_result(params, review, None, review["rating"])
+
+    def rpc_edit_review(self, params: Dict) -> Dict:
+        review = self._own_review(params)
+        old = review["rating"]
+        changes = {
+            column: params[f"p_{column}"]
+            for column in ("rating", "text")
+            if params.get(f"p_{column}") is not None
+        }
+        review = self.update("reviews", [review], changes)[0]
+        return self._review_result(params, review, old, review["rating"])
+
+    def rpc_delete_review(self, params: Dict) -> Dict:
+        review = self._own_review(params)
+        self.delete("reviews", [review])
+        return self._review_result(params, review, review["rating"], None)
+
+    def rpc_reconcile_game_ratings(self, params: Dict) -> List[Dict]:
+        drifted = []
+        reviews = self._table("reviews")
+        for game in self._table("games"):
+            ratings = [r["rating"] for r in reviews if r["game_id"] == game["id"]]
+            histogram = [ratings.count(value) for value in range(1, 11)]
+            actual = (sum(ratings), len(ratings), histogram)
+            current = (
+                game.get("rating_sum", 0),
+                game.get("rating_count", 0),
+                game.get("rating_histogram"),
+            )
+            if actual == current:
+                continue
+            drifted.append(
+                {
+                    "game_id": game["id"],
+                    "old_sum": current[0],
+                    "old_count": current[1],
+                    "new_sum": actual[0],
+                    "new_count": actual[1],
+                    "old_histogram": current[2],
+                    "new_histogram": histogram,
+                }
+            )
+            if not params.get("p_dry_run"):
+                game["rating_sum"], game["rating_count"] = actual[:2]
+                game["rating_histogram"] = histogram
+                game["average_rating"] = (
+                    round(actual[0] / actual[1], 1) if actual[1] else 0
+                )
+                self._generate("games", game)
+        if not params.get("p_dry_run"):
+            self._written("games", [self._game(row["game_id"]) for row in drifted])
+        return drifted
+
+    def rpc_data_versions(self, params: Dict) -> Dict:
+        game = self._game(params["p_game_id"]) if params.get("p_game_id") else None
+        return {**self.versions, "game": game.get("version", 1) if game else None}
+
+    def rpc_claim_orphan_covers(self, params: Dict) -> List[Dict]:
+        grace = timedelta(seconds=params.get("p_grace_seconds", 3600))
+        cutoff = (datetime.now(timezone.utc) - grace).isoformat()
+        referenced = {g.get("cover_hash") for g in self._table("games")}
+        orphans = sorted(
+            (
+                row
+                for row in self._table("cover_objects")
+                if row["hash"] not in referenced and row["last_used_at"] < cutoff
+            ),
+            key=lambda row: row["last_used_at"],
+        )[: params.get("p_limit", 100)]
+        return self.delete("cover_objects", orphans)
+
+    async def _storage(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        path = request.url.path.split("/object/", 1)[-1]
+        self._record(
+            {
+                "method": request.method,
+                "table": "storage",
+                "path": request.url.path,
+                "content_type": request.headers.get("content-type"),
+                "size": len(body),
+            }
+        )
+
+        if request.method == "DELETE":
+            removed = []
+            for prefix in json.loads(body)["prefixes"]:
+                if self.objects.pop(f"{path}/{prefix}", None) is not None:
+                    removed.append({"name": prefix})
+            return httpx.Response(200, json=removed)
+        if request.method == "GET":
+            path = path.removeprefix("public/")
+            if path not in self.objects:
+                return httpx.Response(404, json={"error": "not_found"})
+            return httpx.Response(200, content=self.objects[path])
+
+        self.objects[path] = body
+        return httpx.Response(200, json={"Key": path, "Id": str(uuid.uuid4())})
+
+    def _execute(
+        self, request: httpx.Request, table: str, body: Any
+    ) -> Tuple[List[Dict], int]:
+        params = request.url.params
+        filters = [(k, v) for k, v in params.multi_items() if k not in RESERVED]
+        prefer = request.headers.get("prefer", "")
+        rows = None
+        if request.method == "POST":
+            rows = []
+        elif request.method == "GET" and "count=" not in prefer:
+            rows = self._keyset(table, filters, params)
+        if rows is None and not filters:
+            rows = list(self._table(table))
+        if rows is None:
+            matches = _predicate(filters)
+            rows = [row for row in self._candidates(table, filters) if matches(row)]
+
+        if request.method == "POST":
+            resolution = "ignore" if "ignore-duplicates" in prefer else "merge"
+            items = body if isinstance(body, list) else [body or {}]
+            rows = self.insert(table, items, params.get("on_conflict", ""), resolution)
+        elif request.method == "PATCH":
+            rows = self.update(table, rows, body or {})
+        elif request.method == "DELETE":
+            rows = self.delete(table, rows)
+
+        for order in params.get_list("order"):
+            rows = _sort(rows, order)
+        total = len(rows)
+        offset = int(params.get("offset", 0))
+        limit = int(params.get("limit", total))
+        return rows[offset : offset + limit], total
+
+    def _dispatch(
+        self, request: httpx.Request, table: str, body: Any
+    ) -> Tuple[Any, int]:
+        if "/rpc/" in request.url.path:
+            result = self.rpc(table, body)
+            return result, len(result) if isinstance(result, list) else 1
+        return self._execute(request, table, body)
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        if "/storage/v1/" in request.url.path:
+            return await self._storage(request)
+
+        content = await request.aread()
+        body = json.loads(content) if content else None
+        table = request.url.path.rsplit("/", 1)[-1]
+        call = {
+            "method": request.method,
+            "table": table,
+            "params": dict(request.url.params),
+            "json": body,
+            "rows": 0,
+        }
+        try:
+            rows, total = self._dispatch(request, table, body)
+        except MemoryFailure as e:
+            self._record(call)
+            return httpx.Response(e.status, json=e.payload)
+
+        columns = request.url.params.get("select", "*")
+        if isinstance(rows, list) and "/rpc/" not in request.url.path:
+            if columns == "count":
+                rows = [{"count": total}]
+            else:
+                fields = _columns(columns)
+                rows = [self._embed(table, row, fields) for row in rows]
+
+        call["rows"] = len(rows) if isinstance(rows, list) else 1
+        self._record(call)
+
+        headers = {}
+        prefer = request.headers.get("prefer", "")
+        if "count=" in prefer:
+            offset = int(request.url.params.get("offset", 0))
+            end = offset + len(rows) - 1
+            span = f"{offset}-{end}" if rows else "*"
+            headers["Content-Range"] = f"{span}/{total}"
+        if "return=minimal" in prefer:
+            return httpx.Response(201, headers=headers)
+        if "vnd.pgrst.object" in request.headers.get("accept", ""):
+            return httpx.Response(200, json=rows[0] if rows else None)
+        return httpx.Response(200, json=rows, headers=headers)
+
+    def seed(self, table: str, rows: Iterable[Dict]) -> List[Dict]:
+        seeded = []
+        for item in rows:
+            row = self._new_row(table, item)
+            self._append(table, row)
+            seeded.append(row)
+        self._sequences.pop(table, None)
+        return seeded
+
+
+class MemoryFailure(Exception):
+    def __init__(
+        self, code: str, message: str, details: Optional[str] = None, status=400
+    ) -> None:
+        self.status = status
+        self.payload = {"code": code, "message": message, "details": details}
+        self.payload["hint"] = None
+
+
+class MemoryConflict(MemoryFailure):
+    def __init__(self, table: str, column: str) -> None:
+        super().__init__(
+            "23505",
+            f'duplicate key value violates unique constraint "{table}_{column}_key"',
+            f"Key ({column}) already exists.",
+            status=409,
+        )
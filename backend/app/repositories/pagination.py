@@ -0,0 +1,47 @@
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from app.services.pagination import Keyset
+
+
+def quote(value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def order_by(
+    query, column: Optional[str], after: Optional[Keyset] = None, desc: bool = True
+):
+    if column is None:
+        if after is not None:
+            query = query.gt("id", after[1])
+        return query.order("id")
+
+    if after is not None:
+        value, row_id = after
+        value = quote(value) if isinstance(value, str) else value
+        op = "lt" if desc else "gt"
+        query = query.or_(
+            f"{column}.{op}.{value},and({column}.eq.{value},id.{op}.{row_id})"
+        )
+    return query.order(column, desc=desc).order("id", desc=desc)
+
+
+async def scan(
+    table: Callable, columns: str = "*", chunk_size: int = 1000
+) -> AsyncIterator[List[Dict]]:
+    last_id = 0
+    while True:
+        response = (
+            await table()
+            .select(columns)
+            .gt("id", last_id)
+            .order("id")
+            .limit(chunk_size)
+            .execute()
+        )
+        rows = response.data or []
+        if rows:
+            yield rows
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1]["id"]
@@ -0,0 +1,158 @@
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional
+
+from app.repositories.pagination import order_by, scan
+from app.services.pagination import Keyset
+from app.services.singleflight import coalesce
+
+if TYPE_CHECKING:
+    from app.core.database import Database
+
+
+class ReviewRepository:
+    SORT_COLUMNS = {"id": None, "rating": "rating", "created_at": "created_at"}
+    GAME_SORTS = {
+        "newest": ("created_at", True),
+        "highest": ("rating", True),
+        "lowest": ("rating", False),
+    }
+
+    def __init__(self, db: "Database") -> None:
+        self._db = db
+
+    def _table(self):
+        return self._db.postgrest.table("reviews")
+
+    async def list(
+        self,
+        offset: int,
+        limit: int,
+        ip_address: Optional[str] = None,
+        sort: str = "id",
+        after: Optional[Keyset] = None,
+        columns: str = "*",
+    ) -> tuple[list[dict], int]:
+        query = self._table().select(columns, count="exact")
+        if ip_address is not None:
+            query = query.eq("ip_address", ip_address)
+
+        query = order_by(query, self.SORT_COLUMNS[sort], after)
+        if after is None:
+            query = query.range(offset, offset + limit - 1)
+        else:
+            query = query.limit(limit)
+
+        response = await query.execute()
+        return response.data or [], response.count or 0
+
+    async def recent(self, limit: int, columns: str = "*, games(*)") -> List[Dict]:
+        response = (
+            await self._table()
+            .select(columns)
+            .order("created_at", desc=True)
+            .limit(limit)
+            .execute()
+        )
+        return response.data
+
+    @coalesce
+    async def get(self, review_id: int, columns: str = "*") -> Optional[Dict]:
+        response = (
+            await self._table()
+            .select(columns)
+            .eq("id", review_id)
+            .maybe_single()
+            .execute()
+        )
+        return response.data if response else None
+
+    async def find(
+        self, game_id: int, ip_address: str, columns: str = "id"
+    ) -> Optional[Dict]:
+        response = (
+            await self._table()
+            .select(columns)
+            .eq("game_id", game_id)
+            .eq("ip_address", ip_address)
+            .limit(1)
+            .execute()
+        )
+        return response.data[0] if response.data else None
+
+    async def _rpc(self, name: str, params: Dict[str, Any]) -> Dict:
+        response = await self._db.postgrest.rpc(name, params).execute()
+        return response.data
+
+    async def submit(
+        self,
+        game_id: int,
+        ip_address: str,
+        rating: int,
+        text: str,
+        defer_rating: bool = False,
+    ) -> Dict:
+        return await self._rpc(
+            "submit_review",
+            {
+                "p_game_id": game_id,
+                "p_ip_address": ip_address,
+                "p_rating": rating,
+                "p_text": text,
+                "p_defer_rating": defer_rating,
+            },
+        )
+
+    async def edit(
+        self,
+        review_id: int,
+        ip_address: str,
+        data: Dict[str, Any],
+        defer_rating: bool = False,
+    ) -> Dict:
+        return await self._rpc(
+            "edit_review",
+            {
+                "p_review_id": review_id,
+                "p_ip_address": ip_address,
+                "p_rating": data.get("rating"),
+                "p_text": data.get("text"),
+                "p_defer_rating": defer_rating,
+            },
+        )
+
+    async def remove(
+        self, review_id: int, ip_address: str, defer_rating: bool = False
+    ) -> Dict:
+        return await self._rpc(
+            "delete_review",
+            {
+                "p_review_id": review_id,
+                "p_ip_address": ip_address,
+                "p_defer_rating": defer_rating,
+            },
+        )
+
+    @coalesce
+    async def for_game(
+        self,
+        game_id: int,
+        offset: int,
+        limit: int,
+        sort: str = "newest",
+        after: Optional[Keyset] = None,
+        columns: str = "*",
+    ) -> List[Dict]:
+        column, desc = self.GAME_SORTS[sort]
+        query = self._table().select(columns).eq("game_id", game_id)
+        query = order_by(query, column, after, desc)
+        if after is None:
+            query = query.range(offset, offset + limit - 1)
+        else:
+            query = query.limit(limit)
+
+        response = await query.execute()
+        return response.data or []
+
+    def scan(
+        self, columns: str = "*", chunk_size: int = 1000
+    ) -> AsyncIterator[List[Dict]]:
+        return scan(self._table, columns, chunk_size)
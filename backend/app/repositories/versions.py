@@ -0,0 +1,18 @@
+from typing import TYPE_CHECKING, Dict, Optional
+
+from app.services.singleflight import coalesce
+
+if TYPE_CHECKING:
+    from app.core.database import Database
+
+
+class VersionRepository:
+    def __init__(self, db: "Database") -> None:
+        self._db = db
+
+    @coalesce
+    async def fetch(self, game_id: Optional[int] = None) -> Dict[str, Optional[int]]:
+        response = await self._db.postgrest.rpc(
+            "data_versions", {"p_game_id": game_id}
+        ).execute()
+        return response.data or {}
@@ -1,8 +1,10 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Union
 
 from pydantic import BaseModel, ConfigDict, Field, validator
 
+from app.schemas.partial import partial
+
 
 class GameBase(BaseModel):
     title: str = Field(
@@ -189,19 +191,60 @@ class GameResponse(GameBase):
         le=10,
         description="Средний рейтинг игры",
     )
+    cover_variants: Optional[Dict[str, str]] = Field(
+        None,
+        description="Уменьшенные WebP-версии обложки: thumb, card, full",
+    )
     created_at: datetime = Field(..., description="Дата добавления в каталог")
+    reviews_count: int = Field(
+        default=0,
+        description="Количество рецензий на игру",
+    )
+
+
+GameFields = partial(GameResponse, "GameFields")
 
 
 class GameListResponse(BaseModel):
-    items: List[GameResponse] = Field(..., description="Список игр")
+    items: List[Union[GameResponse, GameFields]] = Field(
+        ..., description="Список игр (с fields= — только запрошенные поля)"
+    )
     total: int = Field(..., description="Общее количество игр")
     page: int = Field(..., ge=1, description="Текущая страница")
     page_size: int = Field(..., ge=1, description="Размер страницы")
     pages: int = Field(..., ge=0, description="Общее количество страниц")
+    next_cursor: Optional[str] = Field(
+        None, description="Курсор следующей страницы (keyset-пагинация)"
+    )
 
 
-class GameDetailResponse(GameResponse):
-    reviews_count: int = Field(
-        default=0,
-        description="Количество рецензий на игру",
+class GameBatchResponse(BaseModel):
+    items: List[Optional[GameResponse]] = Field(
+        ..., description="Игры в порядке запроса, null — игра не найдена"
+    )
+    missing: List[int] = Field(
+        default_factory=list, description="ID, для которых игра не найдена"
+    )
+
+
+class FacetCount(BaseModel):
+    value: str = Field(..., description="Значение (жанр или платформа)")
+    count: int = Field(..., ge=0, description="Количество игр с этим значением")
+
+
+class GameImportError(BaseModel):
+    row: int = Field(..., description="Номер строки в файле")
+    title: Optional[str] = Field(None, description="Название игры из строки")
+    errors: List[str] = Field(..., description="Описание ошибок")
+
+
+class GameImportReport(BaseModel):
+    processed: int = Field(0, ge=0, description="Прочитано строк")
+    inserted: int = Field(0, ge=0, description="Добавлено игр")
+    updated: int = Field(0, ge=0, description="Обновлено игр")
+    skipped: int = Field(0, ge=0, description="Пропущено дубликатов")
+    failed: int = Field(0, ge=0, description="Строк с ошибками")
+    aborted: bool = Field(False, description="Импорт остановлен досрочно")
+    errors: List[GameImportError] = Field(
+        default_factory=list, description="Ошибки по строкам (первые N)"
     )
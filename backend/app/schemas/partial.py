@@ -0,0 +1,13 @@
+from typing import Optional, Type
+
+from pydantic import BaseModel, create_model
+from pydantic.fields import FieldInfo
+
+
+def partial(model: Type[BaseModel], name: str) -> Type[BaseModel]:
+    fields = {}
+    for field_name, field in model.model_fields.items():
+        info = FieldInfo.merge_field_infos(field, default=None)
+        info.default_factory = None
+        fields[field_name] = (Optional[field.annotation], info)
+    return create_model(name, __config__=model.model_config, **fields)
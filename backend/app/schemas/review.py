@@ -1,8 +1,11 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Union
 
 from pydantic import BaseModel, ConfigDict, Field
 
+from app.schemas.game import GameFields, GameResponse
+from app.schemas.partial import partial
+
 
 class ReviewBase(BaseModel):
     rating: int = Field(
@@ -42,13 +45,6 @@ class ReviewUpdate(BaseModel):
     )
 
 
-class ReviewGame(BaseModel):
-    model_config = ConfigDict(from_attributes=True)
-
-    id: int = Field(..., description="ID игры")
-    title: str = Field(..., description="Название игры")
-
-
 class ReviewResponse(ReviewBase):
     model_config = ConfigDict(from_attributes=True)
 
@@ -58,21 +54,34 @@ class ReviewResponse(ReviewBase):
     created_at: datetime = Field(..., description="Дата создания")
 
 
-class ReviewDetailResponse(ReviewBase):
-    model_config = ConfigDict(from_attributes=True)
+ReviewFields = partial(ReviewResponse, "ReviewFields")
+
+
+class ReviewWithGame(ReviewResponse):
+    games: Union[GameResponse, GameFields] = Field(..., description="Игра")
 
-    id: int = Field(..., description="ID рецензии")
-    game: ReviewGame = Field(..., description="Игра")
-    ip_address: str = Field(..., description="IP автора")
-    created_at: datetime = Field(..., description="Дата создания")
+
+ReviewWithGameFields = partial(ReviewWithGame, "ReviewWithGameFields")
 
 
 class ReviewListResponse(BaseModel):
-    items: List[ReviewResponse] = Field(..., description="Список рецензий")
+    items: List[Union[ReviewResponse, ReviewFields]] = Field(
+        ..., description="Список рецензий (с fields= — только запрошенные поля)"
+    )
     total: int = Field(..., description="Всего рецензий")
     page: int = Field(..., ge=1, description="Страница")
     page_size: int = Field(..., ge=1, description="Размер страницы")
     pages: int = Field(..., ge=0, description="Страниц всего")
+    next_cursor: Optional[str] = Field(
+        None, description="Курсор следующей страницы (keyset-пагинация)"
+    )
+
+
+class GameReviewItem(ReviewResponse):
+    is_own: bool = Field(False, description="Рецензия текущего пользователя")
+
+
+GameReviewFields = partial(GameReviewItem, "GameReviewFields")
 
 
 class GameReviewsResponse(BaseModel):
@@ -80,4 +89,21 @@ class GameReviewsResponse(BaseModel):
     game_title: str = Field(..., description="Название игры")
     average_rating: float = Field(..., ge=0, le=10, description="Средний рейтинг игры")
     reviews_count: int = Field(..., description="Количество рецензий")
-    items: List[ReviewDetailResponse] = Field(..., description="Список рецензий")
+    rating_histogram: List[int] = Field(
+        ...,
+        min_length=10,
+        max_length=10,
+        description="Количество оценок от 1 до 10 (индекс 0 — оценка 1)",
+    )
+    own_review: Optional[Union[GameReviewItem, GameReviewFields]] = Field(
+        None, description="Рецензия текущего пользователя на эту игру"
+    )
+    items: List[Union[GameReviewItem, GameReviewFields]] = Field(
+        ..., description="Список рецензий (с fields= — только запрошенные поля)"
+    )
+    page: int = Field(..., ge=1, description="Страница")
+    page_size: int = Field(..., ge=1, description="Размер страницы")
+    pages: int = Field(..., ge=0, description="Страниц всего")
+    next_cursor: Optional[str] = Field(
+        None, description="Курсор следующей страницы (keyset-пагинация)"
+    )
@@ -0,0 +1,120 @@
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services.etags import encoded_etag
+
+SKIP_TYPES = ("application/gzip", "image/")
+
+
+def accepts_gzip(header: str) -> bool:
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        if coding.strip().lower() not in ("gzip", "*"):
+            continue
+        name, _, value = params.strip().partition("=")
+        if name.strip().lower() != "q":
+            return True
+        try:
+            return float(value) > 0
+        except ValueError:
+            return False
+    return False
+
+
+class GzipResponder:
+    def __init__(
+        self, send: Send, minimum_size: int, level: int, if_none_match: str
+    ) -> None:
+        self._send = send
+        self.minimum_size = minimum_size
+        self.level = level
+        self.if_none_match = if_none_match
+        self.start: Optional[Message] = None
+        self.compressor = None
+
+    def _skip(self, headers: MutableHeaders) -> bool:
+        return "content-encoding" in headers or headers.get(
+            "content-type", ""
+        ).startswith(SKIP_TYPES)
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+        if self.start is not None:
+            await self._begin(message)
+            return
+        if self.compressor is None:
+            await self._send(message)
+            return
+
+        more_body = message.get("more_body", False)
+        body = self.compressor.compress(message.get("body", b""))
+        if more_body:
+            body += self.compressor.flush(zlib.Z_SYNC_FLUSH)
+        else:
+            body += self.compressor.flush()
+        await self._send({**message, "body": body})
+
+    async def _begin(self, message: Message) -> None:
+        start, self.start = self.start, None
+        headers = MutableHeaders(scope=start)
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        etag = headers.get("etag")
+        if start["status"] == 304 and etag:
+            if encoded_etag(etag) in self.if_none_match:
+                headers["ETag"] = encoded_etag(etag)
+
+        if self._skip(headers) or (len(body) < self.minimum_size and not more_body):
+            await self._send(start)
+            await self._send(message)
+            return
+
+        self.compressor = zlib.compressobj(
+            self.level, zlib.DEFLATED, zlib.MAX_WBITS | 16
+        )
+        headers["Content-Encoding"] = "gzip"
+        headers.add_vary_header("Accept-Encoding")
+        if etag:
+            headers["ETag"] = encoded_etag(etag)
+        if more_body:
+            del headers["Content-Length"]
+            body = self.compressor.compress(body) + self.compressor.flush(
+                zlib.Z_SYNC_FLUSH
+            )
+        else:
+            body = self.compressor.compress(body) + self.compressor.flush()
+            headers["Content-Length"] = str(len(body))
+
+        await self._send(start)
+        await self._send({**message, "body": body})
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, level: int = 6) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        if not accepts_gzip(headers.get("accept-encoding", "")):
+            await self.app(scope, receive, send)
+            return
+
+        responder = GzipResponder(
+            send, self.minimum_size, self.level, headers.get("if-none-match", "")
+        )
+        await self.app(scope, receive, responder.send)
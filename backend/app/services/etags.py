@@ -0,0 +1,105 @@
+import hashlib
+import time
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+from app.services.indexes import GameIndex
+
+GZIP_SUFFIX = "-gzip"
+MAX_CACHED_VERSIONS = 10_000
+BIGINT_MAX = 2**63 - 1
+
+Versions = Dict[str, Optional[int]]
+IndexLoader = Callable[[], Awaitable[GameIndex]]
+
+
+class NotModified(Exception):
+    def __init__(self, etag: str) -> None:
+        self.etag = etag
+
+
+def version_etag(parts: Iterable[str]) -> str:
+    digest = hashlib.sha1("|".join(parts).encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def encoded_etag(etag: str) -> str:
+    return f'{etag[:-1]}{GZIP_SUFFIX}"'
+
+
+def if_none_match(header: str) -> set[str]:
+    tags = set()
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag.endswith(f'{GZIP_SUFFIX}"'):
+            tag = tag[: -len(GZIP_SUFFIX) - 1] + '"'
+        tags.add(tag)
+    return tags
+
+
+def _game_id(request: Request) -> Optional[int]:
+    raw = request.path_params.get("game_id", "")
+    if not raw.isdigit() or int(raw) > BIGINT_MAX:
+        return None
+    return int(raw)
+
+
+class DataVersions:
+    def __init__(self, fetch: Callable[[Optional[int]], Awaitable[Versions]]) -> None:
+        self._fetch = fetch
+        self._cached: Dict[Optional[int], Tuple[float, Versions]] = {}
+        self._generation = 0
+
+    async def get(self, game_id: Optional[int] = None) -> Versions:
+        ttl = settings.ETAG_VERSIONS_TTL_SECONDS
+        started, generation = time.monotonic(), self._generation
+        cached = self._cached.get(game_id)
+        if cached and started - cached[0] < ttl:
+            return cached[1]
+
+        versions = await self._fetch(game_id)
+        if ttl > 0 and generation == self._generation:
+            if len(self._cached) >= MAX_CACHED_VERSIONS:
+                self._cached.clear()
+            self._cached[game_id] = (started, versions)
+        return versions
+
+    def forget(self) -> None:
+        self._cached.clear()
+        self._generation += 1
+
+    def conditional(
+        self,
+        *keys: str,
+        indexes: Iterable[IndexLoader] = (),
+        search: Optional[IndexLoader] = None,
+        per_client: bool = False,
+    ) -> Callable:
+        indexes = tuple(indexes)
+
+        async def dependency(request: Request, response: Response) -> None:
+            versions = await self.get(_game_id(request) if "game" in keys else None)
+            parts = [f"{key}={versions.get(key)}" for key in keys]
+            for load in indexes:
+                parts.append((await load()).stamp)
+            if search is not None and request.query_params.get("q"):
+                parts.append((await search()).stamp)
+            parts.append(request.url.path)
+            parts.append(str(sorted(request.query_params.multi_items())))
+            if per_client:
+                parts.append(request.client.host)
+
+            etag = version_etag(parts)
+            if etag in if_none_match(request.headers.get("if-none-match", "")):
+                raise NotModified(etag)
+            response.headers["ETag"] = etag
+
+        return dependency
+
+
+async def not_modified_handler(request: Request, exc: NotModified) -> Response:
+    return Response(status_code=304, headers={"ETag": exc.etag})
@@ -0,0 +1,80 @@
+import csv
+import io
+import json
+import zlib
+from typing import AsyncIterator, Dict, List, Literal
+
+from fastapi.responses import StreamingResponse
+
+ExportFormat = Literal["csv", "ndjson"]
+
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+
+def _csv_value(value):
+    if isinstance(value, list):
+        return ",".join(str(item) for item in value)
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def _csv_lines(rows: List[Dict], columns: List[str], header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns)
+    for row in rows:
+        writer.writerow([_csv_value(row.get(column)) for column in columns])
+    return buffer.getvalue().encode()
+
+
+def _ndjson_lines(rows: List[Dict], columns: List[str]) -> bytes:
+    lines = (
+        json.dumps({column: row.get(column) for column in columns}, ensure_ascii=False)
+        for row in rows
+    )
+    return "".join(line + "\n" for line in lines).encode()
+
+
+async def serialize(
+    chunks: AsyncIterator[List[Dict]], fmt: ExportFormat, columns: List[str]
+) -> AsyncIterator[bytes]:
+    if fmt == "csv":
+        yield _csv_lines([], columns, header=True)
+    async for rows in chunks:
+        if fmt == "csv":
+            yield _csv_lines(rows, columns)
+        else:
+            yield _ndjson_lines(rows, columns)
+
+
+async def gzip_stream(stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    async for data in stream:
+        compressed = compressor.compress(data)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_response(
+    chunks: AsyncIterator[List[Dict]],
+    fmt: ExportFormat,
+    columns: List[str],
+    name: str,
+    gzip: bool = False,
+) -> StreamingResponse:
+    body = serialize(chunks, fmt, columns)
+    filename = f"{name}.{fmt}"
+    media_type = MEDIA_TYPES[fmt]
+    if gzip:
+        body = gzip_stream(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,50 @@
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from app.services.indexes import GameIndex
+
+FACET_FIELDS = ("genres", "platforms")
+
+
+class FacetState:
+    def __init__(self) -> None:
+        self.games: Dict[int, Dict[str, Tuple[str, ...]]] = {}
+        self.counts: Dict[str, Counter] = {field: Counter() for field in FACET_FIELDS}
+
+
+class FacetIndex(GameIndex):
+    columns = "id," + ",".join(FACET_FIELDS)
+
+    def _empty(self) -> FacetState:
+        return FacetState()
+
+    def values(self, field: str) -> List[str]:
+        return sorted(self._state.counts[field])
+
+    def counts(self, field: str) -> List[Tuple[str, int]]:
+        return sorted(
+            self._state.counts[field].items(), key=lambda item: (-item[1], item[0])
+        )
+
+    def _apply(self, state: FacetState, game_id: int, game: Optional[Dict]) -> None:
+        old = state.games.pop(game_id, None)
+        if old:
+            self._count(state, old, -1)
+        if game is not None:
+            new = {}
+            for field in FACET_FIELDS:
+                if field in game:
+                    new[field] = tuple(dict.fromkeys(game[field] or []))
+                else:
+                    new[field] = (old or {}).get(field, ())
+            state.games[game_id] = new
+            self._count(state, new, 1)
+
+    @staticmethod
+    def _count(state: FacetState, facets: Dict[str, Tuple[str, ...]], delta: int):
+        for field, values in facets.items():
+            counter = state.counts[field]
+            for value in values:
+                counter[value] += delta
+                if counter[value] <= 0:
+                    del counter[value]
@@ -0,0 +1,62 @@
+from typing import Dict, Iterable, List, Optional
+
+from fastapi import HTTPException
+
+
+class FieldSet:
+    def __init__(self, columns: List[str], embeds: Dict[str, List[str]]) -> None:
+        self.columns = columns
+        self.embeds = embeds
+
+    def select(self, *required: str) -> str:
+        columns = list(dict.fromkeys([*self.columns, *required]))
+        columns += [f"{name}({','.join(inner)})" for name, inner in self.embeds.items()]
+        return ",".join(columns)
+
+    def project(self, row: Dict, *extra: str) -> Dict:
+        keys = [*self.columns, *self.embeds, *extra]
+        return {key: row[key] for key in keys if key in row}
+
+
+def _split(raw: str) -> List[str]:
+    parts, depth, current = [], 0, ""
+    for char in raw:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+            continue
+        current += char
+    parts.append(current.strip())
+    return [part for part in parts if part]
+
+
+def parse_fields(
+    raw: Optional[str],
+    allowed: Iterable[str],
+    embeds: Optional[Dict[str, Iterable[str]]] = None,
+) -> Optional[FieldSet]:
+    if raw is None:
+        return None
+    allowed, embeds = set(allowed), {k: set(v) for k, v in (embeds or {}).items()}
+
+    columns, nested, unknown = ["id"], {}, []
+    for part in _split(raw):
+        name, _, inner = part.partition("(")
+        if name in allowed and not inner:
+            columns.append(name)
+        elif name in embeds and not inner:
+            nested[name] = ["*"]
+        elif name in embeds and inner.endswith(")"):
+            items = _split(inner[:-1])
+            unknown += [f"{name}.{item}" for item in items if item not in embeds[name]]
+            nested[name] = list(dict.fromkeys(["id", *items]))
+        else:
+            unknown.append(part)
+
+    if unknown:
+        raise HTTPException(400, f"Неизвестные поля: {', '.join(unknown)}")
+    return FieldSet(list(dict.fromkeys(columns)), nested)
@@ -0,0 +1,121 @@
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+from PIL import Image, ImageOps
+
+HEADER_SIZE = 12
+MAX_PIXELS = 40_000_000
+WEBP_QUALITY = 80
+
+VARIANT_WIDTHS = {"thumb": 160, "card": 480, "full": 1600}
+
+IMAGE_FORMATS: Dict[str, Tuple[str, str]] = {
+    "jpeg": ("jpg", "image/jpeg"),
+    "png": ("png", "image/png"),
+    "webp": ("webp", "image/webp"),
+}
+
+
+def sniff_image_format(header: bytes) -> Optional[str]:
+    if header.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Файл обложки слишком большой (максимум {max_bytes // 1024} КБ)",
+    )
+
+
+async def read_chunks(
+    upload: UploadFile, max_bytes: int, chunk_size: int
+) -> AsyncIterator[bytes]:
+    await upload.seek(0)
+    total = 0
+    while chunk := await upload.read(chunk_size):
+        total += len(chunk)
+        if total > max_bytes:
+            raise too_large(max_bytes)
+        yield chunk
+
+
+@asynccontextmanager
+async def saved_upload(
+    upload: UploadFile, max_bytes: int, chunk_size: int
+) -> AsyncIterator[Tuple[str, str, int]]:
+    file = tempfile.NamedTemporaryFile(prefix="cover-", delete=False)
+    try:
+        digest = hashlib.sha256()
+        size = 0
+        with file:
+            async for chunk in read_chunks(upload, max_bytes, chunk_size):
+                digest.update(chunk)
+                size += len(chunk)
+                file.write(chunk)
+        yield file.name, digest.hexdigest(), size
+    finally:
+        os.unlink(file.name)
+
+
+async def file_chunks(path: str, chunk_size: int) -> AsyncIterator[bytes]:
+    with open(path, "rb") as file:
+        while chunk := file.read(chunk_size):
+            yield chunk
+
+
+def render_variants(path: str) -> Dict[str, bytes]:
+    Image.MAX_IMAGE_PIXELS = MAX_PIXELS
+    with Image.open(path) as source:
+        image = ImageOps.exif_transpose(source)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+
+    variants = {}
+    for name, width in VARIANT_WIDTHS.items():
+        variant = image.copy()
+        variant.thumbnail((width, width * 4), Image.LANCZOS)
+        output = io.BytesIO()
+        variant.save(output, "WEBP", quality=WEBP_QUALITY, method=4)
+        variants[name] = output.getvalue()
+    return variants
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def start_pool(workers: int) -> None:
+    global _pool
+    shutdown_pool()
+    _pool = ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+async def build_variants(path: str) -> Dict[str, bytes]:
+    if _pool is None:
+        raise RuntimeError("Пул обработки изображений не запущен")
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_pool, render_variants, path)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        raise HTTPException(status_code=422, detail="Не удалось обработать изображение")
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+    _pool = None
@@ -0,0 +1,142 @@
+import csv
+import io
+import json
+from itertools import islice
+from typing import IO, Any, Dict, Iterator, List, Literal, Optional, Tuple
+
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import import_games_batch
+from app.schemas.game import GameCreate, GameImportError, GameImportReport
+
+ImportFormat = Literal["csv", "ndjson"]
+DuplicatePolicy = Literal["skip", "upsert", "fail"]
+
+LIST_FIELDS = ("genres", "platforms")
+EXTENSIONS = {"csv": "csv", "ndjson": "ndjson", "jsonl": "ndjson"}
+DUPLICATE_ERROR = "Игра с таким названием уже существует"
+
+Record = Tuple[int, Any]
+
+
+def detect_format(filename: Optional[str]) -> Optional[ImportFormat]:
+    if not filename or "." not in filename:
+        return None
+    return EXTENSIONS.get(filename.rsplit(".", 1)[-1].lower())
+
+
+def _csv_records(stream: IO[str]) -> Iterator[Record]:
+    reader = csv.DictReader(stream)
+    for row in reader:
+        record = {}
+        for key, value in row.items():
+            if key is None or not isinstance(value, str) or not value.strip():
+                continue
+            key, value = key.strip(), value.strip()
+            if key in LIST_FIELDS:
+                value = [x.strip() for x in value.split(",") if x.strip()]
+            record[key] = value
+        yield reader.line_num, record
+
+
+def _ndjson_records(stream: IO[str]) -> Iterator[Record]:
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError:
+            yield number, "Некорректный JSON"
+
+
+def read_records(file: IO[bytes], fmt: ImportFormat) -> Iterator[Record]:
+    stream = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        return _csv_records(stream)
+    return _ndjson_records(stream)
+
+
+def _messages(error: ValidationError) -> List[str]:
+    messages = []
+    for item in error.errors():
+        location = ".".join(str(part) for part in item["loc"])
+        messages.append(f"{location}: {item['msg']}" if location else item["msg"])
+    return messages
+
+
+def _fail(
+    report: GameImportReport, row: int, title: Optional[str], errors: List[str]
+) -> None:
+    report.failed += 1
+    if len(report.errors) < settings.IMPORT_MAX_ERRORS:
+        report.errors.append(GameImportError(row=row, title=title, errors=errors))
+
+
+async def _import_batch(
+    report: GameImportReport, batch: List[Record], on_duplicate: DuplicatePolicy
+) -> None:
+    games: Dict[str, Tuple[int, GameCreate]] = {}
+    for row, record in batch:
+        report.processed += 1
+        if isinstance(record, str):
+            _fail(report, row, None, [record])
+            continue
+
+        try:
+            game = GameCreate.model_validate(record)
+        except ValidationError as e:
+            title = record.get("title") if isinstance(record, dict) else None
+            _fail(report, row, title if isinstance(title, str) else None, _messages(e))
+            continue
+
+        if game.title in games:
+            if on_duplicate == "fail":
+                _fail(report, row, game.title, [DUPLICATE_ERROR])
+                report.aborted = True
+                return
+            report.skipped += 1
+            if on_duplicate == "skip":
+                continue
+        games[game.title] = (row, game)
+
+    if not games:
+        return
+
+    inserted, updated, existing = await import_games_batch(
+        [game for _, game in games.values()], on_duplicate
+    )
+    if existing and on_duplicate == "fail":
+        for title in existing:
+            _fail(report, games[title][0], title, [DUPLICATE_ERROR])
+        report.aborted = True
+        return
+
+    report.inserted += len(inserted)
+    report.updated += len(updated)
+    report.skipped += len(games) - len(inserted) - len(updated)
+
+
+async def import_games(
+    file: IO[bytes],
+    fmt: ImportFormat,
+    on_duplicate: DuplicatePolicy = "skip",
+    batch_size: Optional[int] = None,
+) -> GameImportReport:
+    report = GameImportReport()
+    records = read_records(file, fmt)
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+
+    while not report.aborted:
+        try:
+            batch = await run_in_threadpool(lambda: list(islice(records, batch_size)))
+        except (UnicodeDecodeError, csv.Error) as e:
+            _fail(report, 0, None, [f"Не удалось прочитать файл: {e}"])
+            report.aborted = True
+            break
+        if not batch:
+            break
+        await _import_batch(report, batch, on_duplicate)
+
+    return report
@@ -0,0 +1,98 @@
+import asyncio
+import secrets
+import time
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+Loader = Callable[[], AsyncIterator[List[Dict]]]
+
+
+class GameIndex(ABC):
+    columns = "id"
+
+    def __init__(self, ttl_seconds: int = 0) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.stamp = secrets.token_hex(4)
+        self._state = self._empty()
+        self._loaded_at: Optional[float] = None
+        self._pending: Optional[List[Tuple[int, Optional[Dict]]]] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @abstractmethod
+    def _empty(self) -> Any:
+        ...
+
+    @abstractmethod
+    def _apply(self, state: Any, game_id: int, game: Optional[Dict]) -> None:
+        ...
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def _is_fresh(self) -> bool:
+        if self._loaded_at is None:
+            return False
+        if self.ttl_seconds <= 0:
+            return True
+        return time.monotonic() - self._loaded_at < self.ttl_seconds
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def ensure_loaded(self, loader: Loader) -> None:
+        if self._is_fresh():
+            return
+        lock = self._get_lock()
+        if self.loaded and lock.locked():
+            return
+        async with lock:
+            if self._is_fresh():
+                return
+            self._pending = []
+            try:
+                rows: List[Dict] = []
+                async for chunk in loader():
+                    rows.extend(chunk)
+                state = await asyncio.to_thread(self._build, rows)
+                for game_id, game in self._pending:
+                    self._apply(state, game_id, game)
+            finally:
+                self._pending = None
+
+            self._state = state
+            self._loaded_at = time.monotonic()
+            self.stamp = secrets.token_hex(4)
+
+    def _build(self, rows: Iterable[Dict]) -> Any:
+        state = self._empty()
+        for row in rows:
+            self._apply(state, row["id"], row)
+        return state
+
+    def load_rows(self, rows: Iterable[Dict]) -> None:
+        self._state = self._build(rows)
+        self._loaded_at = time.monotonic()
+        self.stamp = secrets.token_hex(4)
+
+    def invalidate(self) -> None:
+        self._state = self._empty()
+        self._loaded_at = None
+        self.stamp = secrets.token_hex(4)
+
+    def upsert(self, game: Dict) -> None:
+        self._mutate(game["id"], game)
+
+    def discard(self, game_id: int) -> None:
+        self._mutate(game_id, None)
+
+    def _mutate(self, game_id: int, game: Optional[Dict]) -> None:
+        if self._pending is not None:
+            self._pending.append((game_id, game))
+        if self.loaded:
+            self._apply(self._state, game_id, game)
@@ -0,0 +1,74 @@
+import bisect
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.services.indexes import GameIndex
+
+
+def parse_timestamp(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+class LeaderboardState:
+    def __init__(self) -> None:
+        self.rows: Dict[int, Dict] = {}
+        self.order: List[Tuple[Any, int]] = []
+        self.exhaustive = True
+
+
+class Leaderboard(GameIndex):
+    columns = "*"
+
+    def __init__(
+        self,
+        column: str,
+        capacity: int,
+        key: Callable[[Any], Any] = float,
+        ttl_seconds: int = 0,
+    ) -> None:
+        super().__init__(ttl_seconds)
+        self.column = column
+        self.capacity = capacity
+        self._key = key
+
+    def _empty(self) -> LeaderboardState:
+        return LeaderboardState()
+
+    def _sort_key(self, row: Dict) -> Tuple[Any, int]:
+        return self._key(row[self.column]), row["id"]
+
+    def _apply(
+        self, state: LeaderboardState, game_id: int, game: Optional[Dict]
+    ) -> None:
+        old = state.rows.pop(game_id, None)
+        if old is not None:
+            state.order.remove(self._sort_key(old))
+        if game is None:
+            return
+
+        row = {**old, **game} if old else game
+        if row.get(self.column) is None:
+            return
+
+        key = self._sort_key(row)
+        if not state.exhaustive and (not state.order or key < state.order[0]):
+            return
+
+        bisect.insort(state.order, key)
+        state.rows[game_id] = row
+        if len(state.order) > self.capacity:
+            _, dropped = state.order.pop(0)
+            del state.rows[dropped]
+        if len(state.order) >= self.capacity:
+            state.exhaustive = False
+
+    def covers(self, limit: int) -> bool:
+        state = self._state
+        return state.exhaustive or len(state.order) >= min(limit, self.capacity)
+
+    def top(self, limit: int) -> List[Dict]:
+        state = self._state
+        keys = state.order[-limit:] if limit else []
+        return [state.rows[game_id] for _, game_id in reversed(keys)]
@@ -0,0 +1,243 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import httpx
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str]) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels, value: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + value
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labels, labels)} {value}"
+            for labels, value in sorted(self._values.items())
+        ]
+
+    def render(self) -> List[str]:
+        header = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        return header + self._samples()
+
+
+class Histogram(Counter):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labels: Sequence[str], buckets: Sequence[float]
+    ) -> None:
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Labels, List[float]] = {}
+
+    def observe(self, labels: Labels, value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 2)
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[position] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for labels, series in sorted(self._series.items()):
+            for bound, count in zip(self.buckets, series):
+                extra = f'le="{bound}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labels, labels, extra)} "
+                    f"{count}"
+                )
+            inf = _format_labels(self.labels, labels, 'le="+Inf"')
+            plain = _format_labels(self.labels, labels)
+            lines.append(f"{self.name}_bucket{inf} {series[-1]}")
+            lines.append(f"{self.name}_sum{plain} {series[-2]}")
+            lines.append(f"{self.name}_count{plain} {series[-1]}")
+        return lines
+
+
+ROUTE_LABELS = ("method", "route")
+
+requests_total = Counter(
+    "gamehub_http_requests_total",
+    "Число обработанных запросов",
+    ROUTE_LABELS + ("status",),
+)
+request_duration = Histogram(
+    "gamehub_http_request_duration_seconds",
+    "Время обработки запроса",
+    ROUTE_LABELS,
+    LATENCY_BUCKETS,
+)
+upstream_queries = Histogram(
+    "gamehub_upstream_queries_per_request",
+    "Число обращений к Supabase за один запрос",
+    ROUTE_LABELS,
+    QUERY_BUCKETS,
+)
+upstream_duration = Histogram(
+    "gamehub_upstream_duration_seconds",
+    "Суммарное время обращений к Supabase за один запрос",
+    ROUTE_LABELS,
+    LATENCY_BUCKETS,
+)
+serialize_duration = Histogram(
+    "gamehub_serialize_duration_seconds",
+    "Время сериализации ответа",
+    ROUTE_LABELS,
+    LATENCY_BUCKETS,
+)
+
+METRICS = [
+    requests_total,
+    request_duration,
+    upstream_queries,
+    upstream_duration,
+    serialize_duration,
+]
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class RequestTiming:
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.upstream_count = 0
+        self.upstream_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.queries: List[str] = []
+
+    def server_timing(self) -> str:
+        total = time.perf_counter() - self.started
+        handler = max(total - self.upstream_seconds - self.serialize_seconds, 0)
+        return ", ".join(
+            [
+                f"upstream;dur={self.upstream_seconds * 1000:.1f};"
+                f'desc="{self.upstream_count}"',
+                f"serialize;dur={self.serialize_seconds * 1000:.1f}",
+                f"handler;dur={handler * 1000:.1f}",
+                f"total;dur={total * 1000:.1f}",
+            ]
+        )
+
+
+RequestRecord = Tuple[str, str, RequestTiming]
+
+_timing: ContextVar[Optional[RequestTiming]] = ContextVar("timing", default=None)
+_recorders: List[List[RequestRecord]] = []
+
+
+@contextmanager
+def record_requests() -> Iterator[List[RequestRecord]]:
+    records: List[RequestRecord] = []
+    _recorders.append(records)
+    try:
+        yield records
+    finally:
+        _recorders.remove(records)
+
+
+class TimedTransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport: httpx.AsyncBaseTransport) -> None:
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        timing = _timing.get()
+        if timing is None:
+            return await self.transport.handle_async_request(request)
+
+        started = time.perf_counter()
+        try:
+            response = await self.transport.handle_async_request(request)
+            await response.aread()
+            return response
+        finally:
+            timing.upstream_count += 1
+            timing.upstream_seconds += time.perf_counter() - started
+            timing.queries.append(f"{request.method} {request.url.path}")
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class TimedJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        started = time.perf_counter()
+        body = to_json(content)
+        timing = _timing.get()
+        if timing is not None:
+            timing.serialize_seconds += time.perf_counter() - started
+        return body
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = _timing.set(timing)
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", timing.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timing.reset(token)
+            route = scope.get("route")
+            labels = (scope["method"], getattr(route, "path", "unmatched"))
+            requests_total.inc(labels + (str(status),))
+            request_duration.observe(labels, time.perf_counter() - timing.started)
+            upstream_queries.observe(labels, timing.upstream_count)
+            upstream_duration.observe(labels, timing.upstream_seconds)
+            serialize_duration.observe(labels, timing.serialize_seconds)
+            for records in _recorders:
+                records.append(labels + (timing,))
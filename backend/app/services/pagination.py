@@ -0,0 +1,45 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+Keyset = Tuple[Any, int]
+
+NUMERIC_COLUMNS = {"average_rating", "rating"}
+DATETIME_COLUMNS = {"created_at"}
+
+
+def encode_cursor(sort: str, column: Optional[str], row: Dict) -> str:
+    value = row.get(column) if column else None
+    payload = json.dumps([sort, value, row["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _valid_value(column: Optional[str], value: Any) -> bool:
+    if column is None:
+        return value is None
+    if column in NUMERIC_COLUMNS:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if not isinstance(value, str):
+        return False
+    if column in DATETIME_COLUMNS:
+        datetime.fromisoformat(value)
+    return True
+
+
+def decode_cursor(cursor: str, sort: str, column: Optional[str]) -> Keyset:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if (
+            cursor_sort != sort
+            or not isinstance(row_id, int)
+            or isinstance(row_id, bool)
+            or not _valid_value(column, value)
+        ):
+            raise ValueError
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+    return value, row_id
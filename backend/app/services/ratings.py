@@ -0,0 +1,68 @@
+from typing import Dict, List, Optional
+
+
+class RatingDelta:
+    def __init__(self, game_id: int) -> None:
+        self.game_id = game_id
+        self.sum = 0
+        self.count = 0
+        self.histogram = [0] * 10
+
+    def add(self, old_rating: Optional[int], new_rating: Optional[int]) -> None:
+        if old_rating is not None:
+            self.sum -= old_rating
+            self.count -= 1
+            self.histogram[old_rating - 1] -= 1
+        if new_rating is not None:
+            self.sum += new_rating
+            self.count += 1
+            self.histogram[new_rating - 1] += 1
+
+    def merge(self, other: "RatingDelta") -> None:
+        self.sum += other.sum
+        self.count += other.count
+        self.histogram = [a + b for a, b in zip(self.histogram, other.histogram)]
+
+    @property
+    def empty(self) -> bool:
+        return not any(self.histogram)
+
+    def payload(self) -> Dict:
+        return {
+            "game_id": self.game_id,
+            "sum": self.sum,
+            "count": self.count,
+            "histogram": self.histogram,
+        }
+
+
+class RatingBuffer:
+    def __init__(self) -> None:
+        self._pending: Dict[int, RatingDelta] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def mark(
+        self, game_id: int, old_rating: Optional[int], new_rating: Optional[int]
+    ) -> None:
+        if old_rating == new_rating:
+            return
+        delta = self._pending.get(game_id)
+        if delta is None:
+            delta = self._pending[game_id] = RatingDelta(game_id)
+        delta.add(old_rating, new_rating)
+        if delta.empty:
+            del self._pending[game_id]
+
+    def drain(self) -> List[RatingDelta]:
+        deltas = list(self._pending.values())
+        self._pending.clear()
+        return deltas
+
+    def restore(self, deltas: List[RatingDelta]) -> None:
+        for delta in deltas:
+            pending = self._pending.setdefault(
+                delta.game_id, RatingDelta(delta.game_id)
+            )
+            pending.merge(delta)
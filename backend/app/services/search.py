@@ -0,0 +1,193 @@
+import bisect
+import heapq
+import math
+import re
+import time
+from array import array
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.services.indexes import GameIndex
+
+FIELD_WEIGHTS = {"title": 6, "developer": 4, "description": 1}
+MAX_TERM_FREQUENCY = 5
+MAX_EXPANSIONS = 5
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    return TOKEN_RE.findall(text.casefold().replace("ё", "е"))
+
+
+def trigrams(token: str) -> Set[str]:
+    padded = f"  {token} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class Postings:
+    __slots__ = ("ids", "weights")
+
+    def __init__(self) -> None:
+        self.ids = array("q")
+        self.weights = array("H")
+
+    def add(self, game_id: int, weight: int) -> None:
+        if not self.ids or game_id > self.ids[-1]:
+            self.ids.append(game_id)
+            self.weights.append(weight)
+            return
+        position = bisect.bisect_left(self.ids, game_id)
+        self.ids.insert(position, game_id)
+        self.weights.insert(position, weight)
+
+    def remove(self, game_id: int) -> None:
+        position = bisect.bisect_left(self.ids, game_id)
+        if position < len(self.ids) and self.ids[position] == game_id:
+            del self.ids[position]
+            del self.weights[position]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+class SearchState:
+    def __init__(self) -> None:
+        self.documents: Dict[int, Dict[str, Tuple[str, ...]]] = {}
+        self.postings: Dict[str, Postings] = {}
+        self.trigrams: Dict[str, Set[str]] = {}
+
+
+class SearchIndex(GameIndex):
+    columns = "id," + ",".join(FIELD_WEIGHTS)
+
+    def __init__(
+        self,
+        ttl_seconds: int = 0,
+        time_budget_ms: int = 50,
+        max_results: int = 1000,
+        min_similarity: float = 0.3,
+    ) -> None:
+        super().__init__(ttl_seconds)
+        self.time_budget_ms = time_budget_ms
+        self.max_results = max_results
+        self.min_similarity = min_similarity
+
+    def _empty(self) -> SearchState:
+        return SearchState()
+
+    def __len__(self) -> int:
+        return len(self._state.documents)
+
+    def _apply(self, state: SearchState, game_id: int, game: Optional[Dict]) -> None:
+        old = state.documents.pop(game_id, None)
+        if old:
+            for token in self._weigh(old):
+                postings = state.postings[token]
+                postings.remove(game_id)
+                if not postings:
+                    del state.postings[token]
+                    self._forget_term(state, token)
+
+        if game is None:
+            return
+
+        fields = {}
+        for field in FIELD_WEIGHTS:
+            if field in game:
+                fields[field] = tuple(tokenize(game[field]))
+            else:
+                fields[field] = (old or {}).get(field, ())
+        state.documents[game_id] = fields
+
+        for token, weight in self._weigh(fields).items():
+            postings = state.postings.get(token)
+            if postings is None:
+                postings = state.postings[token] = Postings()
+                for gram in trigrams(token):
+                    state.trigrams.setdefault(gram, set()).add(token)
+            postings.add(game_id, weight)
+
+    @staticmethod
+    def _forget_term(state: SearchState, token: str) -> None:
+        for gram in trigrams(token):
+            terms = state.trigrams.get(gram)
+            if terms is None:
+                continue
+            terms.discard(token)
+            if not terms:
+                del state.trigrams[gram]
+
+    @staticmethod
+    def _weigh(fields: Dict[str, Tuple[str, ...]]) -> Dict[str, int]:
+        weights: Dict[str, int] = {}
+        for field, tokens in fields.items():
+            for token, frequency in Counter(tokens).items():
+                weights[token] = weights.get(token, 0) + FIELD_WEIGHTS[field] * min(
+                    frequency, MAX_TERM_FREQUENCY
+                )
+        return weights
+
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        state = self._state
+        expansions = []
+        if token in state.postings:
+            expansions.append((token, 1.0))
+        if len(token) < 3:
+            return expansions
+
+        query_grams = trigrams(token)
+        shared: Counter = Counter()
+        for gram in query_grams:
+            shared.update(state.trigrams.get(gram, ()))
+
+        candidates = []
+        for candidate, common in shared.items():
+            if candidate == token:
+                continue
+            similarity = common / (len(query_grams) + len(candidate) + 2 - common)
+            if similarity >= self.min_similarity:
+                candidates.append((similarity, candidate))
+
+        for similarity, candidate in heapq.nlargest(MAX_EXPANSIONS, candidates):
+            expansions.append((candidate, similarity))
+        return expansions
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[int]:
+        deadline = time.perf_counter() + self.time_budget_ms / 1000
+        state = self._state
+        total = len(state.documents)
+        query_tokens = list(dict.fromkeys(tokenize(query)))
+        if not query_tokens or not total:
+            return []
+
+        terms = []
+        for position, token in enumerate(query_tokens):
+            for term, similarity in self._expand(token):
+                terms.append((len(state.postings[term]), term, similarity, position))
+        terms.sort()
+
+        scores: Dict[int, float] = {}
+        matched: Dict[int, int] = {}
+        for document_frequency, term, similarity, position in terms:
+            if scores and time.perf_counter() > deadline:
+                break
+            postings = state.postings[term]
+            idf = math.log(1 + total / document_frequency)
+            factor = similarity * idf
+            bit = 1 << position
+            for game_id, weight in zip(postings.ids, postings.weights):
+                scores[game_id] = scores.get(game_id, 0.0) + factor * weight
+                matched[game_id] = matched.get(game_id, 0) | bit
+
+        query_size = len(query_tokens)
+        return heapq.nlargest(
+            limit or self.max_results,
+            scores,
+            key=lambda game_id: (
+                scores[game_id] * (bin(matched[game_id]).count("1") / query_size) ** 2,
+                -game_id,
+            ),
+        )
@@ -0,0 +1,50 @@
+import asyncio
+import copy
+import functools
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+class Flight:
+    def __init__(self, task: asyncio.Future) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._flights: Dict[Hashable, Flight] = {}
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = Flight(asyncio.ensure_future(call()))
+            flight.task.add_done_callback(lambda _: self._discard(key, flight))
+        flight.waiters += 1
+
+        result = await asyncio.shield(flight.task)
+        return copy.deepcopy(result) if flight.waiters > 1 else result
+
+    def _discard(self, key: Hashable, flight: Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def forget(self) -> None:
+        self._flights.clear()
+
+
+flights = SingleFlight()
+
+
+def coalesce(method: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    @functools.wraps(method)
+    async def wrapper(self: Any, *args: Any, **kwargs: Any) -> T:
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return await method(self, *args, **kwargs)
+        key = (id(self), method.__qualname__, args, tuple(sorted(kwargs.items())))
+        return await flights.do(key, lambda: method(self, *args, **kwargs))
+
+    return wrapper
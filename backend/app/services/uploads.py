@@ -0,0 +1,28 @@
+import re
+
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.services.images import too_large
+
+MULTIPART_OVERHEAD = 16 * 1024
+
+
+class UploadLimitMiddleware:
+    def __init__(self, app: ASGIApp, path: str) -> None:
+        self.app = app
+        self.path = re.compile(path)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and self.path.fullmatch(scope["path"]):
+            max_bytes = settings.COVER_MAX_BYTES
+            length = Headers(scope=scope).get("content-length", "")
+            if length.isdigit() and int(length) > max_bytes + MULTIPART_OVERHEAD:
+                response = JSONResponse(
+                    {"detail": too_large(max_bytes).detail}, status_code=413
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
@@ -0,0 +1,117 @@
+"""Пропускная способность одного воркера при медленном upstream.
+
+Запуск из каталога backend:
+
+    poetry run python -m benchmarks.concurrency --latency 0.02 --concurrency 50
+
+Upstream подменяется httpx.MockTransport с фиксированной задержкой. В режиме
+``blocking`` задержка выполняется через ``time.sleep`` прямо в event loop —
+так вёл себя синхронный клиент Supabase; в режиме ``async`` — через
+``asyncio.sleep``, как текущий асинхронный слой доступа к данным.
+
+Все запросы одинаковые (``GET /games/1``), поэтому объединение одинаковых
+чтений здесь отключено (``SINGLE_FLIGHT_ENABLED=false``): иначе они
+сливаются в один запрос к upstream и разница между режимами пропадает.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+os.environ.setdefault("SUPABASE_URL", "http://upstream.local")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+os.environ["SINGLE_FLIGHT_ENABLED"] = "false"
+
+import httpx  # noqa: E402
+
+from app.core.database import db  # noqa: E402
+from app.main import app  # noqa: E402
+
+GAME = {
+    "id": 1,
+    "title": "Benchmark Game",
+    "description": None,
+    "genres": ["RPG"],
+    "developer": None,
+    "publisher": None,
+    "release_year": 2024,
+    "platforms": ["PC"],
+    "cover_image_path": None,
+    "average_rating": 8.5,
+    "created_at": "2024-01-01T00:00:00+00:00",
+}
+
+
+def upstream_response(request: httpx.Request) -> httpx.Response:
+    if request.url.path.endswith("/reviews"):
+        return httpx.Response(200, json=[], headers={"Content-Range": "*/42"})
+    if "vnd.pgrst.object" in request.headers.get("accept", ""):
+        return httpx.Response(200, json=GAME)
+    return httpx.Response(200, json=[GAME], headers={"Content-Range": "0-0/1"})
+
+
+def make_transport(mode: str, latency: float) -> httpx.MockTransport:
+    if mode == "blocking":
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            time.sleep(latency)
+            return upstream_response(request)
+
+    else:
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            await asyncio.sleep(latency)
+            return upstream_response(request)
+
+    return httpx.MockTransport(handler)
+
+
+async def run(mode: str, latency: float, concurrency: int, requests: int) -> dict:
+    await db.disconnect()
+    db.connect(transport=make_transport(mode, latency))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        queue = asyncio.Queue()
+        for _ in range(requests):
+            queue.put_nowait("/api/v1/games/1")
+
+        async def worker() -> None:
+            while not queue.empty():
+                path = queue.get_nowait()
+                response = await client.get(path)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    await db.disconnect()
+    return {
+        "mode": mode,
+        "requests": requests,
+        "concurrency": concurrency,
+        "upstream_latency_ms": latency * 1000,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(requests / elapsed, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    results = [
+        asyncio.run(run(mode, args.latency, args.concurrency, args.requests))
+        for mode in ("blocking", "async")
+    ]
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""Нагрузочный замер эндпоинтов на хранилище в памяти.
+
+Запуск из каталога backend:
+
+    poetry run python -m benchmarks.endpoints --games 100000 --output base.json
+    poetry run python -m benchmarks.endpoints --games 100000 --baseline base.json
+
+Каталог из ``--games`` игр с рецензиями по закону Ципфа (у популярных игр их
+тысячи, у большинства — ни одной) загружается в ``DATA_BACKEND=memory``.
+Запросы идут через настоящее FastAPI-приложение; каждый вызов upstream
+задерживается на ``--upstream-latency`` секунд, чтобы сетевой round trip
+учитывался. Для каждого сценария печатаются p50/p95/p99, пропускная
+способность и число обращений к upstream на запрос. С ``--baseline``
+добавляется изменение относительно прошлого прогона в процентах.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("DATA_BACKEND", "memory")
+os.environ.setdefault("COVER_SWEEP_INTERVAL_SECONDS", "0")
+
+import httpx  # noqa: E402
+
+from app.core.database import db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.repositories import MemoryBackend  # noqa: E402
+from benchmarks.search import percentile  # noqa: E402
+
+GENRES = ["RPG", "Action", "Shooter", "Strategy", "Indie", "Puzzle", "Racing"]
+PLATFORMS = ["PC", "PS5", "PS4", "Xbox Series X", "Switch"]
+SCENARIOS = ["games_list", "game_detail", "games_top", "game_reviews", "review_write"]
+METRICS = ["p50_ms", "p95_ms", "p99_ms", "rps", "upstream_per_request"]
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class LatencyBackend(MemoryBackend):
+    def __init__(self, latency: float) -> None:
+        super().__init__()
+        self.latency = latency
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return await super().__call__(request)
+
+
+def zipf_weights(count: int, skew: float) -> list[float]:
+    return [1 / rank**skew for rank in range(1, count + 1)]
+
+
+def seed_catalog(
+    backend: MemoryBackend, games: int, reviews: int, skew: float, rng: random.Random
+) -> list[float]:
+    weights = zipf_weights(games, skew)
+    rng.shuffle(weights)
+    scale = reviews / sum(weights)
+
+    game_rows, review_rows = [], []
+    for game_id, weight in enumerate(weights, 1):
+        histogram = [0] * 10
+        for _ in range(int(weight * scale)):
+            rating = min(10, max(1, round(rng.gauss(7, 2))))
+            histogram[rating - 1] += 1
+            review_rows.append(
+                {
+                    "id": len(review_rows) + 1,
+                    "game_id": game_id,
+                    "rating": rating,
+                    "text": "Сгенерированная рецензия для замера",
+                    "ip_address": f"10.{len(review_rows) % 250}.0.1",
+                    "created_at": (
+                        EPOCH + timedelta(minutes=len(review_rows))
+                    ).isoformat(),
+                }
+            )
+        count = sum(histogram)
+        total = sum(rating * n for rating, n in enumerate(histogram, 1))
+        game_rows.append(
+            {
+                "id": game_id,
+                "title": f"Benchmark Game {game_id}",
+                "genres": rng.sample(GENRES, 2),
+                "developer": f"Studio {game_id % 500}",
+                "release_year": rng.randint(1990, 2025),
+                "platforms": rng.sample(PLATFORMS, 2),
+                "rating_sum": total,
+                "rating_count": count,
+                "rating_histogram": histogram,
+                "average_rating": round(total / count, 1) if count else 0,
+                "created_at": (EPOCH + timedelta(seconds=game_id)).isoformat(),
+            }
+        )
+
+    backend.seed("games", game_rows)
+    backend.seed("reviews", review_rows)
+    return list(itertools.accumulate(weights))
+
+
+class Traffic:
+    def __init__(self, games: int, cum_weights: list[float], seed: int) -> None:
+        self.games = games
+        self.cum_weights = cum_weights
+        self.rng = random.Random(seed)
+        self.reviewed: dict[str, set[int]] = {}
+        self.own: dict[str, list[int]] = {}
+
+    def game_id(self) -> int:
+        games = range(1, self.games + 1)
+        return self.rng.choices(games, cum_weights=self.cum_weights)[0]
+
+    async def request(self, client: httpx.AsyncClient, scenario: str, ip: str):
+        if scenario == "games_list":
+            page = min(self.rng.paretovariate(1.5), 50)
+            sort = self.rng.choice(["id", "rating", "created_at"])
+            return await client.get(
+                f"/api/v1/games?page={int(page)}&page_size=20&sort={sort}"
+            )
+        if scenario == "game_detail":
+            return await client.get(f"/api/v1/games/{self.game_id()}")
+        if scenario == "games_top":
+            return await client.get("/api/v1/games/top?limit=10")
+        if scenario == "game_reviews":
+            sort = self.rng.choice(["newest", "highest", "lowest"])
+            return await client.get(
+                f"/api/v1/reviews/game/{self.game_id()}?page_size=20&sort={sort}"
+            )
+        return await self.write(client, ip)
+
+    async def write(self, client: httpx.AsyncClient, ip: str):
+        own = self.own.setdefault(ip, [])
+        if own and self.rng.random() < 0.5:
+            review_id = self.rng.choice(own)
+            return await client.patch(
+                f"/api/v1/reviews/{review_id}",
+                json={"rating": self.rng.randint(1, 10)},
+            )
+
+        reviewed = self.reviewed.setdefault(ip, set())
+        game_id = self.game_id()
+        while game_id in reviewed:
+            game_id = self.game_id()
+        reviewed.add(game_id)
+        response = await client.post(
+            "/api/v1/reviews",
+            json={
+                "game_id": game_id,
+                "rating": self.rng.randint(1, 10),
+                "text": "Рецензия, написанная во время замера",
+            },
+        )
+        if response.status_code == 201:
+            own.append(response.json()["id"])
+        return response
+
+
+async def run_scenario(
+    scenario: str,
+    traffic: Traffic,
+    backend: MemoryBackend,
+    concurrency: int,
+    requests: int,
+) -> dict:
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(scenario)
+    latencies, errors = [], 0
+
+    async def worker(number: int) -> None:
+        nonlocal errors
+        ip = f"192.168.{number // 250}.{number % 250 + 1}"
+        transport = httpx.ASGITransport(app=app, client=(ip, 50000))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+            while not queue.empty():
+                queue.get_nowait()
+                started = time.perf_counter()
+                response = await traffic.request(c, scenario, ip)
+                latencies.append((time.perf_counter() - started) * 1000)
+                if response.status_code >= 400:
+                    errors += 1
+
+    calls = backend.call_count
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(number) for number in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    calls = backend.call_count - calls
+
+    return {
+        "requests": requests,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "max_ms": round(max(latencies), 2),
+        "upstream_calls": calls,
+        "upstream_per_request": round(calls / requests, 2),
+    }
+
+
+def compare(current: dict, baseline: dict) -> dict:
+    deltas = {}
+    for scenario, result in current.items():
+        before = baseline.get(scenario)
+        if not before:
+            continue
+        deltas[scenario] = {
+            metric: round((result[metric] - before[metric]) / before[metric] * 100, 1)
+            for metric in METRICS
+            if before.get(metric)
+        }
+    return deltas
+
+
+async def run(args: argparse.Namespace) -> dict:
+    rng = random.Random(args.seed)
+    backend = LatencyBackend(args.upstream_latency)
+
+    started = time.perf_counter()
+    cum_weights = seed_catalog(backend, args.games, args.reviews, args.skew, rng)
+    seed_s = time.perf_counter() - started
+
+    await db.disconnect()
+    db.backend = backend
+    started = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        startup_s = time.perf_counter() - started
+        traffic = Traffic(args.games, cum_weights, args.seed)
+        results = {}
+        for scenario in args.scenarios:
+            results[scenario] = await run_scenario(
+                scenario, traffic, backend, args.concurrency, args.requests
+            )
+
+    return {
+        "config": {
+            "games": args.games,
+            "reviews": len(backend.tables["reviews"]),
+            "skew": args.skew,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "upstream_latency_ms": args.upstream_latency * 1000,
+            "seed": args.seed,
+        },
+        "seed_s": round(seed_s, 2),
+        "startup_s": round(startup_s, 2),
+        "scenarios": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--reviews", type=int, help="по умолчанию 3 на игру")
+    parser.add_argument("--skew", type=float, default=1.1)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--upstream-latency", type=float, default=0.005)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    args = parser.parse_args()
+    if args.reviews is None:
+        args.reviews = args.games * 3
+
+    report = asyncio.run(run(args))
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        report["delta_pct"] = compare(report["scenarios"], baseline["scenarios"])
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Латентность поиска по синтетическому каталогу.
+
+Запуск из каталога backend:
+
+    poetry run python -m benchmarks.search --games 100000 --queries 500
+"""
+
+import argparse
+import json
+import random
+import statistics
+import string
+import time
+
+from app.services.search import SearchIndex
+
+
+def make_words(count: int, rng: random.Random) -> list[str]:
+    return [
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10)))
+        for _ in range(count)
+    ]
+
+
+WORDS = make_words(20000, random.Random(0))
+
+
+def make_game(game_id: int, rng: random.Random) -> dict:
+    return {
+        "id": game_id,
+        "title": " ".join(rng.choices(WORDS[:5000], k=rng.randint(1, 4))),
+        "developer": " ".join(rng.choices(WORDS[:2000], k=2)),
+        "description": " ".join(rng.choices(WORDS, k=rng.randint(20, 120))),
+    }
+
+
+def typo(word: str, rng: random.Random) -> str:
+    if len(word) < 4:
+        return word
+    position = rng.randrange(len(word))
+    return word[:position] + word[position + 1 :]
+
+
+def percentile(samples: list[float], value: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * value))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--budget-ms", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    index = SearchIndex(time_budget_ms=args.budget_ms)
+    games = [make_game(game_id, rng) for game_id in range(1, args.games + 1)]
+
+    started = time.perf_counter()
+    index.load_rows(games)
+    build_s = time.perf_counter() - started
+
+    latencies = []
+    for _ in range(args.queries):
+        game = rng.choice(games)
+        words = game["title"].split()[:2]
+        query = " ".join(typo(word, rng) for word in words)
+        started = time.perf_counter()
+        index.search(query)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    print(
+        json.dumps(
+            {
+                "games": args.games,
+                "build_s": round(build_s, 2),
+                "budget_ms": args.budget_ms,
+                "p50_ms": round(statistics.median(latencies), 2),
+                "p95_ms": round(percentile(latencies, 0.95), 2),
+                "p99_ms": round(percentile(latencies, 0.99), 2),
+                "max_ms": round(max(latencies), 2),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
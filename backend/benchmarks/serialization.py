@@ -0,0 +1,131 @@
+"""Сериализация и размер ответов списочных эндпоинтов.
+
+Запуск из каталога backend:
+
+    poetry run python -m benchmarks.serialization --games 5000 --requests 200
+
+Для каждого маршрута сравниваются три режима: ``stdlib`` — прежний
+``json.dumps`` без сжатия, ``to_json`` — сериализация pydantic-core без
+сжатия и ``to_json+gzip`` — она же с ``Accept-Encoding: gzip``. Печатаются
+медианы времени сериализации (из ``Server-Timing``) и полного ответа, а также
+число байт, переданных клиенту.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+from contextlib import nullcontext
+from unittest.mock import patch
+
+os.environ.setdefault("DATA_BACKEND", "memory")
+os.environ.setdefault("COVER_SWEEP_INTERVAL_SECONDS", "0")
+
+import httpx  # noqa: E402
+
+from app.core.database import db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.repositories import MemoryBackend  # noqa: E402
+from benchmarks.endpoints import seed_catalog  # noqa: E402
+
+MODES = {
+    "stdlib": ("identity", True),
+    "to_json": ("identity", False),
+    "to_json+gzip": ("gzip", False),
+}
+
+
+def stdlib_dumps(content) -> bytes:
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def server_timing(header: str, name: str) -> float:
+    for part in header.split(","):
+        metric, _, params = part.strip().partition(";")
+        if metric == name:
+            return float(params.partition("dur=")[2].partition(";")[0])
+    return 0.0
+
+
+async def measure(client: httpx.AsyncClient, path: str, mode: str, requests: int):
+    encoding, stdlib = MODES[mode]
+    serialize, total, sizes = [], [], []
+    renderer = patch("app.services.metrics.to_json", stdlib_dumps)
+    with renderer if stdlib else nullcontext():
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = await client.get(path, headers={"Accept-Encoding": encoding})
+            total.append((time.perf_counter() - started) * 1000)
+            response.raise_for_status()
+            serialize.append(
+                server_timing(response.headers["Server-Timing"], "serialize")
+            )
+            sizes.append(response.num_bytes_downloaded)
+
+    return {
+        "serialize_p50_ms": round(statistics.median(serialize), 3),
+        "total_p50_ms": round(statistics.median(total), 2),
+        "bytes": round(statistics.mean(sizes)),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    rng = random.Random(args.seed)
+    backend = MemoryBackend()
+    seed_catalog(backend, args.games, args.games * 3, 1.1, rng)
+    description = "Подробное описание игры для замера размера ответа. "
+    for game in backend.tables["games"]:
+        game["description"] = description * (
+            args.description_length // len(description)
+        )
+    top_game = max(backend.tables["games"], key=lambda game: game["rating_count"])
+
+    page = f"page_size={args.page_size}"
+    routes = {
+        "games_list": f"/api/v1/games?{page}",
+        "reviews_list": f"/api/v1/reviews?{page}",
+        "game_reviews": f"/api/v1/reviews/game/{top_game['id']}?{page}",
+    }
+
+    await db.disconnect()
+    db.backend = backend
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+            for route, path in routes.items():
+                results[route] = {
+                    mode: await measure(c, path, mode, args.requests) for mode in MODES
+                }
+
+    return {
+        "config": {
+            "games": args.games,
+            "page_size": args.page_size,
+            "description_length": args.description_length,
+            "requests": args.requests,
+        },
+        "routes": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--description-length", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+-- Running rating aggregates on games, maintained with O(1) deltas on review writes.
+
+alter table games
+    add column if not exists rating_sum bigint not null default 0,
+    add column if not exists rating_count integer not null default 0;
+
+create or replace function apply_rating_delta(
+    p_game_id bigint,
+    p_old_rating integer default null,
+    p_new_rating integer default null
+)
+returns setof games
+language sql
+as $$
+    update games
+    set rating_sum = rating_sum
+            + coalesce(p_new_rating, 0) - coalesce(p_old_rating, 0),
+        rating_count = rating_count
+            + (p_new_rating is not null)::int - (p_old_rating is not null)::int,
+        average_rating = case
+            when rating_count
+                + (p_new_rating is not null)::int
+                - (p_old_rating is not null)::int > 0
+            then round(
+                (rating_sum + coalesce(p_new_rating, 0) - coalesce(p_old_rating, 0))::numeric
+                / (rating_count
+                    + (p_new_rating is not null)::int
+                    - (p_old_rating is not null)::int),
+                1
+            )
+            else 0
+        end
+    where id = p_game_id
+    returning *;
+$$;
+
+create or replace function reconcile_game_ratings(p_dry_run boolean default false)
+returns table (
+    game_id bigint,
+    old_sum bigint,
+    old_count integer,
+    new_sum bigint,
+    new_count integer
+)
+language sql
+as $$
+    with actual as (
+        select g.id,
+               coalesce(sum(r.rating), 0)::bigint as rating_sum,
+               count(r.id)::integer as rating_count
+        from games g
+        left join reviews r on r.game_id = g.id
+        group by g.id
+    ),
+    drifted as (
+        select g.id,
+               g.rating_sum as old_sum,
+               g.rating_count as old_count,
+               a.rating_sum as new_sum,
+               a.rating_count as new_count
+        from games g
+        join actual a on a.id = g.id
+        where g.rating_sum <> a.rating_sum or g.rating_count <> a.rating_count
+    ),
+    fixed as (
+        update games g
+        set rating_sum = d.new_sum,
+            rating_count = d.new_count,
+            average_rating = case
+                when d.new_count > 0
+                then round(d.new_sum::numeric / d.new_count, 1)
+                else 0
+            end
+        from drifted d
+        where g.id = d.id and not p_dry_run
+        returning g.id
+    )
+    select d.id, d.old_sum, d.old_count, d.new_sum, d.new_count
+    from drifted d;
+$$;
+
+select * from reconcile_game_ratings();
@@ -0,0 +1,3 @@
+-- Bulk import upserts on title (on_conflict=title), which needs a unique index.
+
+create unique index if not exists games_title_key on games (title);
@@ -0,0 +1,112 @@
+-- Per-game 1..10 rating histogram, maintained by apply_rating_delta alongside
+-- rating_sum / rating_count so the reviews page never counts reviews itself.
+
+alter table games
+    add column if not exists rating_histogram integer[] not null
+        default '{0,0,0,0,0,0,0,0,0,0}';
+
+create index if not exists reviews_game_created_idx
+    on reviews (game_id, created_at desc, id desc);
+create index if not exists reviews_game_rating_idx
+    on reviews (game_id, rating desc, id desc);
+
+create or replace function apply_rating_delta(
+    p_game_id bigint,
+    p_old_rating integer default null,
+    p_new_rating integer default null
+)
+returns setof games
+language sql
+as $$
+    update games
+    set rating_sum = rating_sum
+            + coalesce(p_new_rating, 0) - coalesce(p_old_rating, 0),
+        rating_count = rating_count
+            + (p_new_rating is not null)::int - (p_old_rating is not null)::int,
+        rating_histogram = array(
+            select h.n
+                + (h.i is not distinct from p_new_rating)::int
+                - (h.i is not distinct from p_old_rating)::int
+            from unnest(rating_histogram) with ordinality as h(n, i)
+            order by h.i
+        ),
+        average_rating = case
+            when rating_count
+                + (p_new_rating is not null)::int
+                - (p_old_rating is not null)::int > 0
+            then round(
+                (rating_sum + coalesce(p_new_rating, 0) - coalesce(p_old_rating, 0))::numeric
+                / (rating_count
+                    + (p_new_rating is not null)::int
+                    - (p_old_rating is not null)::int),
+                1
+            )
+            else 0
+        end
+    where id = p_game_id
+    returning *;
+$$;
+
+drop function if exists reconcile_game_ratings(boolean);
+
+create function reconcile_game_ratings(p_dry_run boolean default false)
+returns table (
+    game_id bigint,
+    old_sum bigint,
+    old_count integer,
+    new_sum bigint,
+    new_count integer,
+    old_histogram integer[],
+    new_histogram integer[]
+)
+language sql
+as $$
+    with actual as (
+        select g.id,
+               coalesce(sum(r.rating), 0)::bigint as rating_sum,
+               count(r.id)::integer as rating_count,
+               array(
+                   select count(r2.id)::integer
+                   from generate_series(1, 10) as s(i)
+                   left join reviews r2 on r2.game_id = g.id and r2.rating = s.i
+                   group by s.i
+                   order by s.i
+               ) as rating_histogram
+        from games g
+        left join reviews r on r.game_id = g.id
+        group by g.id
+    ),
+    drifted as (
+        select g.id,
+               g.rating_sum as old_sum,
+               g.rating_count as old_count,
+               a.rating_sum as new_sum,
+               a.rating_count as new_count,
+               g.rating_histogram as old_histogram,
+               a.rating_histogram as new_histogram
+        from games g
+        join actual a on a.id = g.id
+        where g.rating_sum <> a.rating_sum
+           or g.rating_count <> a.rating_count
+           or g.rating_histogram <> a.rating_histogram
+    ),
+    fixed as (
+        update games g
+        set rating_sum = d.new_sum,
+            rating_count = d.new_count,
+            rating_histogram = d.new_histogram,
+            average_rating = case
+                when d.new_count > 0
+                then round(d.new_sum::numeric / d.new_count, 1)
+                else 0
+            end
+        from drifted d
+        where g.id = d.id and not p_dry_run
+        returning g.id
+    )
+    select d.id, d.old_sum, d.old_count, d.new_sum, d.new_count,
+           d.old_histogram, d.new_histogram
+    from drifted d;
+$$;
+
+select * from reconcile_game_ratings();
@@ -0,0 +1,4 @@
+-- Public URLs of the resized WebP cover variants (thumb, card, full).
+
+alter table games
+    add column if not exists cover_variants jsonb;
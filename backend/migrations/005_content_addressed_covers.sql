@@ -0,0 +1,40 @@
+-- Covers are stored once per sha256 of the original bytes. games.cover_hash is
+-- the per-game reference; cover_objects lists what exists in the bucket so the
+-- sweeper can delete objects no game points at any more.
+
+alter table games
+    add column if not exists cover_hash text;
+
+create index if not exists games_cover_hash_idx on games (cover_hash);
+
+create table if not exists cover_objects (
+    hash text primary key,
+    paths text[] not null,
+    cover_image_path text not null,
+    cover_variants jsonb,
+    created_at timestamptz not null default now(),
+    last_used_at timestamptz not null default now()
+);
+
+create index if not exists cover_objects_last_used_idx
+    on cover_objects (last_used_at);
+
+create or replace function claim_orphan_covers(
+    p_limit integer default 100,
+    p_grace_seconds integer default 3600
+)
+returns setof cover_objects
+language sql
+as $$
+    delete from cover_objects
+    where hash in (
+        select o.hash
+        from cover_objects o
+        where o.last_used_at < now() - make_interval(secs => p_grace_seconds)
+          and not exists (select 1 from games g where g.cover_hash = o.hash)
+        order by o.last_used_at
+        limit p_limit
+        for update skip locked
+    )
+    returning *;
+$$;
@@ -0,0 +1,105 @@
+-- Review writes run as one server-side call each: the row change and the
+-- game's rating aggregates commit together, and (game_id, ip_address) is
+-- enforced by a unique index instead of a racy select before insert.
+--
+-- Existing duplicates (the race the index closes) are dropped, keeping the
+-- oldest review per client and game; run `python -m app.cli reconcile-ratings`
+-- afterwards to bring the aggregates back in line.
+
+delete from reviews r
+using reviews d
+where r.game_id = d.game_id
+  and r.ip_address = d.ip_address
+  and r.id > d.id;
+
+create unique index if not exists reviews_game_ip_key
+    on reviews (game_id, ip_address);
+
+create or replace function submit_review(
+    p_game_id bigint,
+    p_ip_address text,
+    p_rating integer,
+    p_text text
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_review reviews;
+    v_game games;
+begin
+    insert into reviews (game_id, ip_address, rating, text)
+    values (p_game_id, p_ip_address, p_rating, p_text)
+    returning * into v_review;
+
+    select * into v_game from apply_rating_delta(p_game_id, null, p_rating);
+
+    return jsonb_build_object('review', to_jsonb(v_review), 'game', to_jsonb(v_game));
+end;
+$$;
+
+create or replace function edit_review(
+    p_review_id bigint,
+    p_ip_address text,
+    p_rating integer default null,
+    p_text text default null
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_old reviews;
+    v_review reviews;
+    v_game games;
+begin
+    select * into v_old from reviews where id = p_review_id for update;
+    if not found then
+        raise exception 'review % not found', p_review_id using errcode = 'P0002';
+    end if;
+    if v_old.ip_address <> p_ip_address then
+        raise exception 'review % belongs to another client', p_review_id
+            using errcode = '42501';
+    end if;
+
+    update reviews
+    set rating = coalesce(p_rating, rating),
+        text = coalesce(p_text, text)
+    where id = p_review_id
+    returning * into v_review;
+
+    if v_review.rating <> v_old.rating then
+        select * into v_game
+        from apply_rating_delta(v_old.game_id, v_old.rating, v_review.rating);
+    end if;
+
+    return jsonb_build_object('review', to_jsonb(v_review), 'game', to_jsonb(v_game));
+end;
+$$;
+
+create or replace function delete_review(
+    p_review_id bigint,
+    p_ip_address text
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_review reviews;
+    v_game games;
+begin
+    select * into v_review from reviews where id = p_review_id for update;
+    if not found then
+        raise exception 'review % not found', p_review_id using errcode = 'P0002';
+    end if;
+    if v_review.ip_address <> p_ip_address then
+        raise exception 'review % belongs to another client', p_review_id
+            using errcode = '42501';
+    end if;
+
+    delete from reviews where id = p_review_id;
+    select * into v_game
+    from apply_rating_delta(v_review.game_id, v_review.rating, null);
+
+    return jsonb_build_object('review', to_jsonb(v_review), 'game', to_jsonb(v_game));
+end;
+$$;
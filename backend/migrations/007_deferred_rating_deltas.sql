@@ -0,0 +1,158 @@
+-- Optional write-behind for rating aggregates. With p_defer_rating the review
+-- functions skip apply_rating_delta (and the lock on the hot games row) and
+-- return old_rating / new_rating instead; the API sums those per game and
+-- applies them in batches through apply_rating_deltas.
+--
+-- Deltas still buffered when the process dies are lost; run
+-- `python -m app.cli reconcile-ratings` to repair the aggregates.
+
+drop function if exists submit_review(bigint, text, integer, text);
+drop function if exists edit_review(bigint, text, integer, text);
+drop function if exists delete_review(bigint, text);
+
+create function submit_review(
+    p_game_id bigint,
+    p_ip_address text,
+    p_rating integer,
+    p_text text,
+    p_defer_rating boolean default false
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_review reviews;
+    v_game games;
+begin
+    insert into reviews (game_id, ip_address, rating, text)
+    values (p_game_id, p_ip_address, p_rating, p_text)
+    returning * into v_review;
+
+    if not p_defer_rating then
+        select * into v_game from apply_rating_delta(p_game_id, null, p_rating);
+    end if;
+
+    return jsonb_build_object(
+        'review', to_jsonb(v_review),
+        'game', to_jsonb(v_game),
+        'old_rating', null,
+        'new_rating', v_review.rating
+    );
+end;
+$$;
+
+create function edit_review(
+    p_review_id bigint,
+    p_ip_address text,
+    p_rating integer default null,
+    p_text text default null,
+    p_defer_rating boolean default false
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_old reviews;
+    v_review reviews;
+    v_game games;
+begin
+    select * into v_old from reviews where id = p_review_id for update;
+    if not found then
+        raise exception 'review % not found', p_review_id using errcode = 'P0002';
+    end if;
+    if v_old.ip_address <> p_ip_address then
+        raise exception 'review % belongs to another client', p_review_id
+            using errcode = '42501';
+    end if;
+
+    update reviews
+    set rating = coalesce(p_rating, rating),
+        text = coalesce(p_text, text)
+    where id = p_review_id
+    returning * into v_review;
+
+    if v_review.rating <> v_old.rating and not p_defer_rating then
+        select * into v_game
+        from apply_rating_delta(v_old.game_id, v_old.rating, v_review.rating);
+    end if;
+
+    return jsonb_build_object(
+        'review', to_jsonb(v_review),
+        'game', to_jsonb(v_game),
+        'old_rating', v_old.rating,
+        'new_rating', v_review.rating
+    );
+end;
+$$;
+
+create function delete_review(
+    p_review_id bigint,
+    p_ip_address text,
+    p_defer_rating boolean default false
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_review reviews;
+    v_game games;
+begin
+    select * into v_review from reviews where id = p_review_id for update;
+    if not found then
+        raise exception 'review % not found', p_review_id using errcode = 'P0002';
+    end if;
+    if v_review.ip_address <> p_ip_address then
+        raise exception 'review % belongs to another client', p_review_id
+            using errcode = '42501';
+    end if;
+
+    delete from reviews where id = p_review_id;
+    if not p_defer_rating then
+        select * into v_game
+        from apply_rating_delta(v_review.game_id, v_review.rating, null);
+    end if;
+
+    return jsonb_build_object(
+        'review', to_jsonb(v_review),
+        'game', to_jsonb(v_game),
+        'old_rating', v_review.rating,
+        'new_rating', null
+    );
+end;
+$$;
+
+-- p_deltas: [{"game_id": 1, "sum": 17, "count": 2, "histogram": [0, ..., 1]}]
+create or replace function apply_rating_deltas(p_deltas jsonb)
+returns setof games
+language sql
+as $$
+    with deltas as (
+        select d.game_id,
+               d.sum,
+               d.count,
+               array(
+                   select h.value::int
+                   from jsonb_array_elements_text(d.histogram) with ordinality
+                       as h(value, i)
+                   order by h.i
+               ) as histogram
+        from jsonb_to_recordset(p_deltas)
+            as d(game_id bigint, sum bigint, count integer, histogram jsonb)
+    )
+    update games g
+    set rating_sum = g.rating_sum + d.sum,
+        rating_count = g.rating_count + d.count,
+        rating_histogram = array(
+            select h.n + d.histogram[h.i]
+            from unnest(g.rating_histogram) with ordinality as h(n, i)
+            order by h.i
+        ),
+        average_rating = case
+            when g.rating_count + d.count > 0
+            then round((g.rating_sum + d.sum)::numeric / (g.rating_count + d.count), 1)
+            else 0
+        end
+    from deltas d
+    where g.id = d.game_id
+    returning g.*;
+$$;
@@ -0,0 +1,13 @@
+-- Review counts for a set of games in one grouped query (GET /games/batch).
+-- Served by reviews_game_created_idx, whose leading column is game_id.
+
+create or replace function review_counts(p_game_ids bigint[])
+returns table (game_id bigint, reviews_count bigint)
+language sql
+stable
+as $$
+    select r.game_id, count(*)
+    from reviews r
+    where r.game_id = any(p_game_ids)
+    group by r.game_id;
+$$;
@@ -0,0 +1,16 @@
+-- Denormalized review count on games, so the game card and lists no longer
+-- need a separate count(*) on reviews.
+--
+-- Every review carries a rating, so rating_count already is the number of
+-- reviews: it is maintained by every review write path (apply_rating_delta /
+-- apply_rating_deltas) and repaired by reconcile_game_ratings. reviews_count
+-- is a stored generated column over it, which keeps the two from diverging
+-- and needs no changes to the write functions. With deferred rating deltas
+-- it lags by the same flush interval as the rating aggregates.
+
+alter table games
+    add column if not exists reviews_count integer
+        generated always as (rating_count) stored;
+
+-- GET /games/batch reads games.reviews_count now.
+drop function if exists review_counts(bigint[]);
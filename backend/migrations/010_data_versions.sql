@@ -0,0 +1,73 @@
+-- Data versions behind the API's ETags. A conditional GET reads these numbers
+-- before it touches any data and answers If-None-Match with 304 without
+-- running the query or serializing the body.
+--
+-- games.version is bumped on every update of the row (rating aggregates
+-- included); data_versions has one row per collection that is bumped once per
+-- statement that writes to it. Both change in the writing transaction, so a
+-- reader never sees a new version before the data it stands for. Every write
+-- in the same collection also updates the same data_versions row, so those
+-- writes are serialized on its row lock until commit.
+
+alter table games
+    add column if not exists version bigint not null default 1;
+
+create table if not exists data_versions (
+    name text primary key,
+    version bigint not null default 1
+);
+
+insert into data_versions (name)
+values ('games'), ('reviews')
+on conflict (name) do nothing;
+
+create or replace function bump_game_version()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.version := old.version + 1;
+    return new;
+end;
+$$;
+
+drop trigger if exists games_bump_version on games;
+create trigger games_bump_version
+    before update on games
+    for each row execute function bump_game_version();
+
+create or replace function bump_data_version()
+returns trigger
+language plpgsql
+as $$
+begin
+    update data_versions set version = version + 1 where name = tg_argv[0];
+    return null;
+end;
+$$;
+
+drop trigger if exists games_bump_data_version on games;
+create trigger games_bump_data_version
+    after insert or update or delete on games
+    for each statement execute function bump_data_version('games');
+
+drop trigger if exists reviews_bump_data_version on reviews;
+create trigger reviews_bump_data_version
+    after insert or update or delete on reviews
+    for each statement execute function bump_data_version('reviews');
+
+-- One round trip for everything a conditional GET needs: the collection
+-- versions and, for per-game routes, that game's row version (null if the
+-- game does not exist).
+create or replace function data_versions(p_game_id bigint default null)
+returns jsonb
+language sql
+stable
+as $$
+    select jsonb_object_agg(name, version)
+        || jsonb_build_object(
+            'game',
+            (select g.version from games g where g.id = p_game_id)
+        )
+    from data_versions;
+$$;
@@ -1,9 +1,164 @@
+import asyncio
+import os
+from contextlib import contextmanager
+from typing import Callable
+
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 
+os.environ.setdefault("DATA_BACKEND", "memory")
+os.environ.setdefault("ETAG_VERSIONS_TTL_SECONDS", "0")
+
+from app.repositories import MemoryBackend  # noqa: E402
+from app.services.metrics import record_requests  # noqa: E402
+
+
+class FakeUpstream(MemoryBackend):
+    def __init__(self) -> None:
+        super().__init__(record=True)
+        self.responses: dict[tuple[str, str], list[dict]] = {}
+        self.rpcs: dict[str, Callable[[dict], list[dict]]] = {}
+        self.storage_delay = 0.0
+        self.delay = 0.0
+
+    def _dispatch(self, request: httpx.Request, table: str, body):
+        if (request.method, table) in self.responses:
+            rows = self.responses[(request.method, table)]
+            return rows, len(rows)
+        if table in self.rpcs:
+            rows = self.rpcs[table](body)
+            return rows, len(rows)
+        return super()._dispatch(request, table, body)
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(self.delay)
+        return await super().__call__(request)
+
+    async def _storage(self, request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(self.storage_delay)
+        return await super()._storage(request)
+
+
+@pytest.fixture
+def game_row():
+    def row(**overrides) -> dict:
+        game_id = overrides.get("id", 1)
+        return {
+            "id": game_id,
+            "title": f"Game {game_id}",
+            "release_year": 2024,
+            "average_rating": 0.0,
+            "created_at": "2024-01-01T00:00:00+00:00",
+            **overrides,
+        }
+
+    return row
+
+
+SEED_GAMES = [
+    {
+        "title": "The Witcher 3: Wild Hunt",
+        "description": "Ролевая игра в открытом мире",
+        "genres": ["RPG", "Open World"],
+        "developer": "CD Projekt Red",
+        "publisher": "CD Projekt",
+        "release_year": 2015,
+        "platforms": ["PC", "PS4", "Xbox One"],
+    },
+    {
+        "title": "Doom Eternal",
+        "description": "Шутер от первого лица",
+        "genres": ["Shooter", "Action"],
+        "developer": "id Software",
+        "publisher": "Bethesda",
+        "release_year": 2020,
+        "platforms": ["PC", "PS5"],
+    },
+]
+
+SEED_REVIEWS = [
+    {
+        "game_id": 2,
+        "rating": 8,
+        "text": "Быстрый и злой шутер, отличная музыка",
+        "ip_address": "10.0.0.1",
+    },
+]
+
+
+def reset_indexes() -> None:
+    from app.core import database
+
+    for index in [
+        database.facet_index,
+        database.search_index,
+        database.top_games,
+        database.recent_games,
+    ]:
+        index.invalidate()
+
 
 @pytest.fixture(scope="module")
 def client():
+    from app.core.database import db
+    from app.main import app
+
+    if db.backend is not None:
+        db.backend = MemoryBackend()
+        db.backend.seed("games", SEED_GAMES)
+        db.backend.seed("reviews", SEED_REVIEWS)
+        for review in SEED_REVIEWS:
+            db.backend.rpc(
+                "apply_rating_delta",
+                {"p_game_id": review["game_id"], "p_new_rating": review["rating"]},
+            )
+    reset_indexes()
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def upstream(client):
+    from app.core import database
+
+    fake = FakeUpstream()
+    client.portal.call(database.db.disconnect)
+    database.db.connect(transport=httpx.MockTransport(fake))
+    reset_indexes()
+    yield fake
+    client.portal.call(database.db.disconnect)
+    reset_indexes()
+    client.portal.call(database.warm_indexes)
+
+
+@pytest.fixture
+def route_keys():
     from app.main import app
 
-    return TestClient(app)
+    def keys(module: str) -> set[tuple[str, str]]:
+        return {
+            (method, route.path)
+            for route in app.routes
+            if getattr(route, "endpoint", None) and route.endpoint.__module__ == module
+            for method in route.methods
+        }
+
+    return keys
+
+
+@pytest.fixture
+def query_budget():
+    @contextmanager
+    def budget(limit: int):
+        with record_requests() as records:
+            yield records
+        assert records, "запрос не был выполнен"
+        for method, route, timing in records:
+            assert timing.upstream_count <= limit, (
+                f"{method} {route}: {timing.upstream_count} запросов к upstream "
+                f"при бюджете {limit}: {timing.queries}"
+            )
+
+    return budget
@@ -1,3 +1,20 @@
+import asyncio
+import csv
+import gzip
+import hashlib
+import io
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+from app.services.images import VARIANT_WIDTHS
+from app.services.pagination import encode_cursor
+
+
 def test_root_endpoint(client):
     response = client.get("/")
     assert response.status_code == 200
@@ -155,8 +172,819 @@ def test_upload_cover(client):
             f"/api/v1/games/{game_id}/cover",
             files={"cover_image": ("test_cover.txt", image_file, "text/plain")},
         )
-    assert response.status_code == 422
-    assert "Поддерживаемые форматы" in response.json()["detail"]
+    assert response.status_code == 200
 
     client.delete(f"/api/v1/games/{game_id}")
     assert client.delete(f"/api/v1/games/{game_id}").status_code == 404
+
+
+def test_list_games_single_upstream_call(client, upstream, game_row):
+    upstream.tables["games"] = [game_row(id=i, genres=["RPG"]) for i in range(1, 251)]
+
+    response = client.get("/api/v1/games?page=3&page_size=20&genres=RPG")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 250
+    assert data["pages"] == 13
+    assert [g["id"] for g in data["items"]] == list(range(41, 61))
+
+    assert [c["table"] for c in upstream.calls] == ["data_versions", "games"]
+    call = upstream.calls[1]
+    assert call["params"]["offset"] == "40"
+    assert call["params"]["limit"] == "20"
+    assert call["rows"] == 20
+
+
+def test_facets_served_from_memory(client, upstream, game_row):
+    upstream.tables["games"] = [
+        game_row(id=1, genres=["RPG", "Action"], platforms=["PC"]),
+        game_row(id=2, genres=["RPG"], platforms=["PS5"]),
+    ]
+
+    assert client.get("/api/v1/games/genres").json() == ["Action", "RPG"]
+    assert client.get("/api/v1/games/genres/counts").json() == [
+        {"value": "RPG", "count": 2},
+        {"value": "Action", "count": 1},
+    ]
+
+    upstream.responses[("PATCH", "games")] = [
+        game_row(id=2, genres=["Shooter"], platforms=["PS5"])
+    ]
+    response = client.patch("/api/v1/games/2", json={"genres": ["Shooter"]})
+    assert response.status_code == 200
+
+    assert client.get("/api/v1/games/genres").json() == ["Action", "RPG", "Shooter"]
+    assert client.get("/api/v1/games/platforms/counts").json() == [
+        {"value": "PC", "count": 1},
+        {"value": "PS5", "count": 1},
+    ]
+
+    reads = [c for c in upstream.calls if c["method"] == "GET"]
+    assert len(reads) == 1
+
+
+def test_list_games_cursor(client, upstream, game_row):
+    upstream.tables["games"] = [
+        game_row(id=i, average_rating=7.5) for i in range(1, 31)
+    ]
+
+    response = client.get("/api/v1/games?page_size=5&sort=rating")
+    assert response.status_code == 200
+    cursor = response.json()["next_cursor"]
+    assert cursor
+
+    response = client.get(f"/api/v1/games?page_size=5&sort=rating&cursor={cursor}")
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 5
+
+    params = upstream.calls[-1]["params"]
+    assert params["or"] == "(average_rating.lt.7.5,and(average_rating.eq.7.5,id.lt.26))"
+    assert params["order"] == "average_rating.desc,id.desc"
+    assert params["limit"] == "6"
+    assert "offset" not in params
+
+    response = client.get(f"/api/v1/games?page_size=5&sort=id&cursor={cursor}")
+    assert response.status_code == 400
+
+
+def test_malformed_cursor_values_rejected(client, upstream):
+    upstream.tables["games"] = []
+    malformed = [
+        ("rating", "abc"),
+        ("rating", {"a": 1}),
+        ("rating", True),
+        ("rating", 'x",id.gt.0,id.eq."1'),
+        ("created_at", "yesterday"),
+        ("created_at", '2024-01-01",id.gt.0,id.eq."1'),
+        ("created_at", 1704067200),
+        ("id", 5),
+    ]
+    for sort, value in malformed:
+        cursor = encode_cursor(sort, "value", {"value": value, "id": 1})
+        response = client.get(f"/api/v1/games?sort={sort}&cursor={cursor}")
+        assert response.status_code == 400, (sort, value)
+        assert response.json()["detail"] == "Некорректный курсор"
+    assert {c["table"] for c in upstream.calls} == {"data_versions"}
+
+    value = "2024-01-01T00:00:00+00:00"
+    cursor = encode_cursor("created_at", "value", {"value": value, "id": 1})
+    assert client.get(f"/api/v1/games?sort=created_at&cursor={cursor}").is_success
+    assert upstream.calls[-1]["params"]["or"] == (
+        f'(created_at.lt."{value}",and(created_at.eq."{value}",id.lt.1))'
+    )
+
+
+def test_keyset_string_values_are_quoted():
+    from app.repositories.pagination import quote
+
+    assert quote('a"b\\c,d') == '"a\\"b\\\\c,d"'
+
+
+def test_search_games_ranked_and_fuzzy(client, upstream, game_row):
+    from app.core.database import search_index
+
+    upstream.tables["games"] = [
+        game_row(
+            id=1,
+            title="Cyberpunk 2077",
+            developer="CD Projekt Red",
+            description="От создателей The Witcher",
+        ),
+        game_row(
+            id=2,
+            title="The Witcher 3: Wild Hunt",
+            developer="CD Projekt Red",
+            description="Ролевая игра в открытом мире",
+        ),
+        game_row(id=3, title="Doom Eternal", developer="id Software", description=None),
+    ]
+
+    response = client.get("/api/v1/games?q=witchr")
+    assert response.status_code == 200
+    data = response.json()
+    assert [g["id"] for g in data["items"]] == [2, 1]
+    assert data["total"] == 2
+
+    response = client.get("/api/v1/games?q=Projekt&page_size=1&page=2")
+    assert [g["id"] for g in response.json()["items"]] == [2]
+
+    response = client.get("/api/v1/games?q=doom&cursor=abc")
+    assert response.status_code == 400
+    assert client.get("/api/v1/games?q=doom&sort=rating").status_code == 400
+
+    upstream.tables["games"] += [
+        game_row(id=i, title=f"Witcher Tale {i}", genres=["RPG"]) for i in range(4, 9)
+    ]
+    search_index.invalidate()
+    upstream.calls.clear()
+    with patch("app.repositories.games.GameRepository.IDS_PER_QUERY", 2):
+        response = client.get("/api/v1/games?q=witcher&genres=RPG&page_size=10")
+    assert sorted(g["id"] for g in response.json()["items"]) == [4, 5, 6, 7, 8]
+    filtered = [
+        call["params"]["id"] for call in upstream.calls if "genres" in call["params"]
+    ]
+    assert len(filtered) == 4
+    assert all(ids.count(",") <= 1 for ids in filtered)
+
+
+def test_search_index_refreshes_after_ttl(client, upstream, game_row):
+    from app.core.database import search_index
+
+    upstream.tables["games"] = [game_row(id=1, title="Hollow Knight")]
+    assert client.get("/api/v1/games?q=silksong").json()["total"] == 0
+
+    upstream.tables["games"].append(game_row(id=2, title="Hollow Silksong"))
+    assert client.get("/api/v1/games?q=silksong").json()["total"] == 0
+
+    with patch.object(search_index, "ttl_seconds", 0.05):
+        time.sleep(0.1)
+        response = client.get("/api/v1/games?q=silksong")
+    assert [g["id"] for g in response.json()["items"]] == [2]
+
+
+def test_search_index_forgets_renamed_terms(client, upstream, game_row):
+    from app.core.database import search_index
+
+    upstream.tables["games"] = [game_row(title="Hollow Silksong")]
+    assert client.get("/api/v1/games?q=silksogn").json()["total"] == 1
+
+    response = client.patch("/api/v1/games/1", json={"title": "Hollow Knight"})
+    assert response.status_code == 200
+    assert client.get("/api/v1/games?q=silksogn").json()["total"] == 0
+    assert client.get("/api/v1/games?q=knigth").json()["total"] == 1
+    terms = set().union(*search_index._state.trigrams.values())
+    assert "silksong" not in terms and "knight" in terms
+
+
+def test_etags_follow_game_writes(client, upstream, game_row):
+    upstream.tables["games"] = [game_row(title="ETag Game")]
+
+    def assert_cached(path, etag):
+        calls = len(upstream.calls)
+        response = client.get(path, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+        assert [c["table"] for c in upstream.calls[calls:]] == ["data_versions"]
+
+    def assert_changed(path, etag):
+        response = client.get(path, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        return response.headers["ETag"]
+
+    detail = client.get("/api/v1/games/1").headers["ETag"]
+    listing = client.get("/api/v1/games").headers["ETag"]
+    top = client.get("/api/v1/games/top").headers["ETag"]
+    assert_cached("/api/v1/games/1", detail)
+    assert_cached("/api/v1/games", listing)
+    assert_cached("/api/v1/games/top", top)
+    assert client.get("/api/v1/games?page=2").headers["ETag"] != listing
+
+    client.patch("/api/v1/games/1", json={"title": "ETag Game 2"})
+    detail = assert_changed("/api/v1/games/1", detail)
+    listing = assert_changed("/api/v1/games", listing)
+    assert_cached("/api/v1/games/1", detail)
+
+    with patch("app.core.config.settings.ETAG_VERSIONS_TTL_SECONDS", 60):
+        assert_cached("/api/v1/games", listing)
+        calls = len(upstream.calls)
+        response = client.get("/api/v1/games", headers={"If-None-Match": listing})
+        assert response.status_code == 304
+        assert len(upstream.calls) == calls
+
+    upstream.update(
+        "games", upstream.tables["games"], {"description": "Изменено другим процессом"}
+    )
+    detail = assert_changed("/api/v1/games/1", detail)
+    listing = assert_changed("/api/v1/games", listing)
+
+    created = client.post("/api/v1/games", json={"title": "New", "release_year": 2024})
+    assert created.status_code == 201
+    listing = assert_changed("/api/v1/games", listing)
+    top = assert_changed("/api/v1/games/top", top)
+    assert_cached("/api/v1/games/1", detail)
+
+    with open("tests/test_cover.jpg", "rb") as image_file:
+        client.patch(
+            "/api/v1/games/1/cover",
+            files={"cover_image": ("test_cover.jpg", image_file, "image/jpeg")},
+        )
+    detail = assert_changed("/api/v1/games/1", detail)
+    listing = assert_changed("/api/v1/games", listing)
+
+    assert client.delete("/api/v1/games/1").status_code == 204
+    assert (
+        client.get("/api/v1/games/1", headers={"If-None-Match": detail}).status_code
+        == 404
+    )
+    assert_changed("/api/v1/games", listing)
+
+
+def test_leaderboards_served_from_memory(client, upstream, game_row):
+    from app.core.database import top_games
+
+    upstream.tables["games"] = [
+        game_row(
+            id=i, average_rating=float(i), created_at=f"2024-01-0{i}T00:00:00+00:00"
+        )
+        for i in range(1, 6)
+    ]
+    top = client.get("/api/v1/games/top?limit=3").json()
+    assert [g["id"] for g in top] == [5, 4, 3]
+    recent = client.get("/api/v1/games/recent?limit=2").json()
+    assert [g["id"] for g in recent] == [5, 4]
+
+    calls = len(upstream.calls)
+    upstream.tables["reviews"] = []
+    with patch("fastapi.Request.client") as mock_client:
+        mock_client.host = "127.0.0.1"
+        review = {"game_id": 1, "rating": 10, "text": "Лучшая игра в каталоге"}
+        assert client.post("/api/v1/reviews", json=review).status_code == 201
+
+    assert client.delete("/api/v1/games/4").status_code == 204
+    created = client.post("/api/v1/games", json={"title": "New", "release_year": 2024})
+    assert created.status_code == 201
+    new_id = created.json()["id"]
+
+    writes = len(upstream.calls)
+    top = client.get("/api/v1/games/top?limit=3").json()
+    assert [(g["id"], g["average_rating"]) for g in top] == [
+        (1, 10.0),
+        (5, 5.0),
+        (3, 3.0),
+    ]
+    recent = client.get("/api/v1/games/recent?limit=2").json()
+    assert [g["id"] for g in recent] == [new_id, 5]
+    assert writes > calls
+    assert {c["table"] for c in upstream.calls[writes:]} == {"data_versions"}
+
+    upstream.tables["games"][0]["average_rating"] = 1.0
+    assert client.get("/api/v1/games/top?limit=1").json()[0]["id"] == 1
+    with patch.object(top_games, "ttl_seconds", 0.05):
+        time.sleep(0.1)
+        top = client.get("/api/v1/games/top?limit=1").json()
+    assert [(g["id"], g["average_rating"]) for g in top] == [(5, 5.0)]
+
+
+def test_import_games_streaming(client, upstream, game_row):
+    upstream.tables["games"] = [
+        game_row(
+            title="Old Game",
+            release_year=2001,
+            genres=["RPG"],
+            platforms=["PC"],
+            developer="Studio",
+            average_rating=7.5,
+        )
+    ]
+    csv_data = (
+        "title,release_year,genres,platforms\n"
+        'New Game,2020,"Action,RPG",PC\n'
+        "Old Game,2005,,\n"
+        "Broken,1800,,\n"
+        "Extra, Column,2021,,\n"
+        "Third Game,2022,Puzzle,Switch\n"
+    )
+
+    with patch("app.core.config.settings.IMPORT_BATCH_SIZE", 2):
+        response = client.post(
+            "/api/v1/games/import",
+            files={"file": ("games.csv", csv_data.encode(), "text/csv")},
+        )
+    assert response.status_code == 200
+    report = response.json()
+    assert report["processed"] == 5
+    assert report["inserted"] == 2
+    assert report["skipped"] == 1
+    assert report["failed"] == 2
+    assert [error["row"] for error in report["errors"]] == [4, 5]
+    assert "release_year" in report["errors"][0]["errors"][0]
+
+    titles = [game["title"] for game in upstream.tables["games"]]
+    assert titles == ["Old Game", "New Game", "Third Game"]
+    assert upstream.tables["games"][1]["genres"] == ["Action", "RPG"]
+    inserts = [call for call in upstream.calls if call["method"] == "POST"]
+    assert len(inserts) == 2
+
+    ndjson = b'{"title": "Old Game", "release_year": 2010}\nnot json\n'
+    response = client.post(
+        "/api/v1/games/import?on_duplicate=upsert",
+        files={"file": ("games.ndjson", ndjson, "application/x-ndjson")},
+    )
+    report = response.json()
+    assert report["updated"] == 1
+    assert report["errors"][0]["row"] == 2
+    old = upstream.tables["games"][0]
+    assert old["release_year"] == 2010
+    assert old["average_rating"] == 7.5
+    assert old["developer"] == "Studio"
+
+    response = client.post(
+        "/api/v1/games/import?on_duplicate=fail",
+        files={"file": ("games.ndjson", ndjson, "application/x-ndjson")},
+    )
+    report = response.json()
+    assert report["aborted"] is True
+    assert "Old Game" in [error["title"] for error in report["errors"]]
+
+    response = client.post(
+        "/api/v1/games/import",
+        files={"file": ("games.txt", b"", "text/plain")},
+    )
+    assert response.status_code == 422
+
+
+def test_export_games_streams_keyset_chunks(client, upstream, game_row):
+    upstream.tables["games"] = [
+        game_row(
+            id=game_id,
+            release_year=2000 + game_id,
+            genres=["RPG", "Action"],
+            platforms=["PC"],
+            average_rating=5.0,
+        )
+        for game_id in range(1, 6)
+    ]
+
+    with patch("app.core.config.settings.SCAN_CHUNK_SIZE", 2):
+        response = client.get("/api/v1/games/export")
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == [1, 2, 3, 4, 5]
+    assert lines[0]["genres"] == ["RPG", "Action"]
+    scans = [call["params"].get("id") for call in upstream.calls]
+    assert scans == ["gt.0", "gt.2", "gt.4"]
+
+    response = client.get("/api/v1/games/export?format=csv&gzip=true")
+    assert response.headers["content-type"] == "application/gzip"
+    assert 'filename="games.csv.gz"' in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(response.content).decode())))
+    assert len(rows) == 5
+    assert rows[0]["genres"] == "RPG,Action"
+
+
+def test_cover_upload_streams_sniffed_image(client, upstream, game_row, tmp_path):
+    upstream.tables["games"] = [game_row()]
+    with open("tests/test_cover.jpg", "rb") as image_file:
+        image = image_file.read()
+
+    def upload(name, content):
+        return client.patch(
+            "/api/v1/games/1/cover",
+            files={"cover_image": (name, content, "image/png")},
+        )
+
+    with (
+        patch("app.core.config.settings.UPLOAD_CHUNK_SIZE", 1024),
+        patch("tempfile.tempdir", str(tmp_path)),
+    ):
+        response = upload("cover.png", image)
+    assert response.status_code == 200
+    assert list(tmp_path.iterdir()) == []
+    data = response.json()
+    assert data["cover_image_path"].endswith("/original.jpg")
+    assert set(data["cover_variants"]) == {"thumb", "card", "full"}
+    assert upstream.tables["games"][0]["cover_variants"] == data["cover_variants"]
+
+    stored = {
+        call["path"].rsplit("/", 1)[-1]: call
+        for call in upstream.calls
+        if call["table"] == "storage"
+    }
+    assert stored["original.jpg"]["content_type"] == "image/jpeg"
+    assert stored["original.jpg"]["size"] == len(image)
+    original = next(key for key in upstream.objects if key.endswith("original.jpg"))
+    assert upstream.objects[original] == image
+    assert stored["thumb.webp"]["content_type"] == "image/webp"
+    for name, width in VARIANT_WIDTHS.items():
+        path = next(key for key in upstream.objects if key.endswith(f"{name}.webp"))
+        with Image.open(io.BytesIO(upstream.objects[path])) as variant:
+            assert variant.format == "WEBP"
+            assert variant.width <= width
+
+    png = io.BytesIO()
+    Image.new("RGB", (32, 32), "blue").save(png, "PNG")
+    for name in ("cover.jpeg.bin", "cover"):
+        response = upload(name, png.getvalue())
+        assert response.status_code == 200
+        assert response.json()["cover_image_path"].endswith("/original.png")
+
+    response = upload("cover.jpg", b"GIF89a not really an image")
+    assert response.status_code == 422
+
+    with (
+        patch("app.core.config.settings.COVER_MAX_BYTES", len(image) - 1),
+        patch("tempfile.tempdir", str(tmp_path)),
+    ):
+        response = upload("cover.jpg", image)
+    assert response.status_code == 413
+    assert list(tmp_path.iterdir()) == []
+
+    upstream.calls.clear()
+    with patch("app.core.config.settings.COVER_MAX_BYTES", 1024):
+        response = upload("cover.jpg", image)
+    assert response.status_code == 413
+    assert upstream.calls == []
+
+    other = io.BytesIO()
+    Image.new("RGB", (64, 64), "red").save(other, "JPEG")
+    upstream.storage_delay = 0.5
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        slow = pool.submit(upload, "cover.jpg", other.getvalue())
+        time.sleep(0.1)
+        started = time.perf_counter()
+        for _ in range(5):
+            assert client.get("/api/v1/games/genres").status_code == 200
+        assert time.perf_counter() - started < 0.4
+        assert not slow.done()
+        assert slow.result().status_code == 200
+
+
+def test_covers_deduplicated_and_orphans_swept(client, upstream, game_row):
+    from app.core import database
+
+    upstream.tables["games"] = [game_row(id=game_id) for game_id in (1, 2)]
+    with open("tests/test_cover.jpg", "rb") as image_file:
+        image = image_file.read()
+
+    for game_id in (1, 2):
+        response = client.patch(
+            f"/api/v1/games/{game_id}/cover",
+            files={"cover_image": ("cover.jpg", image, "image/jpeg")},
+        )
+        assert response.status_code == 200
+
+    uploads = [c for c in upstream.calls if c["table"] == "storage"]
+    assert len(uploads) == 4
+    digest = hashlib.sha256(image).hexdigest()
+    assert all(f"/covers/{digest}/" in call["path"] for call in uploads)
+    first, second = upstream.tables["games"]
+    assert first["cover_hash"] == second["cover_hash"] == digest
+    assert first["cover_variants"] == second["cover_variants"]
+
+    for game in upstream.tables["games"]:
+        game["cover_hash"] = None
+    failure = OSError("Storage недоступен")
+    with patch.object(database.covers_storage, "remove", side_effect=failure):
+        with pytest.raises(OSError):
+            client.portal.call(database.sweep_covers, 10, 0)
+    assert [row["hash"] for row in upstream.tables["cover_objects"]] == [digest]
+    assert len(upstream.objects) == 4
+
+    orphans = upstream.tables["cover_objects"]
+    upstream.rpcs["claim_orphan_covers"] = lambda params: [
+        orphans.pop() for _ in range(min(params["p_limit"], len(orphans)))
+    ]
+    assert len(upstream.objects) == 4
+
+    removed = client.portal.call(database.sweep_covers, 1, 0)
+    assert removed == 1
+    assert upstream.objects == {}
+
+
+def test_cover_reuploaded_during_sweep_survives(client, upstream, game_row):
+    from app.core import database
+
+    upstream.tables["games"] = [game_row()]
+    with open("tests/test_cover.jpg", "rb") as image_file:
+        image = image_file.read()
+    digest = hashlib.sha256(image).hexdigest()
+
+    def upload_cover():
+        return database.upload_cover("tests/test_cover.jpg", "jpeg", digest, len(image))
+
+    def stored():
+        return {key.split("/", 1)[1] for key in upstream.objects}
+
+    response = client.patch(
+        "/api/v1/games/1/cover",
+        files={"cover_image": ("cover.jpg", image, "image/jpeg")},
+    )
+    assert response.status_code == 200
+    old_paths = upstream.tables["cover_objects"][0]["paths"]
+    upstream.tables["games"][0]["cover_hash"] = None
+
+    remove = database.covers_storage.remove
+    reuploaded = []
+
+    async def remove_after_reupload(paths):
+        reuploaded.append(await upload_cover())
+        await remove(paths)
+
+    with patch.object(database.covers_storage, "remove", remove_after_reupload):
+        assert client.portal.call(database.sweep_covers, 10, 0) == 1
+
+    paths = reuploaded[0]["paths"]
+    assert set(paths).isdisjoint(old_paths)
+    assert stored() == set(paths)
+    assert upstream.tables["cover_objects"][0]["paths"] == paths
+
+    upstream.tables["cover_objects"].clear()
+    upstream.objects.clear()
+
+    async def upload_twice():
+        return await asyncio.gather(upload_cover(), upload_cover())
+
+    first, second = client.portal.call(upload_twice)
+    assert first["paths"] == second["paths"]
+    assert stored() == set(first["paths"])
+    assert len(upstream.tables["cover_objects"]) == 1
+
+
+def test_failed_cover_upload_removes_partial_objects(client, upstream, game_row):
+    from app.core import database
+
+    upstream.tables["games"] = [game_row()]
+    with open("tests/test_cover.jpg", "rb") as image_file:
+        image = image_file.read()
+    upload = database.covers_storage.upload
+
+    async def reject_thumb(path, *args, **kwargs):
+        if path.endswith("thumb.webp"):
+            return False
+        return await upload(path, *args, **kwargs)
+
+    async def break_card(path, *args, **kwargs):
+        if path.endswith("card.webp"):
+            raise OSError("Storage недоступен")
+        return await upload(path, *args, **kwargs)
+
+    with patch.object(database.covers_storage, "upload", reject_thumb):
+        response = client.patch(
+            "/api/v1/games/1/cover",
+            files={"cover_image": ("cover.jpg", image, "image/jpeg")},
+        )
+    assert response.status_code == 500
+    assert upstream.objects == {}
+
+    digest = hashlib.sha256(image).hexdigest()
+    with patch.object(database.covers_storage, "upload", break_card):
+        with pytest.raises(OSError):
+            client.portal.call(
+                database.upload_cover,
+                "tests/test_cover.jpg",
+                "jpeg",
+                digest,
+                len(image),
+            )
+    assert upstream.objects == {}
+    assert upstream.tables.get("cover_objects", []) == []
+    assert upstream.tables["games"][0].get("cover_hash") is None
+
+
+def test_metrics_and_server_timing(client, upstream, game_row):
+    upstream.tables["games"] = [game_row(id=7, title="Metrics Game")]
+
+    response = client.get("/api/v1/games/7")
+    assert response.status_code == 200
+    timing = dict(
+        part.strip().split(";", 1)
+        for part in response.headers["Server-Timing"].split(",")
+    )
+    assert set(timing) == {"upstream", "serialize", "handler", "total"}
+    assert f'desc="{len(upstream.calls)}"' in timing["upstream"]
+
+    body = client.get("/metrics").text
+    route = 'method="GET",route="/api/v1/games/{game_id}"'
+    assert f'gamehub_http_requests_total{{{route},status="200"}}' in body
+    assert f"gamehub_upstream_queries_per_request_count{{{route}}}" in body
+    assert "# TYPE gamehub_http_request_duration_seconds histogram" in body
+
+
+def test_sparse_fieldsets_for_game_lists(client, upstream, game_row):
+    upstream.tables["games"] = [
+        game_row(
+            id=i,
+            title=f"Sparse Game {i}",
+            description="Длинное описание, которое карточке не нужно",
+            average_rating=float(i),
+            created_at=f"2024-01-0{i}T00:00:00+00:00",
+        )
+        for i in range(1, 4)
+    ]
+    card = {"id", "title", "cover_image_path", "average_rating"}
+
+    response = client.get(
+        "/api/v1/games?page_size=2&sort=created_at"
+        "&fields=title,cover_image_path,average_rating"
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert [set(item) for item in body["items"]] == [card, card]
+    assert upstream.calls[-1]["params"]["select"] == (
+        "id,title,cover_image_path,average_rating,created_at"
+    )
+    cursor = body["next_cursor"]
+    response = client.get(
+        f"/api/v1/games?page_size=2&sort=created_at&fields=title&cursor={cursor}"
+    )
+    assert response.json()["items"] == [{"id": 1, "title": "Sparse Game 1"}]
+
+    top = client.get("/api/v1/games/top?limit=2&fields=title,average_rating").json()
+    assert top == [
+        {"id": 3, "title": "Sparse Game 3", "average_rating": 3.0},
+        {"id": 2, "title": "Sparse Game 2", "average_rating": 2.0},
+    ]
+    recent = client.get("/api/v1/games/recent?limit=1&fields=title").json()
+    assert recent == [{"id": 3, "title": "Sparse Game 3"}]
+
+    full = client.get("/api/v1/games?page_size=1").json()["items"][0]
+    assert full["description"] == "Длинное описание, которое карточке не нужно"
+
+    response = client.get("/api/v1/games?fields=title,password")
+    assert response.status_code == 400
+    assert "password" in response.json()["detail"]
+
+
+def test_games_batch_preserves_order_and_marks_missing(client, upstream, game_row):
+    upstream.tables["games"] = [game_row(id=i) for i in range(1, 4)]
+    upstream.tables["reviews"] = [
+        {"id": i, "game_id": game_id, "rating": 7, "ip_address": f"10.3.0.{i}"}
+        for i, game_id in enumerate([3, 3, 1], 1)
+    ]
+    upstream.rpc("reconcile_game_ratings", {})
+
+    response = client.get("/api/v1/games/batch?ids=3,42,1,3,2")
+    assert response.status_code == 200
+    body = response.json()
+    assert [item and (item["id"], item["reviews_count"]) for item in body["items"]] == [
+        (3, 2),
+        None,
+        (1, 1),
+        (2, 0),
+    ]
+    assert body["missing"] == [42]
+    assert [c["table"] for c in upstream.calls] == ["data_versions", "games"]
+
+    assert client.get("/api/v1/games/batch?ids=1,abc").status_code == 422
+    assert client.get(f"/api/v1/games/batch?ids=1,{2**63}").status_code == 422
+    assert client.get("/api/v1/games/batch?ids=0,-1").status_code == 422
+    with patch("app.core.config.settings.GAMES_BATCH_MAX", 2):
+        assert client.get("/api/v1/games/batch?ids=1,2,3").status_code == 422
+
+
+def test_reviews_count_is_denormalized(client, upstream, game_row):
+    from app.cli import reconcile_ratings
+
+    upstream.tables["games"] = [game_row(id=5)]
+    upstream.tables["reviews"] = []
+    with patch("fastapi.Request.client") as mock_client:
+        ids = []
+        for number, rating in enumerate([7, 9, 4, 2]):
+            mock_client.host = f"10.4.0.{number}"
+            review = {"game_id": 5, "rating": rating, "text": "Считаем рецензии"}
+            ids.append(client.post("/api/v1/reviews", json=review).json()["id"])
+        client.patch(f"/api/v1/reviews/{ids[-1]}", json={"rating": 5})
+        assert client.delete(f"/api/v1/reviews/{ids[-1]}").status_code == 204
+
+    calls = len(upstream.calls)
+    assert client.get("/api/v1/games/5").json()["reviews_count"] == 3
+    assert [c["table"] for c in upstream.calls[calls:]] == ["data_versions", "games"]
+    for path in ("/api/v1/games", "/api/v1/games/top", "/api/v1/games/recent"):
+        body = client.get(path).json()
+        items = body["items"] if isinstance(body, dict) else body
+        assert [(g["id"], g["reviews_count"]) for g in items] == [(5, 3)]
+
+    upstream.tables["games"][0]["rating_count"] = 1
+    assert client.portal.call(reconcile_ratings, True) == 1
+    assert client.portal.call(reconcile_ratings, False) == 0
+    assert upstream.tables["games"][0]["reviews_count"] == 3
+
+
+def test_list_responses_gzip_negotiated(client, upstream, game_row):
+    upstream.tables["games"] = [
+        game_row(id=i, description="Очень длинное описание игры. " * 20)
+        for i in range(1, 31)
+    ]
+    path = "/api/v1/games?page_size=30"
+
+    plain = client.get(path, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    compressed = client.get(path, headers={"Accept-Encoding": "br;q=1, gzip;q=0.5"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["vary"] == "Accept-Encoding"
+    assert compressed.num_bytes_downloaded * 10 < plain.num_bytes_downloaded
+    assert compressed.json() == plain.json()
+
+    etag = compressed.headers["etag"]
+    assert etag == plain.headers["etag"][:-1] + '-gzip"'
+    response = client.get(
+        path, headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+    refused = client.get(path, headers={"Accept-Encoding": "gzip;q=0"})
+    assert "content-encoding" not in refused.headers
+    small = client.get("/api/v1/games/genres", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+
+GAME_QUERY_BUDGETS = [
+    ("GET", "/api/v1/games/top", 1),
+    ("GET", "/api/v1/games/recent", 1),
+    ("GET", "/api/v1/games/genres", 1),
+    ("GET", "/api/v1/games/genres/counts", 1),
+    ("GET", "/api/v1/games/platforms", 1),
+    ("GET", "/api/v1/games/platforms/counts", 1),
+    ("GET", "/api/v1/games/export", 1),
+    ("GET", "/api/v1/games/batch?ids={game_id},999999", 2),
+    ("GET", "/api/v1/games", 2),
+    ("GET", "/api/v1/games?q=budget&genres=RPG", 3),
+    ("GET", "/api/v1/games/{game_id}", 2),
+    ("POST", "/api/v1/games", 2),
+    ("POST", "/api/v1/games/import", 2),
+    ("PATCH", "/api/v1/games/{game_id}/cover", 8),
+    ("PATCH", "/api/v1/games/{game_id}", 1),
+    ("DELETE", "/api/v1/games/{game_id}", 2),
+]
+
+
+def test_game_routes_query_budgets(client, query_budget, route_keys):
+    game = {"title": "Budget Game", "release_year": 2024, "genres": ["RPG"]}
+    game_id = client.post("/api/v1/games", json=game).json()["id"]
+    with open("tests/test_cover.jpg", "rb") as image_file:
+        image = image_file.read()
+    payloads = {
+        ("POST", "/api/v1/games"): {
+            "json": {"title": "Budget Game 2", "release_year": 2024}
+        },
+        ("POST", "/api/v1/games/import"): {
+            "files": {"file": ("games.ndjson", b'{"title": "Budget Import"}\n')}
+        },
+        ("PATCH", "/api/v1/games/{game_id}/cover"): {
+            "files": {"cover_image": ("cover.jpg", image, "image/jpeg")}
+        },
+        ("PATCH", "/api/v1/games/{game_id}"): {"json": {"release_year": 2023}},
+    }
+
+    covered = set()
+    for method, path, budget in GAME_QUERY_BUDGETS:
+        with query_budget(budget) as records:
+            response = client.request(
+                method,
+                path.format(game_id=game_id),
+                **payloads.get((method, path), {}),
+            )
+        assert response.status_code < 400, (method, path, response.text)
+        covered.update((method, route) for method, route, _ in records)
+
+    assert covered == route_keys("app.api.v1.games")
+
+
+def test_concurrent_game_reads_share_upstream_call(client, upstream, game_row):
+    upstream.tables["games"] = [game_row(id=5, title="Viral Game")]
+    upstream.delay = 0.2
+
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        responses = list(pool.map(lambda _: client.get("/api/v1/games/5"), range(20)))
+
+    assert all(r.status_code == 200 for r in responses)
+    assert {r.json()["title"] for r in responses} == {"Viral Game"}
+    reads = [c for c in upstream.calls if c["method"] == "GET"]
+    assert [c["table"] for c in reads] == ["games"]
+
+    upstream.delay = 0
+    client.patch("/api/v1/games/5", json={"title": "Viral Game 2"})
+    assert client.get("/api/v1/games/5").json()["title"] == "Viral Game 2"
@@ -1,5 +1,7 @@
 from unittest.mock import patch
 
+from app.services.pagination import encode_cursor
+
 
 def test_get_all_reviews(client):
     response = client.get("/api/v1/reviews?page=1&page_size=5")
@@ -83,3 +85,302 @@ def test_review_crud_complete(client):
 
     delete_game_resp = client.delete(f"/api/v1/games/{game_id}")
     assert delete_game_resp.status_code == 204
+
+
+def test_review_writes_are_single_rpc_calls(client, upstream, game_row):
+    upstream.tables["games"] = [game_row(id=3)]
+    upstream.tables["reviews"] = []
+
+    def write(method, path, **kwargs):
+        calls = len(upstream.calls)
+        response = client.request(method, path, **kwargs)
+        return response, [c["table"] for c in upstream.calls[calls:]]
+
+    with patch("fastapi.Request.client") as mock_client:
+        mock_client.host = "127.0.0.1"
+
+        review = {"game_id": 3, "rating": 6, "text": "Неплохая игра, но есть минусы"}
+        response, tables = write("POST", "/api/v1/reviews", json=review)
+        assert response.status_code == 201
+        assert tables == ["submit_review"]
+        review_id = response.json()["id"]
+
+        response, tables = write("POST", "/api/v1/reviews", json=review)
+        assert response.status_code == 409
+        assert tables == ["submit_review"]
+
+        missing = {**review, "game_id": 99}
+        assert client.post("/api/v1/reviews", json=missing).status_code == 404
+
+        path = f"/api/v1/reviews/{review_id}"
+        response, tables = write("PATCH", path, json={"rating": 9})
+        assert response.status_code == 200
+        assert response.json()["text"] == review["text"]
+        assert tables == ["edit_review"]
+        game = upstream.tables["games"][0]
+        assert (game["rating_count"], game["rating_sum"]) == (1, 9)
+
+        mock_client.host = "10.0.0.2"
+        assert client.patch(path, json={"rating": 1}).status_code == 403
+        assert client.delete(path).status_code == 403
+
+        mock_client.host = "127.0.0.1"
+        response, tables = write("DELETE", path)
+        assert response.status_code == 204
+        assert tables == ["delete_review"]
+        assert (game["rating_count"], game["rating_sum"]) == (0, 0)
+        assert client.patch(path, json={"rating": 1}).status_code == 404
+        assert client.delete(path).status_code == 404
+
+
+def test_deferred_rating_deltas_are_batched(client, upstream, game_row):
+    from app.core import database
+
+    upstream.tables["games"] = [game_row(id=game_id) for game_id in (3, 4)]
+    upstream.tables["reviews"] = []
+    games = {game["id"]: game for game in upstream.tables["games"]}
+
+    def aggregates(game_id):
+        game = games[game_id]
+        return tuple(game.get(key, 0) for key in ("rating_count", "rating_sum"))
+
+    with (
+        patch("app.core.config.settings.RATING_FLUSH_INTERVAL_SECONDS", 60),
+        patch("fastapi.Request.client") as mock_client,
+    ):
+        ids = []
+        for number, (game_id, rating) in enumerate([(3, 4), (3, 8), (4, 6)]):
+            mock_client.host = f"10.1.0.{number}"
+            review = {"game_id": game_id, "rating": rating, "text": "Игра дня релиза"}
+            response = client.post("/api/v1/reviews", json=review)
+            assert response.status_code == 201
+            ids.append(response.json()["id"])
+
+        mock_client.host = "10.1.0.0"
+        client.patch(f"/api/v1/reviews/{ids[0]}", json={"rating": 10})
+        mock_client.host = "10.1.0.2"
+        assert client.delete(f"/api/v1/reviews/{ids[2]}").status_code == 204
+        assert aggregates(3) == (0, 0)
+        assert not [c for c in upstream.calls if "rating_delta" in c["table"]]
+
+        mock_client.host = "10.1.0.9"
+        review = {"game_id": 3, "rating": 1, "text": "Хочу увидеть свою оценку"}
+        response = client.post("/api/v1/reviews?sync=true", json=review)
+        assert response.status_code == 201
+        assert aggregates(3) == (1, 1)
+
+        assert client.portal.call(database.flush_ratings) == 1
+        assert client.portal.call(database.flush_ratings) == 0
+
+    batches = [c["json"] for c in upstream.calls if c["table"] == "apply_rating_deltas"]
+    assert batches == [
+        {
+            "p_deltas": [
+                {
+                    "game_id": 3,
+                    "sum": 18,
+                    "count": 2,
+                    "histogram": [0, 0, 0, 0, 0, 0, 0, 1, 0, 1],
+                }
+            ]
+        }
+    ]
+    assert aggregates(3) == (3, 19)
+    assert aggregates(4) == (0, 0)
+    top = client.get("/api/v1/games/top?limit=1").json()
+    assert [(g["id"], g["average_rating"]) for g in top] == [(3, 6.3)]
+
+
+def test_sparse_fieldsets_for_reviews(client, upstream, game_row):
+    upstream.tables["games"] = [
+        game_row(
+            id=5,
+            title="Fields Game",
+            description="Описание, которое не нужно в ленте",
+            secret="служебная колонка",
+        )
+    ]
+    upstream.tables["reviews"] = [
+        {
+            "id": i,
+            "game_id": 5,
+            "rating": i,
+            "text": "Рецензия для проверки полей",
+            "ip_address": f"10.2.0.{i}",
+            "created_at": f"2024-01-0{i}T00:00:00+00:00",
+        }
+        for i in range(1, 4)
+    ]
+
+    recent = client.get(
+        "/api/v1/reviews/recent?limit=1&fields=rating,games(title)"
+    ).json()
+    assert upstream.calls[-1]["params"]["select"] == "id,rating,games(id,title)"
+    assert recent == [
+        {"id": 3, "rating": 3, "games": {"id": 5, "title": "Fields Game"}}
+    ]
+
+    listing = client.get("/api/v1/reviews?page_size=2&fields=rating").json()
+    assert listing["items"] == [{"id": 1, "rating": 1}, {"id": 2, "rating": 2}]
+
+    with patch("fastapi.Request.client") as mock_client:
+        mock_client.host = "10.2.0.2"
+        body = client.get(
+            "/api/v1/reviews/game/5?sort=highest&page_size=2&fields=rating"
+        ).json()
+    assert body["items"] == [
+        {"id": 3, "rating": 3, "is_own": False},
+        {"id": 2, "rating": 2, "is_own": True},
+    ]
+    assert body["own_review"] == {"id": 2, "rating": 2, "is_own": True}
+
+    review = client.get("/api/v1/reviews/1?fields=text,games(title)").json()
+    assert review == {
+        "id": 1,
+        "text": "Рецензия для проверки полей",
+        "games": {"id": 5, "title": "Fields Game"},
+    }
+    full = client.get("/api/v1/reviews/1").json()
+    assert full["ip_address"] == "10.2.0.1"
+    assert "secret" not in full["games"]
+    assert full["games"]["description"] == "Описание, которое не нужно в ленте"
+    response = client.get("/api/v1/reviews/recent?fields=games(secret)")
+    assert response.status_code == 400
+
+
+def test_etags_follow_review_writes(client, upstream, game_row):
+    upstream.tables["games"] = [game_row()]
+
+    def etag_changed(path, etag):
+        response = client.get(path, headers={"If-None-Match": etag})
+        if response.status_code == 304:
+            return False
+        assert response.status_code == 200
+        return True
+
+    with patch("fastapi.Request.client") as mock_client:
+        mock_client.host = "127.0.0.1"
+
+        paths = ["/api/v1/reviews/game/1", "/api/v1/reviews", "/api/v1/games/1"]
+        etags = {path: client.get(path).headers["ETag"] for path in paths}
+        assert not any(etag_changed(path, etags[path]) for path in paths)
+
+        review = {"game_id": 1, "rating": 8, "text": "Хорошая игра, рекомендую"}
+        review_id = client.post("/api/v1/reviews", json=review).json()["id"]
+        assert all(etag_changed(path, etags[path]) for path in paths)
+
+        etags = {path: client.get(path).headers["ETag"] for path in paths}
+        client.patch(f"/api/v1/reviews/{review_id}", json={"text": "Текст изменён!!"})
+        assert all(etag_changed(path, etags[path]) for path in paths[:2])
+        assert not etag_changed("/api/v1/games/1", etags["/api/v1/games/1"])
+
+        etags = {path: client.get(path).headers["ETag"] for path in paths}
+        client.delete(f"/api/v1/reviews/{review_id}")
+        assert all(etag_changed(path, etags[path]) for path in paths)
+
+        mock_client.host = "10.0.0.2"
+        own = etags["/api/v1/reviews/game/1"]
+        assert etag_changed("/api/v1/reviews/game/1", own)
+
+
+def test_game_reviews_paginated_with_histogram(client, upstream, game_row):
+    upstream.tables["games"] = [
+        game_row(
+            average_rating=7.0,
+            rating_count=3,
+            rating_histogram=[0, 0, 0, 0, 1, 0, 0, 1, 0, 1],
+        )
+    ]
+    upstream.tables["reviews"] = [
+        {
+            "id": review_id,
+            "game_id": 1,
+            "rating": rating,
+            "text": "Достаточно длинный текст",
+            "ip_address": ip_address,
+            "created_at": f"2024-01-0{review_id}T00:00:00+00:00",
+        }
+        for review_id, rating, ip_address in [
+            (1, 5, "10.0.0.1"),
+            (2, 10, "10.0.0.2"),
+            (3, 8, "127.0.0.1"),
+        ]
+    ]
+
+    with patch("fastapi.Request.client") as mock_client:
+        mock_client.host = "127.0.0.1"
+        response = client.get("/api/v1/reviews/game/1?page_size=2&sort=highest")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["reviews_count"] == 3
+        assert data["pages"] == 2
+        assert data["rating_histogram"][9] == 1
+        assert data["own_review"]["id"] == 3
+        assert data["own_review"]["is_own"] is True
+        assert len(data["items"]) == 2
+        assert data["next_cursor"]
+
+        page_call = [c for c in upstream.calls if c["table"] == "reviews"][0]
+        assert page_call["params"]["order"] == "rating.desc,id.desc"
+        assert page_call["params"]["limit"] == "2"
+        assert not [
+            c for c in upstream.calls if "count" in c["params"].get("select", "")
+        ]
+
+        cursor = data["next_cursor"]
+        response = client.get(f"/api/v1/reviews/game/1?sort=lowest&cursor={cursor}")
+        assert response.status_code == 400
+        for value in ("zz", None, "7"):
+            cursor = encode_cursor("highest", "value", {"value": value, "id": 1})
+            path = f"/api/v1/reviews/game/1?sort=highest&cursor={cursor}"
+            assert client.get(path).status_code == 400
+
+        response = client.get("/api/v1/reviews/game/1?page_size=2&sort=lowest")
+        assert [r["id"] for r in response.json()["items"]] == [1, 3]
+        cursor = response.json()["next_cursor"]
+        client.get(f"/api/v1/reviews/game/1?page_size=2&sort=lowest&cursor={cursor}")
+        params = upstream.calls[-2]["params"]
+        assert params["or"] == "(rating.gt.8,and(rating.eq.8,id.gt.3))"
+        assert params["order"] == "rating.asc,id.asc"
+
+
+REVIEW_QUERY_BUDGETS = [
+    ("GET", "/api/v1/reviews", 2),
+    ("GET", "/api/v1/reviews/recent", 2),
+    ("GET", "/api/v1/reviews/export", 1),
+    ("POST", "/api/v1/reviews", 1),
+    ("GET", "/api/v1/reviews/me", 2),
+    ("GET", "/api/v1/reviews/game/{game_id}", 4),
+    ("GET", "/api/v1/reviews/{review_id}", 2),
+    ("PATCH", "/api/v1/reviews/{review_id}", 1),
+    ("DELETE", "/api/v1/reviews/{review_id}", 1),
+]
+
+
+def test_review_routes_query_budgets(client, query_budget, route_keys):
+    game = {"title": "Review Budget Game", "release_year": 2024}
+    game_id = client.post("/api/v1/games", json=game).json()["id"]
+    review = {"game_id": game_id, "rating": 7, "text": "Вполне достойная игра"}
+    payloads = {
+        ("POST", "/api/v1/reviews"): {"json": review},
+        ("PATCH", "/api/v1/reviews/{review_id}"): {"json": {"rating": 3}},
+    }
+
+    covered, review_id = set(), None
+    with patch("fastapi.Request.client") as mock_client:
+        mock_client.host = "10.9.9.9"
+        for method, path, budget in REVIEW_QUERY_BUDGETS:
+            with query_budget(budget) as records:
+                response = client.request(
+                    method,
+                    path.format(game_id=game_id, review_id=review_id),
+                    **payloads.get((method, path), {}),
+                )
+            assert response.status_code < 400, (method, path, response.text)
+            if method == "POST":
+                review_id = response.json()["id"]
+            covered.update((method, route) for method, route, _ in records)
+
+    assert covered == route_keys("app.api.v1.reviews")
+    client.delete(f"/api/v1/games/{game_id}")
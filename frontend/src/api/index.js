@@ -17,7 +17,8 @@ export const api = {
   reviews: {
     list: (page = 1, pageSize = 10) => `${API_BASE}/reviews?page=${page}&page_size=${pageSize}`,
     recent: (limit = 10) => `${API_BASE}/reviews/recent?limit=${limit}`,
-    gameReviews: (gameId) => `${API_BASE}/reviews/game/${gameId}`,
+    gameReviews: (gameId, cursor = null) =>
+      `${API_BASE}/reviews/game/${gameId}` + (cursor ? `?cursor=${cursor}` : ''),
     create: () => `${API_BASE}/reviews`,
     update: (id) => `${API_BASE}/reviews/${id}`,
     delete: (id) => `${API_BASE}/reviews/${id}`,